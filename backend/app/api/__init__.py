@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import auth, posts, automation, analytics, accounts, audit, chat, platforms
+from app.api.endpoints import auth, posts, automation, analytics, accounts, audit, chat, platforms, dead_letters
 
 api_router = APIRouter()
 
@@ -13,3 +13,4 @@ api_router.include_router(chat.router, tags=["chat"], prefix="/chat")
 api_router.include_router(platforms.router, tags=["platforms"], prefix="/platforms")
 
 
+api_router.include_router(dead_letters.router, tags=["dead-letters"], prefix="/dead-letters")
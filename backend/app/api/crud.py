@@ -1,5 +1,7 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from app.models.post import Post, Draft
+from sqlalchemy.orm.util import identity_key
+from app.models.post import Post, Draft, PostStatus, POST_STATUS_TRANSITIONS
 from app.schemas.post import PostCreate, PostUpdate, DraftCreate, DraftUpdate
 from typing import List
 
@@ -35,6 +37,88 @@ def update_post(db: Session, post_id: int, post_in: PostUpdate, user_id: int | N
     db.refresh(db_post)
     return db_post
 
+def _transition_statement(to_status: PostStatus, user_id: int | None, values: dict):
+    to_status = PostStatus(to_status)
+    sources = [status for status, targets in POST_STATUS_TRANSITIONS.items() if to_status in targets]
+    if not sources:
+        raise ValueError(f"No transition leads to status '{to_status.value}'")
+    stmt = update(Post).where(Post.status.in_(sources))
+    if user_id is not None:
+        stmt = stmt.where(Post.user_id == user_id)
+    return stmt.values(status=to_status, version=Post.version + 1, **values)
+
+
+def _expire_transitioned(db: Session, post_ids, values: dict) -> None:
+    """
+    The Core UPDATE bypasses the session, so a Post already loaded here still
+    holds the old version and its next ORM flush would fail the version check
+    (StaleDataError). Expiring the written columns reloads them on next access.
+    """
+    attributes = ["status", "version", "published_at", *values]
+    for post_id in post_ids:
+        post = db.identity_map.get(identity_key(Post, post_id))
+        if post is not None:
+            db.expire(post, attributes)
+
+
+def transition_post_status(
+    db: Session,
+    post_id: int,
+    to_status: PostStatus,
+    expected_version: int | None = None,
+    user_id: int | None = None,
+    commit: bool = True,
+    **values
+):
+    """
+    Moves a post to `to_status` in one conditional UPDATE ... RETURNING.
+    The WHERE clause only matches statuses allowed to reach `to_status`
+    (and `expected_version`, when given), so concurrent writers cannot
+    overwrite each other. Returns the updated (id, status, version,
+    published_at) row, or None when the post is missing, in a status that
+    cannot make this transition, or was changed since `expected_version`.
+    With `commit=False` the caller commits, e.g. together with outbox events.
+    """
+    stmt = _transition_statement(to_status, user_id, values).where(Post.id == post_id)
+    if expected_version is not None:
+        stmt = stmt.where(Post.version == expected_version)
+    stmt = stmt.returning(Post.id, Post.status, Post.version, Post.published_at).execution_options(
+        synchronize_session=False
+    )
+    row = db.execute(stmt).first()
+    if row is not None:
+        _expire_transitioned(db, [post_id], values)
+    if commit:
+        db.commit()
+    return row
+
+def transition_posts_status(
+    db: Session,
+    post_ids: List[int],
+    to_status: PostStatus,
+    user_id: int | None = None,
+    **values
+):
+    """
+    All-or-nothing variant of transition_post_status for many posts: one
+    UPDATE ... RETURNING in one transaction. Returns the updated rows
+    (id, status, version, scheduled_at), or None after rolling back if any
+    post could not make the transition.
+    """
+    stmt = (
+        _transition_statement(to_status, user_id, values)
+        .where(Post.id.in_(post_ids))
+        .returning(Post.id, Post.status, Post.version, Post.scheduled_at)
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(stmt).all()
+    if len(rows) != len(set(post_ids)):
+        db.rollback()
+        return None
+    _expire_transitioned(db, post_ids, values)
+    db.commit()
+    return rows
+
 def delete_post(db: Session, post_id: int, user_id: int | None = None):
     db_post = get_post(db, post_id, user_id=user_id)
     if db_post:
@@ -25,6 +25,18 @@ def get_social_accounts(db: Session, user_id: int):
 def get_social_account(db: Session, account_id: int, user_id: int):
     return db.query(SocialAccount).filter(SocialAccount.id == account_id, SocialAccount.user_id == user_id).first()
 
+def get_social_accounts_by_ids(db: Session, user_id: int, account_ids: list[int], platform: Platform | None = None):
+    query = db.query(SocialAccount).filter(
+        SocialAccount.user_id == user_id,
+        SocialAccount.id.in_(account_ids),
+    )
+    if platform is not None:
+        query = query.filter(SocialAccount.platform == platform)
+    return query.all()
+
+def get_account_credentials(db_account: SocialAccount) -> dict:
+    return json.loads(decrypt_data(db_account.encrypted_credentials))
+
 def delete_social_account(db: Session, account_id: int, user_id: int):
     db_account = get_social_account(db, account_id, user_id)
     if db_account:
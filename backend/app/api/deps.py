@@ -12,20 +12,14 @@ oauth2_scheme = OAuth2PasswordBearer(
     auto_error=False
 )
 
-async def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db),
-    token: str | None = Depends(oauth2_scheme),
-):
+def get_user_from_token(db: Session, token: str | None) -> User:
+    """Resolves an access token (optionally "Bearer "-prefixed) to its user, or raises 401."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    if not token:
-        token = request.cookies.get("access_token")
-
     if not token:
         raise credentials_exception
 
@@ -48,6 +42,15 @@ async def get_current_user(
         raise credentials_exception
     return user
 
+async def get_current_user(
+    request: Request,
+    db: Session = Depends(get_db),
+    token: str | None = Depends(oauth2_scheme),
+):
+    if not token:
+        token = request.cookies.get("access_token")
+    return get_user_from_token(db, token)
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -65,5 +68,30 @@ class RoleChecker:
             )
         return user
 
+def token_subject(token: str | None) -> str | None:
+    """The subject of a valid access token, without a database lookup; None otherwise."""
+    if not token:
+        return None
+    if token.startswith("Bearer "):
+        token = token.removeprefix("Bearer ").strip()
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "access":
+        return None
+    return payload.get("sub")
+
+def is_admin(user: User) -> bool:
+    return bool(user.is_superuser) or user.role == UserRole.ADMIN
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
 def get_trace_id(request: Request) -> str:
     return getattr(request.state, "trace_id", "unknown")
@@ -1,13 +1,27 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Body, HTTPException, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Body, HTTPException, Depends, Request
+from typing import Optional
+from sqlalchemy.orm import Session
 import json
 import asyncio
 import logging
 from datetime import datetime
 import uuid
 
-from app.core.event_bus import subscribe_events, publish_event
+from app.core.event_bus import (
+    OVERFLOW_POLICIES,
+    EventFilter,
+    SubscriberOverflow,
+    parse_event_id,
+    publish_event,
+    subscribe_event_batches,
+    subscriber_stats,
+)
 from app.core.config import settings
-from app.api import deps
+from app.core.celery_app import QUEUE_ANALYTICS, browser_queue, celery_app
+from app.core.lanes import Lane
+from app.api import crud_audit, deps
+from app.models.user import User
+from app.core.db import SessionLocal, get_db
 from app.schemas.planning import PlanningRequest, PlanningResponse
 from app.services.ai_service import ai_service
 
@@ -20,54 +34,154 @@ def _demo_job_id(prefix: str = "job") -> str:
     return f"demo-{prefix}-{uuid.uuid4().hex[:12]}"
 
 
-async def _heartbeat_mode(websocket: WebSocket) -> None:
-    while True:
-        await asyncio.sleep(5)
-        fallback = {
-            "timestamp": datetime.now().isoformat(),
-            "level": "WARNING",
-            "message": "Event stream unavailable. Waiting for reconnection...",
-            "trace_id": None,
-        }
-        await websocket.send_text(json.dumps(fallback))
+# Seconds an unauthenticated socket has to send its auth message.
+WS_AUTH_TIMEOUT_SECONDS = 10
+WS_POLICY_VIOLATION = 4401
+# Close code for clients that cannot keep up with their event stream.
+WS_SLOW_CONSUMER = 4408
+# "Try Again Later": the event stream is unavailable; the client reconnects with its cursor.
+WS_TRY_AGAIN_LATER = 1013
+WS_FILTER_FIELDS = ("user_id", "trace_id", "post_id", "job_id")
+
+
+def _event_filter_for(user, requested: dict) -> EventFilter:
+    """
+    Builds the subscription filter. Admins may watch any user or everything;
+    other users always get their own events, narrowed by trace, post or job.
+    A job or trace id, which only its creator is told, also opens that job's
+    events that carry no owner (e.g. jobs started from /automation/run).
+    """
+    values = {field: requested.get(field) for field in WS_FILTER_FIELDS if requested.get(field) not in (None, "")}
+    for field in ("user_id", "post_id"):
+        if field in values:
+            try:
+                values[field] = int(values[field])
+            except (TypeError, ValueError):
+                raise ValueError(f"{field} must be an integer")
+    if deps.is_admin(user):
+        return EventFilter(**values)
+    if values.get("user_id", user.id) != user.id:
+        raise PermissionError("Not allowed to watch another user's events")
+    if "job_id" in values or "trace_id" in values:
+        values.pop("user_id", None)
+        return EventFilter(owner_id=user.id, **values)
+    values["user_id"] = user.id
+    return EventFilter(**values)
+
+
+async def _authenticate_websocket(websocket: WebSocket, token: Optional[str]):
+    """
+    Resolves the socket's user from `?token=`, the `access_token` cookie or a
+    first message `{"type": "auth", "token": ..., <filters>}`. Returns the user
+    and the filter fields the client asked for.
+    """
+    requested = dict(websocket.query_params)
+    token = token or websocket.cookies.get("access_token")
+    if not token:
+        message = await asyncio.wait_for(websocket.receive_json(), timeout=WS_AUTH_TIMEOUT_SECONDS)
+        if not isinstance(message, dict) or message.get("type") != "auth":
+            raise HTTPException(status_code=401, detail="Expected an auth message")
+        token = message.get("token")
+        requested.update({field: message[field] for field in WS_FILTER_FIELDS if field in message})
+
+    db = SessionLocal()
+    try:
+        user = deps.get_user_from_token(db, token)
+    finally:
+        db.close()
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="Inactive user")
+    return user, requested
+
 
 @router.websocket("/ws/logs")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    last_event_id: Optional[str] = None,
+    token: Optional[str] = None,
+    overflow: Optional[str] = None,
+):
+    """
+    Streams the caller's automation events. The socket authenticates with
+    `?token=`, the session cookie or a first `{"type": "auth", "token": ...}`
+    message, and may narrow the stream with `user_id` (admins only for other
+    users), `trace_id`, `post_id` or `job_id`, as query parameters or fields of
+    the auth message; filtering happens server-side. Every event carries an
+    `event_id`; a client that reconnects with `?last_event_id=<id>` first
+    receives what it missed.
+
+    A client that falls behind gets several events per frame as
+    `{"type": "batch", "events": [...]}`. Its outbound queue is bounded; when
+    full, `overflow` (default `EVENT_SUBSCRIBER_OVERFLOW`) drops the oldest
+    events, coalesces them per job, or disconnects the client. A send blocked
+    for `WS_SEND_TIMEOUT_SECONDS` also disconnects it. If the event stream
+    is unavailable the socket closes with 1013 (try again later).
+    """
     await websocket.accept()
-    initial = {
-        "timestamp": datetime.now().isoformat(),
-        "level": "INFO",
-        "message": "Connected to automation event stream",
-        "trace_id": None
-    }
-    await websocket.send_text(json.dumps(initial))
 
-    # In demo mode, do not attempt Redis pub/sub.
-    if settings.DEMO_MODE:
-        try:
-            await _heartbeat_mode(websocket)
-        except WebSocketDisconnect:
-            logger.info("WebSocket client disconnected from /automation/ws/logs (demo mode)")
+    try:
+        user, requested = await _authenticate_websocket(websocket, token)
+        event_filter = _event_filter_for(user, requested)
+        if overflow is not None and overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}")
+    except WebSocketDisconnect:
+        return
+    except (HTTPException, asyncio.TimeoutError, ValueError, PermissionError) as exc:
+        reason = getattr(exc, "detail", None) or str(exc) or "Authentication timed out"
+        logger.info(f"Rejected /automation/ws/logs subscription: {reason}")
+        await websocket.close(code=WS_POLICY_VIOLATION, reason=reason[:120])
         return
+    await websocket.send_text(json.dumps(_connected_message(event_filter)))
 
     try:
-        async for event in subscribe_events():
-            await websocket.send_text(json.dumps(event))
+        if last_event_id:
+            try:
+                parse_event_id(last_event_id)
+            except ValueError:
+                logger.info(f"Ignoring malformed last_event_id {last_event_id!r}")
+                last_event_id = None
+        batches = subscribe_event_batches(
+            last_event_id=last_event_id,
+            event_filter=event_filter,
+            overflow=overflow,
+            max_batch=settings.WS_FRAME_MAX_EVENTS,
+            label={"user_id": user.id},
+        )
+        async for batch in batches:
+            frame = batch[0] if len(batch) == 1 else {"type": "batch", "events": batch}
+            await asyncio.wait_for(
+                websocket.send_text(json.dumps(frame)), timeout=settings.WS_SEND_TIMEOUT_SECONDS
+            )
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected from /automation/ws/logs")
+    except (SubscriberOverflow, asyncio.TimeoutError) as exc:
+        logger.info(f"Disconnecting slow /automation/ws/logs client of user {user.id}: {exc or 'send timed out'}")
+        await websocket.close(code=WS_SLOW_CONSUMER, reason="Client too slow for event stream")
     except Exception as exc:
-        logger.info("Redis event stream unavailable, using heartbeat mode")
-        logger.debug("Event stream fallback reason: %s", exc)
-        try:
-            await _heartbeat_mode(websocket)
-        except WebSocketDisconnect:
-            logger.info("WebSocket client disconnected during fallback mode")
+        # Reconnecting with `last_event_id` replays whatever is missed meanwhile.
+        logger.info(f"Event stream unavailable, asking /automation/ws/logs client to reconnect: {exc}")
+        await websocket.close(code=WS_TRY_AGAIN_LATER, reason="Event stream unavailable")
+
+
+def _connected_message(event_filter: EventFilter) -> dict:
+    message = {
+        "timestamp": datetime.now().isoformat(),
+        "level": "INFO",
+        "message": "Connected to automation event stream",
+        "trace_id": None
+    }
+    message["subscription"] = {
+        field: getattr(event_filter, field) for field in WS_FILTER_FIELDS if getattr(event_filter, field) is not None
+    }
+    return message
 
 
 @router.post("/trigger/{job_type}")
-async def trigger_job(job_type: str, payload: dict = Body(...)):
+async def trigger_job(job_type: str, payload: dict = Body(...), lane: Optional[Lane] = None):
     """
-    Triggers a background automation job.
+    Triggers a background automation job. `linkedin_login` runs in the
+    interactive lane and `scrape_analytics` on the analytics pool unless
+    `lane` asks for a browser lane explicitly.
     """
     logger.info(f"Triggering job: {job_type}")
 
@@ -87,7 +201,11 @@ async def trigger_job(job_type: str, payload: dict = Body(...)):
     from app.tasks.worker import execute_act_goal_task
 
     if job_type == "linkedin_login":
-        task = execute_act_goal_task.delay("Login to LinkedIn", context=payload)
+        task = execute_act_goal_task.apply_async(
+            args=["Login to LinkedIn"],
+            kwargs={"context": payload},
+            queue=browser_queue(lane or Lane.INTERACTIVE),
+        )
         publish_event({
             "level": "INFO",
             "message": "Enqueued linkedin_login job",
@@ -97,7 +215,11 @@ async def trigger_job(job_type: str, payload: dict = Body(...)):
         return {"status": "enqueued", "job_id": str(task.id), "job_type": job_type}
     
     elif job_type == "scrape_analytics":
-        task = execute_act_goal_task.delay("Scrape analytics from dashboard", context=payload)
+        task = execute_act_goal_task.apply_async(
+            args=["Scrape analytics from dashboard"],
+            kwargs={"context": payload},
+            queue=browser_queue(lane) if lane else QUEUE_ANALYTICS,
+        )
         publish_event({
             "level": "INFO",
             "message": "Enqueued scrape_analytics job",
@@ -113,6 +235,7 @@ async def trigger_job(job_type: str, payload: dict = Body(...)):
 async def run_custom_job(payload: dict = Body(...)):
     """
     Trigger an automation job using a custom goal and optional context.
+    `lane` (interactive, scheduled or background) defaults to interactive.
     """
     from app.tasks.worker import execute_act_goal_task
 
@@ -120,6 +243,10 @@ async def run_custom_job(payload: dict = Body(...)):
     context = payload.get("context", {})
     if not goal:
         raise HTTPException(status_code=400, detail="Missing required field: goal")
+    try:
+        lane = Lane(payload.get("lane") or Lane.INTERACTIVE)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unknown lane: {payload.get('lane')}")
 
     if settings.DEMO_MODE:
         job_id = _demo_job_id("run")
@@ -132,7 +259,9 @@ async def run_custom_job(payload: dict = Body(...)):
         })
         return {"status": "completed_demo", "job_id": job_id, "goal": goal}
 
-    task = execute_act_goal_task.delay(goal, context=context)
+    task = execute_act_goal_task.apply_async(
+        args=[goal], kwargs={"context": context}, queue=browser_queue(lane)
+    )
     publish_event({
         "level": "INFO",
         "message": f"Enqueued custom job: {goal}",
@@ -149,7 +278,8 @@ async def plan_goal(
 ):
     """
     Generate a multi-step automation plan from a high-level goal.
-    Optionally enqueue executable tasks when `execute=true`.
+    Optionally enqueue executable tasks when `execute=true`, in the background
+    lane unless `lane` says otherwise.
     """
     plan = await ai_service.generate_plan(
         goal=request.goal,
@@ -188,7 +318,11 @@ async def plan_goal(
 
             from app.tasks.worker import execute_act_goal_task
             try:
-                queued = execute_act_goal_task.delay(task.get("goal", request.goal), context=task.get("context", {}))
+                queued = execute_act_goal_task.apply_async(
+                    args=[task.get("goal", request.goal)],
+                    kwargs={"context": task.get("context", {})},
+                    queue=browser_queue(request.lane),
+                )
                 execution.append(
                     {
                         "task_id": task.get("id", 0),
@@ -230,11 +364,121 @@ async def plan_goal(
     return payload
 
 
+@router.get("/metrics/queues")
+async def get_queue_metrics():
+    """
+    Backlog and latency per Celery queue for autoscaling: depth, age of the
+    oldest waiting message, and p50/p95 wait and run times of recent tasks.
+    """
+    from app.tasks.telemetry import read_queue_metrics
+
+    queues = [queue.name for queue in celery_app.conf.task_queues]
+    try:
+        metrics = await asyncio.to_thread(read_queue_metrics, queues)
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Metrics unavailable: {exc}")
+
+    return {
+        "queues": metrics,
+        "totals": {"depth": sum(queue["depth"] for queue in metrics.values())},
+    }
+
+
+@router.get("/metrics/browsers")
+async def get_browser_metrics():
+    """
+    Browser governor state per worker process: open contexts, queued
+    automation requests, Chromium RSS and recycle counts.
+    """
+    from app.services.nova.browser_governor import read_browser_metrics
+
+    try:
+        workers = await asyncio.to_thread(read_browser_metrics)
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Metrics unavailable: {exc}")
+
+    return {
+        "workers": workers,
+        "totals": {
+            "active_contexts": sum(worker["active_contexts"] for worker in workers),
+            "queued_requests": sum(worker["queued_requests"] for worker in workers),
+            "rss_mb": round(sum(worker["rss_mb"] for worker in workers), 1),
+            "recycles": sum(worker["recycles"] for worker in workers),
+        },
+    }
+
+
+@router.get("/metrics/websockets")
+async def get_websocket_metrics(current_user: User = Depends(deps.get_current_admin_user)):
+    """
+    Event stream connections of this API process: outbound queue depth, lag
+    of the oldest undelivered event, and events delivered, dropped and
+    coalesced per connection. Admins only, as connections carry user ids
+    and filters.
+    """
+    connections = subscriber_stats()
+    return {
+        "connections": connections,
+        "totals": {
+            "connections": len(connections),
+            "depth": sum(connection["depth"] for connection in connections),
+            "max_lag_seconds": max((connection["lag_seconds"] for connection in connections), default=0.0),
+            "dropped": sum(connection["dropped"] for connection in connections),
+            "coalesced": sum(connection["coalesced"] for connection in connections),
+        },
+    }
+
+
+def _resolve_traces(db: Session, result: dict, user: User) -> dict:
+    """Attaches the audit-log step traces a compact job result refers to."""
+    resolved = dict(result)
+    audit_log_id = result.get("audit_log_id")
+    if audit_log_id:
+        resolved["trace"] = _load_trace(db, audit_log_id, user)
+    if isinstance(result.get("accounts"), list):
+        resolved["accounts"] = [
+            {**account, "trace": _load_trace(db, account["audit_log_id"], user)}
+            if account.get("audit_log_id") else account
+            for account in result["accounts"]
+        ]
+    return resolved
+
+
+def _load_trace(db: Session, audit_log_id: int, user: User):
+    audit = crud_audit.get_audit_log(db, audit_id=audit_log_id)
+    if not audit:
+        return None
+    # Audit rows record the owner as their user id (workers) or email (API).
+    if not deps.is_admin(user) and audit.user not in (str(user.id), user.email):
+        raise HTTPException(status_code=403, detail="Not allowed to view this job's traces")
+    details = audit.details or {}
+    return {
+        "audit_log_id": audit.id,
+        "status": audit.status,
+        "result": details.get("result"),
+        "error": details.get("error"),
+        "error_code": details.get("error_code"),
+    }
+
+
 @router.get("/jobs/{job_id}")
-async def get_job_status(job_id: str):
+async def get_job_status(
+    job_id: str,
+    request: Request,
+    include_trace: bool = False,
+    db: Session = Depends(get_db),
+    token: Optional[str] = Depends(deps.oauth2_scheme),
+):
     """
     Retrieve Celery task state and retry metadata for a job.
+    Results are compact; pass `include_trace=true` to load the step traces
+    they reference from the audit log. Traces require authentication and
+    are only returned to their owner or an admin.
     """
+    current_user = None
+    if include_trace:
+        current_user = await deps.get_current_active_user(await deps.get_current_user(request, db, token))
+
     if settings.DEMO_MODE and job_id.startswith("demo-"):
         return {
             "job_id": job_id,
@@ -251,9 +495,7 @@ async def get_job_status(job_id: str):
             },
         }
 
-    from app.tasks.worker import celery_app as worker_celery
-
-    result = worker_celery.AsyncResult(job_id)
+    result = celery_app.AsyncResult(job_id)
     info = result.info if isinstance(result.info, dict) else {}
 
     error_message = None
@@ -265,6 +507,10 @@ async def get_job_status(job_id: str):
         else:
             error_message = str(result.info or result.result)
 
+    job_result = result.result if result.ready() and result.successful() else None
+    if include_trace and isinstance(job_result, dict):
+        job_result = await asyncio.to_thread(_resolve_traces, db, job_result, current_user)
+
     return {
         "job_id": job_id,
         "state": result.state,
@@ -273,6 +519,7 @@ async def get_job_status(job_id: str):
         "retry_count": info.get("retry_count", 0),
         "trace_id": info.get("trace_id"),
         "post_id": info.get("post_id"),
+        "audit_log_id": info.get("audit_log_id"),
         "error": error_message,
-        "result": result.result if result.ready() and result.successful() else None,
+        "result": job_result,
     }
@@ -0,0 +1,156 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+import logging
+import uuid
+
+from app.api import crud, deps
+from app.core.celery_app import browser_queue, celery_app
+from app.core.db import get_db
+from app.core.event_bus import publish_event
+from app.models.post import PostStatus
+from app.models.user import User
+from app.schemas.dead_letter import (
+    DeadLetter,
+    DeadLetterReplayItem,
+    DeadLetterReplayRequest,
+    DeadLetterReplayResponse,
+)
+from app.services.dead_letter_service import DeadLetterService, STATUS_DEAD
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/", response_model=List[DeadLetter])
+def read_dead_letters(
+    status: Optional[str] = STATUS_DEAD,
+    error_code: Optional[str] = None,
+    platform: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    query = DeadLetterService.query(
+        db,
+        user_id=current_user.id,
+        status=status,
+        error_code=error_code,
+        platform=platform,
+        since=since,
+        until=until,
+    )
+    return query.offset(skip).limit(limit).all()
+
+
+@router.get("/{letter_id}", response_model=DeadLetter)
+def read_dead_letter(
+    letter_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    letter = DeadLetterService.query(db, user_id=current_user.id, status=None, ids=[letter_id]).first()
+    if not letter:
+        raise HTTPException(status_code=404, detail="Dead letter not found")
+    return letter
+
+
+@router.post("/replay", response_model=DeadLetterReplayResponse)
+def replay_dead_letters(
+    request: Request,
+    replay_in: DeadLetterReplayRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Re-enqueues dead-lettered publications matching the filters, oldest first.
+    Jobs are spaced `60 / rate_per_minute` seconds apart with countdowns, so a
+    platform that just recovered is not hit by the whole backlog at once.
+    Posts that are no longer failed (edited, rescheduled or published since)
+    are skipped, and a post that failed several times is replayed once.
+    """
+    # Registers the task functions the letters refer to.
+    import app.tasks.worker  # noqa: F401
+
+    trace_id = getattr(request.state, "trace_id", str(uuid.uuid4()))
+    letters = DeadLetterService.query(
+        db,
+        user_id=current_user.id,
+        error_code=replay_in.error_code,
+        platform=replay_in.platform,
+        since=replay_in.since,
+        until=replay_in.until,
+        ids=replay_in.ids,
+    ).limit(replay_in.limit).all()
+
+    interval = 60.0 / replay_in.rate_per_minute
+    queue = browser_queue(replay_in.lane)
+    replayed_posts = {}
+    items = []
+    for letter in letters:
+        if letter.post_id is not None and letter.post_id in replayed_posts:
+            job_id = replayed_posts[letter.post_id]
+            DeadLetterService.mark_replayed(db, letter, job_id)
+            items.append(DeadLetterReplayItem(
+                id=letter.id, post_id=letter.post_id, status="replayed", job_id=job_id,
+                reason="Post already replayed in this batch"
+            ))
+            continue
+
+        if letter.post_id is not None:
+            post = crud.get_post(db, letter.post_id, user_id=current_user.id)
+            reason = None
+            if post is None:
+                reason = "Post was deleted"
+            elif post.status != PostStatus.FAILED:
+                reason = f"Post is {post.status.value}"
+            elif crud.transition_post_status(
+                db, post.id, PostStatus.SCHEDULED, expected_version=post.version
+            ) is None:
+                reason = "Post changed during replay"
+            if reason:
+                DeadLetterService.mark_skipped(db, letter, reason)
+                items.append(DeadLetterReplayItem(
+                    id=letter.id, post_id=letter.post_id, status="skipped", reason=reason
+                ))
+                continue
+
+        countdown = round(len(replayed_posts) * interval, 3)
+        try:
+            task = celery_app.tasks[letter.task_name].apply_async(
+                args=letter.args,
+                kwargs=DeadLetterService.replay_kwargs(letter, str(uuid.uuid4())),
+                countdown=countdown,
+                queue=queue,
+            )
+        except Exception as exc:
+            if letter.post_id is not None:
+                crud.transition_post_status(db, letter.post_id, PostStatus.FAILED)
+            raise HTTPException(
+                status_code=503,
+                detail=f"Unable to enqueue replay after {len(replayed_posts)} jobs: {exc}"
+            )
+        replayed_posts[letter.post_id if letter.post_id is not None else f"letter:{letter.id}"] = str(task.id)
+        DeadLetterService.mark_replayed(db, letter, str(task.id))
+        items.append(DeadLetterReplayItem(
+            id=letter.id, post_id=letter.post_id, status="replayed", job_id=str(task.id), countdown=countdown
+        ))
+
+    replayed = sum(1 for item in items if item.status == "replayed")
+    publish_event({
+        "level": "INFO",
+        "message": f"Replaying {len(replayed_posts)} dead-lettered jobs over {len(replayed_posts) * interval:.0f}s",
+        "trace_id": trace_id,
+        "user_id": current_user.id,
+        "status": "replaying",
+    })
+    return DeadLetterReplayResponse(
+        trace_id=trace_id,
+        replayed=replayed,
+        skipped=len(items) - replayed,
+        items=items,
+    )
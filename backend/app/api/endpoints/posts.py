@@ -1,11 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Request
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from app.api import crud, deps
+from sqlalchemy.orm.exc import StaleDataError
+from typing import List, Dict, Any, Optional
+import logging
+from app.api import crud, crud_account, deps
+from app.core.celery_app import browser_queue, local_jobs_enabled
 from app.core.config import settings
 from app.core.db import get_db
-from app.schemas.post import Post, PostCreate, PostUpdate, Draft, DraftCreate, DraftUpdate
+from app.core.lanes import Lane
+from app.schemas.post import (
+    Post,
+    PostCreate,
+    PostUpdate,
+    PostScheduleRequest,
+    PostBulkScheduleRequest,
+    Draft,
+    DraftCreate,
+    DraftUpdate,
+)
+from app.models.post import Post as PostModel, PostStatus, POST_STATUS_TRANSITIONS
 from app.models.user import User
+from app.services.idempotency_service import (
+    IdempotencyService,
+    SCOPE_REQUEST,
+    STATUS_FAILED,
+    STATUS_IN_PROGRESS,
+    STATUS_SUCCEEDED,
+)
+from app.services.scheduler_service import publication_scheduler, to_utc_naive, utc_now_naive
 
 from app.services.ai_service import ai_service
 from app.services.nova.schemas import (
@@ -21,6 +43,8 @@ import shutil
 import uuid
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 # Service is used via ai_service singleton
 
@@ -37,6 +61,49 @@ BLOCKED_FILE_SIGNATURES = [
 ]
 
 
+def _transition_post(db: Session, post, to_status: PostStatus, user_id: int, **values):
+    """Applies a status transition, answering 409 when the post's status does not allow it."""
+    from_status = post.status
+    row = crud.transition_post_status(db, post.id, to_status, user_id=user_id, **values)
+    if row is None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Post cannot move from {from_status.value} to {to_status.value}"
+        )
+    return row
+
+
+def _submit_local_publication(
+    post_id: int, lane: Lane, trace_id: Optional[str] = None, eta: Optional[datetime] = None
+) -> str:
+    """
+    JOB_BACKEND=local: the job runner holds the publication until `eta`, so no
+    Redis schedule or dispatcher is involved. Each post has one job id;
+    rescheduling or publishing now moves that job instead of adding another.
+    """
+    from app.tasks.worker import execute_post_publication
+
+    task = execute_post_publication.apply_async(
+        args=[post_id],
+        kwargs={"trace_id": trace_id},
+        task_id=f"publish-post-{post_id}",
+        eta=eta,
+        queue=browser_queue(lane),
+    )
+    return str(task.id)
+
+
+def _restore_statuses(db: Session, previous: Dict[int, PostStatus], post_ids: List[int], user_id: int) -> None:
+    """Moves posts that could not be handed over back from SCHEDULED to their previous status."""
+    by_status: Dict[PostStatus, List[int]] = {}
+    for post_id in post_ids:
+        if previous[post_id] != PostStatus.SCHEDULED:
+            by_status.setdefault(previous[post_id], []).append(post_id)
+    for status, ids in by_status.items():
+        if crud.transition_posts_status(db, ids, status, user_id=user_id) is None:
+            logger.warning(f"Could not move posts {ids} back to {status.value}")
+
+
 def _build_media_metadata(file_path: str, original_name: str, content_type: str | None) -> Dict[str, Any]:
     extension = os.path.splitext(original_name)[1].lower()
     lower_type = (content_type or "").lower()
@@ -217,9 +284,36 @@ def update_post(
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_active_user)
 ):
-    post = crud.update_post(db, post_id=post_id, post_in=post_in, user_id=current_user.id)
+    post = crud.get_post(db, post_id=post_id, user_id=current_user.id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+
+    fields = post_in.model_dump(exclude_unset=True)
+    if fields.get("scheduled_at") is not None:
+        fields["scheduled_at"] = to_utc_naive(fields["scheduled_at"])
+    to_status = fields.pop("status", None)
+    if to_status is not None and to_status != post.status:
+        _transition_post(db, post, to_status, current_user.id, **fields)
+        post = crud.get_post(db, post_id=post_id, user_id=current_user.id)
+    elif fields:
+        try:
+            post = crud.update_post(db, post_id=post_id, post_in=PostUpdate(**fields), user_id=current_user.id)
+        except StaleDataError:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Post was modified concurrently; reload and retry")
+
+    # Keep the dispatcher's schedule in step; it also re-checks the database
+    # before publishing, so a failure here never publishes a stale time.
+    try:
+        if local_jobs_enabled():
+            if post.status == PostStatus.SCHEDULED and fields.get("scheduled_at") is not None:
+                _submit_local_publication(post_id, Lane.SCHEDULED, eta=post.scheduled_at)
+        elif post.status != PostStatus.SCHEDULED:
+            publication_scheduler.cancel(post_id)
+        elif fields.get("scheduled_at") is not None:
+            publication_scheduler.reschedule(post_id, post.scheduled_at)
+    except Exception as exc:
+        logger.warning(f"Failed to sync schedule for post {post_id}: {exc}")
     return post
 
 @router.delete("/posts/{post_id}")
@@ -231,41 +325,204 @@ def delete_post(
     post = crud.delete_post(db, post_id=post_id, user_id=current_user.id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    if local_jobs_enabled():
+        # A pending local job finds the post gone and does nothing.
+        return {"status": "success"}
+    try:
+        publication_scheduler.cancel(post_id)
+    except Exception as exc:
+        logger.warning(f"Failed to remove post {post_id} from schedule: {exc}")
     return {"status": "success"}
 
+@router.post("/posts/schedule/bulk")
+def schedule_posts_bulk(
+    request: Request,
+    bulk_in: PostBulkScheduleRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Schedules many posts at once: ownership is checked in one query, statuses
+    flip in one transaction, future posts go to the dispatcher in one Redis
+    pipeline and due posts are enqueued together as a Celery group.
+    """
+    trace_id = getattr(request.state, "trace_id", str(uuid.uuid4()))
+    post_ids = list(dict.fromkeys(bulk_in.post_ids))
+
+    owned = {
+        row.id: row.status
+        for row in db.query(PostModel.id, PostModel.status).filter(
+            PostModel.id.in_(post_ids), PostModel.user_id == current_user.id
+        )
+    }
+    missing = [post_id for post_id in post_ids if post_id not in owned]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Posts not found: {missing}")
+
+    rows = crud.transition_posts_status(db, post_ids, PostStatus.SCHEDULED, user_id=current_user.id)
+    if rows is None:
+        blocked = [
+            post_id for post_id, status in owned.items()
+            if PostStatus.SCHEDULED not in POST_STATUS_TRANSITIONS[status]
+        ]
+        raise HTTPException(
+            status_code=409,
+            detail=f"Posts cannot be scheduled from their current status: {blocked or post_ids}"
+        )
+
+    if settings.DEMO_MODE:
+        crud.transition_posts_status(
+            db, post_ids, PostStatus.PUBLISHED, user_id=current_user.id, published_at=datetime.utcnow()
+        )
+        return {
+            "status": "completed_demo",
+            "message": f"{len(post_ids)} posts published in demo mode",
+            "trace_id": trace_id,
+            "posts": [
+                {"post_id": post_id, "status": "completed_demo", "job_id": f"demo-post-{uuid.uuid4().hex[:10]}"}
+                for post_id in post_ids
+            ]
+        }
+
+    now = utc_now_naive()
+    scheduled_at = {row.id: row.scheduled_at for row in rows}
+    future = [
+        post_id for post_id in post_ids
+        if not bulk_in.publish_now and scheduled_at[post_id] and scheduled_at[post_id] > now
+    ]
+    future_ids = set(future)
+    due = [post_id for post_id in post_ids if post_id not in future_ids]
+
+    results = {}
+    job_ids = {}
+    try:
+        if local_jobs_enabled():
+            for post_id in future:
+                job_ids[post_id] = _submit_local_publication(
+                    post_id, bulk_in.lane or Lane.SCHEDULED, trace_id=trace_id, eta=scheduled_at[post_id]
+                )
+        else:
+            lane = bulk_in.lane.value if bulk_in.lane else None
+            publication_scheduler.schedule_many(
+                ((post_id, scheduled_at[post_id]) for post_id in future), lane=lane
+            )
+    except Exception as exc:
+        _restore_statuses(db, owned, post_ids, current_user.id)
+        raise HTTPException(status_code=503, detail=f"Unable to schedule jobs: {exc}")
+    for post_id in future:
+        results[post_id] = {
+            "post_id": post_id,
+            "status": "scheduled",
+            "job_id": job_ids.get(post_id),
+            "scheduled_at": scheduled_at[post_id].isoformat()
+        }
+
+    if due and local_jobs_enabled():
+        try:
+            for post_id in due:
+                job_ids[post_id] = _submit_local_publication(post_id, bulk_in.lane or Lane.SCHEDULED, trace_id=trace_id)
+        except Exception as exc:
+            _restore_statuses(db, owned, due, current_user.id)
+            raise HTTPException(status_code=503, detail=f"Unable to enqueue jobs: {exc}")
+        for post_id in due:
+            results[post_id] = {"post_id": post_id, "status": "queued", "job_id": job_ids[post_id]}
+    elif due:
+        from celery import group
+        from app.tasks.worker import execute_post_publication
+
+        try:
+            group_result = group(
+                execute_post_publication.s(post_id, trace_id=trace_id).set(queue=browser_queue(bulk_in.lane or Lane.SCHEDULED))
+                for post_id in due
+            ).apply_async()
+        except Exception as exc:
+            _restore_statuses(db, owned, due, current_user.id)
+            raise HTTPException(status_code=503, detail=f"Unable to enqueue jobs: {exc}")
+        for post_id, task in zip(due, group_result.results):
+            results[post_id] = {"post_id": post_id, "status": "queued", "job_id": str(task.id)}
+        # Only once they are enqueued: a stale entry at worst dispatches a duplicate the
+        # idempotency claim skips, while a missing one could leave a post unpublished.
+        try:
+            publication_scheduler.cancel_many(due)
+        except Exception as exc:
+            logger.warning(f"Failed to clear schedule for posts {due}: {exc}")
+
+    return {
+        "status": "scheduled",
+        "message": f"{len(future)} posts scheduled, {len(due)} queued for publishing",
+        "trace_id": trace_id,
+        "posts": [results[post_id] for post_id in post_ids]
+    }
+
+
 @router.post("/posts/{post_id}/schedule")
 def schedule_post(
     post_id: int, 
     request: Request,
+    schedule_in: Optional[PostScheduleRequest] = Body(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_active_user)
 ):
+    """
+    Schedules a post for publication. Posts due in the future are handed to the
+    dispatcher and published at `scheduled_at`; past-due posts, or requests with
+    `publish_now`, are queued for publishing immediately.
+
+    `lane` picks the priority lane the publication runs in; it defaults to
+    interactive for immediate publishing and scheduled for dispatcher posts.
+
+    Repeating a request with the same `Idempotency-Key` header returns the
+    original response instead of scheduling again.
+    """
+    trace_id = getattr(request.state, "trace_id", str(uuid.uuid4()))
+    if not idempotency_key:
+        return _schedule_post(post_id, trace_id, schedule_in, db, current_user)
+
+    if len(idempotency_key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be at most 255 characters")
+
+    key = IdempotencyService.request_key(current_user.id, idempotency_key)
+    claim = IdempotencyService.claim(db, key, SCOPE_REQUEST, trace_id, post_id=post_id)
+    if not claim.acquired:
+        if claim.post_id != post_id:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for another post")
+        if claim.status == STATUS_IN_PROGRESS:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+        return {**(claim.result or {}), "idempotent_replay": True}
+
+    try:
+        response = _schedule_post(post_id, trace_id, schedule_in, db, current_user)
+    except Exception:
+        IdempotencyService.complete(db, key, STATUS_FAILED)
+        raise
+    IdempotencyService.complete(db, key, STATUS_SUCCEEDED, result=response)
+    return response
+
+
+def _schedule_post(
+    post_id: int,
+    trace_id: str,
+    schedule_in: Optional[PostScheduleRequest],
+    db: Session,
+    current_user: User
+) -> Dict[str, Any]:
     post = crud.get_post(db, post_id=post_id, user_id=current_user.id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    trace_id = getattr(request.state, "trace_id", str(uuid.uuid4()))
+    schedule_in = schedule_in or PostScheduleRequest()
+    scheduled_at = (
+        to_utc_naive(schedule_in.scheduled_at) if schedule_in.scheduled_at else post.scheduled_at
+    )
     
     # Update status to scheduled
-    crud.update_post(
-        db,
-        post_id=post_id,
-        post_in=PostUpdate(status="scheduled"),
-        user_id=current_user.id
-    )
+    values = {"scheduled_at": scheduled_at} if schedule_in.scheduled_at else {}
+    _transition_post(db, post, PostStatus.SCHEDULED, current_user.id, **values)
 
     if settings.DEMO_MODE:
-        crud.update_post(
-            db,
-            post_id=post_id,
-            post_in=PostUpdate(status="running"),
-            user_id=current_user.id
-        )
-        crud.update_post(
-            db,
-            post_id=post_id,
-            post_in=PostUpdate(status="published", published_at=datetime.utcnow()),
-            user_id=current_user.id
+        crud.transition_post_status(
+            db, post_id, PostStatus.PUBLISHED, user_id=current_user.id, published_at=datetime.utcnow()
         )
         try:
             from app.api import crud_audit
@@ -295,15 +552,110 @@ def schedule_post(
             "job_id": f"demo-post-{uuid.uuid4().hex[:10]}"
         }
 
+    if not schedule_in.publish_now and scheduled_at and scheduled_at > utc_now_naive():
+        job_id = None
+        try:
+            if local_jobs_enabled():
+                job_id = _submit_local_publication(
+                    post_id, schedule_in.lane or Lane.SCHEDULED, trace_id=trace_id, eta=scheduled_at
+                )
+            else:
+                lane = schedule_in.lane.value if schedule_in.lane else None
+                publication_scheduler.schedule(post_id, scheduled_at, lane=lane)
+        except Exception as exc:
+            raise HTTPException(status_code=503, detail=f"Unable to schedule job: {exc}")
+        return {
+            "status": "scheduled",
+            "message": f"Post scheduled for {scheduled_at.isoformat()}Z",
+            "trace_id": trace_id,
+            "job_id": job_id,
+            "scheduled_at": scheduled_at.isoformat()
+        }
+
     from app.tasks.worker import execute_post_publication
 
+    if not local_jobs_enabled():
+        try:
+            publication_scheduler.cancel(post_id)
+        except Exception as exc:
+            logger.warning(f"Failed to clear schedule for post {post_id}: {exc}")
+
     try:
-        task = execute_post_publication.delay(post_id, trace_id=trace_id)
+        lane = schedule_in.lane or Lane.INTERACTIVE
+        if local_jobs_enabled():
+            job_id = _submit_local_publication(post_id, lane, trace_id=trace_id)
+        else:
+            job_id = str(execute_post_publication.apply_async(
+                args=[post_id],
+                kwargs={"trace_id": trace_id},
+                queue=browser_queue(lane),
+            ).id)
         return {
             "status": "scheduled",
             "message": "Post queued for publishing",
             "trace_id": trace_id,
-            "job_id": str(task.id)
+            "job_id": job_id
+        }
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Unable to enqueue job: {exc}")
+
+
+@router.post("/posts/{post_id}/schedule/accounts")
+def schedule_post_for_accounts(
+    post_id: int,
+    request: Request,
+    account_ids: List[int] = Body(..., embed=True),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Publish one post to several social accounts concurrently inside a single
+    browser, with one isolated context per account.
+    """
+    post = crud.get_post(db, post_id=post_id, user_id=current_user.id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    unique_ids = list(dict.fromkeys(account_ids))
+    if not unique_ids:
+        raise HTTPException(status_code=400, detail="At least one account_id is required")
+
+    accounts = crud_account.get_social_accounts_by_ids(
+        db, user_id=current_user.id, account_ids=unique_ids, platform=post.platform
+    )
+    found_ids = {account.id for account in accounts}
+    missing = [account_id for account_id in unique_ids if account_id not in found_ids]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Accounts not found for platform {post.platform.value}: {missing}"
+        )
+
+    trace_id = getattr(request.state, "trace_id", str(uuid.uuid4()))
+    _transition_post(db, post, PostStatus.SCHEDULED, current_user.id)
+
+    if settings.DEMO_MODE:
+        crud.transition_post_status(
+            db, post_id, PostStatus.PUBLISHED, user_id=current_user.id, published_at=datetime.utcnow()
+        )
+        return {
+            "status": "completed_demo",
+            "message": f"Post published to {len(unique_ids)} accounts in demo mode",
+            "trace_id": trace_id,
+            "job_id": f"demo-post-{uuid.uuid4().hex[:10]}",
+            "account_ids": unique_ids
+        }
+
+    from app.tasks.worker import execute_multi_account_publication
+
+    try:
+        task = execute_multi_account_publication.delay(post_id, unique_ids, trace_id=trace_id)
+        return {
+            "status": "scheduled",
+            "message": f"Post queued for publishing to {len(unique_ids)} accounts",
+            "trace_id": trace_id,
+            "job_id": str(task.id),
+            "account_ids": unique_ids
         }
     except Exception as exc:
         raise HTTPException(status_code=503, detail=f"Unable to enqueue job: {exc}")
@@ -1,10 +1,79 @@
-from celery import Celery
+from celery import Celery, Task
+from celery.signals import celeryd_init
+from kombu import Queue
 from app.core.config import settings
+from app.core.lanes import QUEUE_LANES, Lane, lane_queue
+# Registers publish/run timing signals in API, dispatcher and worker processes.
+from app.tasks import telemetry  # noqa: F401
 
+# Queues per workload, so browser-heavy publications and analytics scraping
+# never compete for the same worker slots. Text generation runs inline in the
+# API and audit rows are written by the task that produced them, so neither
+# has a queue of its own.
+QUEUE_BROWSER = "browser"
+QUEUE_ANALYTICS = "analytics"
+
+# Priority lanes of the browser pool: "post now" and ad-hoc goals stay on the
+# plain queue, dispatcher-fed publications and batch work get their own queues.
+# Workers consume them in weighted order (see app.core.lanes.WeightedLaneCycle).
+QUEUE_BROWSER_SCHEDULED = lane_queue(QUEUE_BROWSER, Lane.SCHEDULED)
+QUEUE_BROWSER_BACKGROUND = lane_queue(QUEUE_BROWSER, Lane.BACKGROUND)
+QUEUE_LANES[QUEUE_ANALYTICS] = Lane.BACKGROUND
+
+# Worker profiles: run each pool on its own nodes with
+#   CELERY_WORKER_PROFILE=<name> celery -A app.core.celery_app worker -n <name>@%h
+# Explicit CLI flags (-Q, -c, --prefetch-multiplier) still take precedence.
+WORKER_PROFILES = {
+    QUEUE_BROWSER: {
+        "queues": [QUEUE_BROWSER, QUEUE_BROWSER_SCHEDULED, QUEUE_BROWSER_BACKGROUND],
+        "concurrency": settings.CELERY_BROWSER_CONCURRENCY,
+        # One Chromium-heavy task at a time per slot; never hoard messages.
+        "prefetch_multiplier": 1,
+        "acks_late": True,
+    },
+    QUEUE_ANALYTICS: {
+        "queues": [QUEUE_ANALYTICS],
+        "concurrency": settings.CELERY_ANALYTICS_CONCURRENCY,
+        "prefetch_multiplier": 1,
+        "acks_late": True,
+    },
+}
+
+TASK_ROUTES = {
+    "app.tasks.worker.execute_post_publication": {"queue": QUEUE_BROWSER},
+    "app.tasks.worker.execute_multi_account_publication": {"queue": QUEUE_BROWSER},
+    "app.tasks.worker.execute_act_goal_task": {"queue": QUEUE_BROWSER},
+}
+
+JOB_BACKEND_CELERY = "celery"
+JOB_BACKEND_LOCAL = "local"
+LOCAL_JOB_RESULT_BACKEND = "app.tasks.local_backend:LocalJobBackend"
+
+
+def local_jobs_enabled() -> bool:
+    return settings.JOB_BACKEND == JOB_BACKEND_LOCAL
+
+
+class NovaTask(Task):
+    """Sends tasks to the in-process job runner when JOB_BACKEND=local."""
+
+    def apply_async(self, args=None, kwargs=None, task_id=None, **options):
+        if not local_jobs_enabled():
+            return super().apply_async(args, kwargs, task_id=task_id, **options)
+        from app.tasks.local_backend import local_jobs
+
+        job_id = local_jobs.submit(self.name, args, kwargs, task_id=task_id, **options)
+        return self.AsyncResult(job_id)
+
+
+# With the local backend nothing goes through Redis: the in-memory broker is
+# only there for Celery primitives such as group(), and results live in the DB.
 celery_app = Celery(
-    "worker",
-    broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
+    "novapilot",
+    broker="memory://" if local_jobs_enabled() else settings.REDIS_URL,
+    backend=LOCAL_JOB_RESULT_BACKEND if local_jobs_enabled() else settings.REDIS_URL,
+    include=["app.tasks.worker"],
+    task_cls=NovaTask,
 )
 
 celery_app.conf.update(
@@ -13,8 +82,44 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-    task_routes={
-        "app.tasks.nova_tasks.*": {"queue": "ai_queue"},
-        "app.tasks.audit_tasks.*": {"queue": "audit_queue"},
+    worker_concurrency=4,
+    task_queues=[Queue(name) for profile in WORKER_PROFILES.values() for name in profile["queues"]],
+    task_default_queue=QUEUE_BROWSER,
+    task_routes=TASK_ROUTES,
+    # acks_late follows the queue a task is routed to.
+    task_annotations={
+        name: {"acks_late": WORKER_PROFILES[route["queue"]]["acks_late"]}
+        for name, route in TASK_ROUTES.items()
     },
+    task_reject_on_worker_lost=True,
+    broker_transport_options={
+        "queue_order_strategy": "app.core.lanes:WeightedLaneCycle",
+        # Explicit so retry countdowns can be capped below it (see retry_policy.max_countdown).
+        "visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT_SECONDS,
+    },
+    # Results are compact envelopes (see app.tasks.results); they still expire
+    # so the result backend cannot grow without bound.
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
 )
+
+
+def apply_worker_profile(conf, profile_name: str) -> None:
+    profile = WORKER_PROFILES.get(profile_name)
+    if profile is None:
+        raise ValueError(
+            f"Unknown CELERY_WORKER_PROFILE '{profile_name}'. "
+            f"Expected one of: {', '.join(WORKER_PROFILES)}"
+        )
+    conf.task_queues = [Queue(name) for name in profile["queues"]]
+    conf.worker_concurrency = profile["concurrency"]
+    conf.worker_prefetch_multiplier = profile["prefetch_multiplier"]
+
+
+def browser_queue(lane: Lane) -> str:
+    return lane_queue(QUEUE_BROWSER, lane)
+
+
+@celeryd_init.connect
+def configure_worker_profile(conf=None, **kwargs):
+    if settings.CELERY_WORKER_PROFILE and conf is not None:
+        apply_worker_profile(conf, settings.CELERY_WORKER_PROFILE)
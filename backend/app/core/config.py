@@ -52,6 +52,14 @@ class Settings(BaseSettings):
     # AWS Bedrock / Nova
     NOVA_ACT_MODEL_ID: str = "us.amazon.nova-pro-act-v1:0"
     NOVA_TEXT_MODEL_ID: str = "amazon.nova-pro-v1:0"
+    NOVA_ACT_STREAM_PLANNING: bool = True
+
+    # Browser automation
+    BROWSER_HEADLESS: bool = False
+    BROWSER_MAX_CONTEXTS_PER_WORKER: int = 4
+    BROWSER_RSS_LIMIT_MB: int = 1536
+    BROWSER_BATCH_ACTIONS: bool = True
+    BROWSER_BATCH_WAIT_TIMEOUT_MS: int = 30000
 
     # S3 storage
     S3_BUCKET_NAME: str = "novapilot-media"
@@ -63,6 +71,76 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_REQUIRED: bool = False
 
+    # Automation events are buffered per process and published in pipelined batches
+    EVENT_FLUSH_INTERVAL_MS: int = 5
+    EVENT_BATCH_SIZE: int = 100
+    EVENT_BUFFER_SIZE: int = 10000
+    # Event bus: redis | memory (single process) | auto (memory in DEMO_MODE or with JOB_BACKEND=local)
+    EVENT_BACKEND: str = "auto"
+    # Transactional outbox: relay thread in each API process, batch size, poll interval, retention of delivered rows
+    OUTBOX_RELAY_IN_API: bool = True
+    OUTBOX_BATCH_SIZE: int = 200
+    OUTBOX_POLL_INTERVAL_MS: int = 200
+    OUTBOX_RETENTION_HOURS: int = 24
+    # Event stream retention: newest N entries, and optionally nothing older than max age (0 = no age limit)
+    EVENT_STREAM_MAXLEN: int = 10000
+    EVENT_STREAM_MAX_AGE_SECONDS: int = 0
+    EVENT_STREAM_BLOCK_MS: int = 5000
+    # Stream entries read per page when replaying to a reconnecting WebSocket
+    EVENT_REPLAY_LIMIT: int = 1000
+    # Events a WebSocket subscriber may fall behind before EVENT_SUBSCRIBER_OVERFLOW applies:
+    # drop_oldest | coalesce (keep the newest event per job) | disconnect
+    EVENT_SUBSCRIBER_QUEUE_SIZE: int = 1000
+    EVENT_SUBSCRIBER_OVERFLOW: str = "drop_oldest"
+    # Most events sent in one WebSocket frame, and how long one send may block
+    WS_FRAME_MAX_EVENTS: int = 50
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+
+    # Celery worker pools (see WORKER_PROFILES in app.core.celery_app)
+    CELERY_WORKER_PROFILE: Optional[str] = None
+    CELERY_BROWSER_CONCURRENCY: int = 2
+    CELERY_ANALYTICS_CONCURRENCY: int = 2
+    # "celery" runs tasks on Celery workers through Redis; "local" runs them in a
+    # thread pool inside the API process and keeps job state in the database.
+    JOB_BACKEND: str = "celery"
+    LOCAL_JOB_CONCURRENCY: int = 2
+    # How often the API's runner picks up jobs other processes (e.g. the dispatcher) wrote
+    LOCAL_JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    # Task results and progress state expire from the Redis result backend after this long
+    CELERY_RESULT_EXPIRES_SECONDS: int = 24 * 3600
+    # Redis redelivers unacknowledged (acks_late) messages after this long; retry
+    # countdowns are capped below it and longer waits re-defer in hops.
+    CELERY_VISIBILITY_TIMEOUT_SECONDS: int = 3600
+    # Relative share of worker fetches per priority lane (see app.core.lanes)
+    CELERY_LANE_WEIGHT_INTERACTIVE: int = 6
+    CELERY_LANE_WEIGHT_SCHEDULED: int = 3
+    CELERY_LANE_WEIGHT_BACKGROUND: int = 1
+
+    # Publication dispatcher (app.tasks.dispatcher)
+    SCHEDULER_POLL_INTERVAL_SECONDS: float = 0.5
+    SCHEDULER_BATCH_SIZE: int = 500
+    SCHEDULER_CATCHUP_WINDOW_HOURS: int = 24
+    # A dispatched post still scheduled after this long is dispatched again.
+    SCHEDULER_DISPATCH_LEASE_SECONDS: int = 900
+
+    # API requests per RATE_LIMIT_WINDOW_SECONDS per user (or IP when anonymous) and route group
+    RATE_LIMIT_DEFAULT: int = 100
+    RATE_LIMIT_AUTH: int = 20
+    RATE_LIMIT_AUTOMATION: int = 60
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    # Per-process fallback while Redis is down: clients tracked, and seconds before retrying Redis
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000
+    RATE_LIMIT_REDIS_RETRY_SECONDS: float = 5.0
+
+    # Per-account publishing limits as "<posts>/<seconds>"; empty disables the limit.
+    PUBLISH_RATE_LIMIT_LINKEDIN: str = "10/3600"
+    PUBLISH_RATE_LIMIT_TWITTER: str = "30/900"
+
+    # Retries may use at most this share of a queue's executions over the window
+    RETRY_BUDGET_RATIO: float = 0.2
+    RETRY_BUDGET_MIN_RETRIES: int = 10
+    RETRY_BUDGET_WINDOW_SECONDS: int = 600
+
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True,
@@ -1,8 +1,15 @@
 import asyncio
+import atexit
+import itertools
 import json
 import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, AsyncGenerator, Dict, Optional
+from typing import Any, AsyncGenerator, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
 
 import redis
 import redis.asyncio as redis_async
@@ -12,9 +19,33 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 AUTOMATION_EVENTS_CHANNEL = "automation.events"
+# Each channel is a capped Redis Stream; entry ids double as resumable cursors.
+EVENT_STREAM_KEY_PREFIX = "novapilot:events"
+EVENT_STREAM_FIELD = "data"
+EVENT_BACKEND_AUTO = "auto"
+EVENT_BACKEND_REDIS = "redis"
+EVENT_BACKEND_MEMORY = "memory"
+# Pause between flush attempts while Redis is unreachable.
+PUBLISH_RETRY_SECONDS = 1.0
 
 
-def _with_defaults(event: Dict[str, Any]) -> Dict[str, Any]:
+def stream_key(channel: str) -> str:
+    return f"{EVENT_STREAM_KEY_PREFIX}:{channel}"
+
+
+def parse_event_id(event_id: str) -> Tuple[int, int]:
+    """Stream ids are "<ms>-<seq>"; a bare "<ms>" is accepted as "<ms>-0"."""
+    ms, _, seq = str(event_id).partition("-")
+    return int(ms), int(seq or 0)
+
+
+def next_event_id(event_id: str) -> str:
+    """The smallest id after `event_id`, for an exclusive XRANGE start."""
+    ms, seq = parse_event_id(event_id)
+    return f"{ms}-{seq + 1}"
+
+
+def with_defaults(event: Dict[str, Any]) -> Dict[str, Any]:
     payload = dict(event)
     payload.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
     payload.setdefault("level", "INFO")
@@ -23,54 +54,746 @@ def _with_defaults(event: Dict[str, Any]) -> Dict[str, Any]:
     return payload
 
 
+class EventPublisher:
+    """
+    Fire-and-forget publisher shared by everything in a process.
+
+    `publish` only serializes the event into a bounded local buffer. A background
+    thread sleeps until the buffer gets its first event, collects more for up to
+    `EVENT_FLUSH_INTERVAL_MS` (less once `EVENT_BATCH_SIZE` are waiting) and
+    flushes them as one pipelined round trip over a pooled connection. Events are appended to the channel's Redis Stream, capped
+    at `EVENT_STREAM_MAXLEN` entries and, if set, `EVENT_STREAM_MAX_AGE_SECONDS`.
+    While Redis is unreachable the buffer keeps the newest
+    `EVENT_BUFFER_SIZE` events and flushing backs off.
+    """
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_buffer: Optional[int] = None,
+    ):
+        self._client = client
+        self.batch_size = batch_size or settings.EVENT_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.EVENT_FLUSH_INTERVAL_MS / 1000
+        self.max_buffer = max_buffer or settings.EVENT_BUFFER_SIZE
+        self._buffer: Deque[Tuple[str, str]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Set when the buffer stops being empty, and when a full batch is waiting.
+        self._wakeup = threading.Event()
+        self._full = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._retry_at = 0.0
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis(connection_pool=redis_pool())
+        return self._client
+
+    def _ensure_running(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Forked (e.g. a Celery child): the parent's buffer and thread are not ours.
+                self._buffer.clear()
+                self._pid = pid
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="event-publisher", daemon=True)
+                self._thread.start()
+
+    def publish(self, event: Dict[str, Any], channel: str = AUTOMATION_EVENTS_CHANNEL) -> bool:
+        """Queues an event; returns False if an older buffered event had to be dropped for it."""
+        payload = json.dumps(with_defaults(event), default=str)
+        self._ensure_running()
+        with self._lock:
+            first = not self._buffer
+            dropped = len(self._buffer) >= self.max_buffer
+            if dropped:
+                self._buffer.popleft()
+            self._buffer.append((channel, payload))
+            full = len(self._buffer) >= self.batch_size
+            if first:
+                self._wakeup.set()
+        if full:
+            self._full.set()
+        return not dropped
+
+    def _run(self) -> None:
+        while True:
+            # Idle processes sleep here instead of polling the empty buffer.
+            self._wakeup.wait()
+            self._full.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._full.clear()
+            self.flush()
+            with self._lock:
+                pending = bool(self._buffer)
+            if pending:
+                # Left over while Redis is down, or published during the flush.
+                backoff = self._retry_at - time.monotonic()
+                if backoff > 0:
+                    time.sleep(backoff)
+                self._wakeup.set()
+
+    def flush(self) -> int:
+        """Publishes everything buffered in batches; returns the number of events sent."""
+        sent = 0
+        with self._flush_lock:
+            while time.monotonic() >= self._retry_at:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    break
+                try:
+                    self.send(batch)
+                    sent += len(batch)
+                except Exception as exc:
+                    logger.debug("Failed to publish %d events to Redis: %s", len(batch), exc)
+                    with self._lock:
+                        self._buffer.extendleft(reversed(batch))
+                        while len(self._buffer) > self.max_buffer:
+                            self._buffer.popleft()
+                    self._retry_at = time.monotonic() + PUBLISH_RETRY_SECONDS
+        return sent
+
+    def send(self, batch: List[Tuple[str, str]]) -> None:
+        """Appends serialized (channel, payload) events in one round trip; raises if Redis fails."""
+        pipe = self.client.pipeline(transaction=False)
+        for channel, payload in batch:
+            pipe.xadd(
+                stream_key(channel),
+                {EVENT_STREAM_FIELD: payload},
+                maxlen=settings.EVENT_STREAM_MAXLEN or None,
+                approximate=True,
+            )
+        if settings.EVENT_STREAM_MAX_AGE_SECONDS:
+            oldest_ms = int((time.time() - settings.EVENT_STREAM_MAX_AGE_SECONDS) * 1000)
+            for key in {stream_key(channel) for channel, _ in batch}:
+                pipe.xtrim(key, minid=f"{oldest_ms}-0", approximate=True)
+        pipe.execute()
+
+    def close(self) -> None:
+        self._retry_at = 0.0
+        self.flush()
+
+
+_pool: Optional[redis.ConnectionPool] = None
+_event_backend: Optional[str] = None
+
+
+def redis_pool() -> redis.ConnectionPool:
+    """Connection pool shared by the event publisher of this process."""
+    global _pool
+    if _pool is None:
+        _pool = redis.ConnectionPool.from_url(
+            settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1, socket_timeout=2
+        )
+    return _pool
+
+
+event_publisher = EventPublisher()
+atexit.register(event_publisher.close)
+
+
 def publish_event(event: Dict[str, Any], channel: str = AUTOMATION_EVENTS_CHANNEL) -> bool:
     """
-    Publish a worker or API event to Redis pub/sub.
-    Returns False when Redis is unavailable so callers can continue gracefully.
+    Publish a worker or API event to the Redis event stream without waiting for Redis.
+    Events are buffered and sent in pipelined batches; see `EventPublisher`. Without
+    Redis they go to the in-process bus instead; see `event_backend`.
     """
-    payload = _with_defaults(event)
-    client: Optional[redis.Redis] = None
     try:
-        client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-        client.publish(channel, json.dumps(payload, default=str))
-        return True
+        if event_backend() == EVENT_BACKEND_MEMORY:
+            return memory_bus(channel).publish(event)
+        return event_publisher.publish(event, channel)
     except Exception as exc:
-        logger.debug("Failed to publish event to Redis: %s", exc)
+        logger.debug("Failed to queue event: %s", exc)
         return False
-    finally:
-        if client is not None:
-            try:
-                client.close()
-            except Exception:
-                pass
 
 
-async def subscribe_events(channel: str = AUTOMATION_EVENTS_CHANNEL) -> AsyncGenerator[Dict[str, Any], None]:
+def publish_events_now(events: List[Tuple[str, Dict[str, Any]]]) -> None:
     """
-    Subscribe to automation events from Redis and yield parsed event payloads.
+    Publishes (channel, event) pairs synchronously in one batch, bypassing the
+    buffer, and raises if they could not be delivered. Used by the outbox relay,
+    which must know before marking events delivered.
     """
-    client = redis_async.from_url(settings.REDIS_URL, decode_responses=True)
-    pubsub = client.pubsub()
-    await pubsub.subscribe(channel)
+    if event_backend() == EVENT_BACKEND_MEMORY:
+        for channel, event in events:
+            memory_bus(channel).publish(event)
+        return
+    event_publisher.send([(channel, json.dumps(with_defaults(event), default=str)) for channel, event in events])
+
+
+def _entry_to_event(entry_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    event = _parse_event(fields.get(EVENT_STREAM_FIELD))
+    event["event_id"] = entry_id
+    return event
+
+
+def _parse_event(raw: Any) -> Dict[str, Any]:
     try:
+        data = json.loads(raw)
+    except Exception:
+        data = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "level": "ERROR",
+            "message": "Received malformed event payload",
+            "trace_id": None,
+        }
+    return with_defaults(data)
+
+
+class EventFilter:
+    """
+    What a subscriber wants to see. Every given field must match the event;
+    `job_id` matches the event's `task_id`. `owner_id` additionally admits only
+    events of that user or of no user. Filters are indexed in `EventHub` by
+    their most selective field, in `INDEX_FIELDS` order.
+    """
+
+    # (filter attribute, event field), most selective first.
+    INDEX_FIELDS = (
+        ("job_id", "task_id"),
+        ("trace_id", "trace_id"),
+        ("post_id", "post_id"),
+        ("user_id", "user_id"),
+    )
+
+    def __init__(
+        self,
+        user_id: Optional[int] = None,
+        trace_id: Optional[str] = None,
+        post_id: Optional[int] = None,
+        job_id: Optional[str] = None,
+        owner_id: Optional[int] = None,
+    ):
+        self.user_id = user_id
+        self.trace_id = trace_id
+        self.post_id = post_id
+        self.job_id = job_id
+        self.owner_id = owner_id
+
+    @property
+    def index_key(self) -> Optional[Tuple[str, str]]:
+        """The (event field, value) this filter is filed under; None matches everything."""
+        for attr, field in self.INDEX_FIELDS:
+            value = getattr(self, attr)
+            if value is not None:
+                return field, str(value)
+        return None
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        owner = event.get("user_id")
+        if self.owner_id is not None and owner is not None and str(owner) != str(self.owner_id):
+            return False
+        for attr, field in self.INDEX_FIELDS:
+            value = getattr(self, attr)
+            if value is not None and str(event.get(field)) != str(value):
+                return False
+        return True
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self.INDEX_FIELDS if getattr(self, attr) is not None)
+        return f"EventFilter({fields})"
+
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_DISCONNECT)
+
+
+class SubscriberOverflow(Exception):
+    """A subscriber with the disconnect policy fell `maxsize` events behind."""
+
+
+class SubscriberQueue:
+    """
+    Bounded outbound queue of one subscriber. When full, `policy` decides:
+    `drop_oldest` discards the oldest event; `coalesce` first lets the new event
+    replace queued events of its job (`task_id`), then collapses every job down
+    to its newest event, and drops the oldest only if that was not enough; `disconnect` makes the next read raise
+    `SubscriberOverflow` so the connection can be closed. Tracks what it
+    delivered and lost for the WebSocket metrics.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        maxsize: int,
+        event_filter: Optional[EventFilter] = None,
+        policy: str = OVERFLOW_DROP_OLDEST,
+        label: Optional[Dict[str, Any]] = None,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.id = next(self._ids)
+        self.maxsize = maxsize
+        self.event_filter = event_filter or EventFilter()
+        self.policy = policy
+        self.label = label or {}
+        self.connected_at = time.time()
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.overflowed = False
+        self._items: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._waiter = asyncio.Event()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    def oldest_event_id(self) -> Optional[str]:
+        """Stream id of the oldest queued event, if it has one."""
+        return self._items[0][1].get("event_id") if self._items else None
+
+    @property
+    def lag_seconds(self) -> float:
+        """How long the oldest undelivered event has been waiting."""
+        return time.monotonic() - self._items[0][0] if self._items else 0.0
+
+    def put_nowait(self, event: Dict[str, Any]) -> None:
+        if self.overflowed:
+            return
+        if self.full():
+            if self.policy == OVERFLOW_DISCONNECT:
+                self.overflowed = True
+                self._waiter.set()
+                return
+            if self.policy == OVERFLOW_COALESCE:
+                self._coalesce(event.get("task_id"))
+            while self.full():
+                self._items.popleft()
+                self.dropped += 1
+        self._items.append((time.monotonic(), event))
+        self._waiter.set()
+
+    def _coalesce(self, incoming_job: Optional[str]) -> None:
+        """Drops events superseded by a newer one of the same job; events without a job are kept."""
+        if incoming_job is not None:
+            before = len(self._items)
+            self._items = deque(item for item in self._items if item[1].get("task_id") != incoming_job)
+            self.coalesced += before - len(self._items)
+            if not self.full():
+                return
+        seen = set()
+        kept: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        for item in reversed(self._items):
+            job = item[1].get("task_id")
+            if job is not None:
+                if job in seen:
+                    self.coalesced += 1
+                    continue
+                seen.add(job)
+            kept.appendleft(item)
+        self._items = kept
+
+    def get_nowait(self) -> Dict[str, Any]:
+        if self.overflowed:
+            raise SubscriberOverflow(f"Subscriber fell {self.maxsize} events behind")
+        if not self._items:
+            raise asyncio.QueueEmpty()
+        self.delivered += 1
+        return self._items.popleft()[1]
+
+    async def get(self) -> Dict[str, Any]:
+        return (await self.get_batch(1))[0]
+
+    async def get_batch(self, max_events: int) -> List[Dict[str, Any]]:
+        """Waits for at least one event, then returns up to `max_events` queued ones."""
+        while not self._items and not self.overflowed:
+            self._waiter.clear()
+            await self._waiter.wait()
+        return [self.get_nowait() for _ in range(min(max_events, len(self._items)) or 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            **self.label,
+            "policy": self.policy,
+            "filter": repr(self.event_filter),
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "depth": len(self._items),
+            "lag_seconds": round(self.lag_seconds, 3),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
+def _replayed(
+    oldest_id: Optional[str],
+    start: str,
+    events: List[Dict[str, Any]],
+    event_filter: Optional[EventFilter],
+) -> List[Dict[str, Any]]:
+    """Filters a replayed range, led by a warning if events before it were already trimmed."""
+    replayed = []
+    if oldest_id is not None and parse_event_id(oldest_id) > parse_event_id(start):
+        replayed.append(with_defaults({
+            "level": "WARNING",
+            "message": "Some events expired before they could be replayed",
+            "status": "replay_gap",
+        }))
+    replayed.extend(event for event in events if event_filter is None or event_filter.matches(event))
+    return replayed
+
+
+class EventHub:
+    """
+    Holds the process's single reader of the event stream and fans each event
+    out to every subscriber's in-memory queue. The reader blocks on XREAD, so
+    events are delivered as they arrive (no polling), and Redis sees one
+    connection per process however many WebSockets are open. After a lost
+    connection the reader resumes from the last id it saw, so nothing in
+    between is skipped. Subscribers are indexed by their filter, so each
+    event is only offered to the subscribers whose filter can match it. Each
+    subscriber has its own bounded `SubscriberQueue`, so a slow consumer never
+    holds up the reader or other subscribers.
+    """
+
+    def __init__(
+        self,
+        channel: str = AUTOMATION_EVENTS_CHANNEL,
+        queue_size: Optional[int] = None,
+        client: Optional[redis_async.Redis] = None,
+    ):
+        self.channel = channel
+        self.key = stream_key(channel)
+        self.queue_size = queue_size or settings.EVENT_SUBSCRIBER_QUEUE_SIZE
+        self._client = client
+        # Filter index key -> subscriber queues; key None holds unfiltered subscribers.
+        self._subscribers: Dict[Optional[Tuple[str, str]], Set[SubscriberQueue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Future] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscriber_stats(self) -> List[Dict[str, Any]]:
+        return sorted(
+            (queue.stats() for queues in self._subscribers.values() for queue in queues),
+            key=lambda stats: stats["id"],
+        )
+
+    def _redis(self) -> redis_async.Redis:
+        if self._client is not None:
+            return self._client
+        return redis_async.from_url(settings.REDIS_URL, decode_responses=True)
+
+    async def start(self) -> None:
+        """Starts the reader if needed and waits for its first connection attempt."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._ready = loop.create_future()
+            self._task = loop.create_task(self._listen())
+        await asyncio.shield(self._ready)
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _listen(self) -> None:
+        backoff = 0.5
+        last_id = "$"
         while True:
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if message and message.get("type") == "message":
-                raw = message.get("data")
-                try:
-                    data = json.loads(raw)
-                except Exception:
-                    data = {
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "level": "ERROR",
-                        "message": "Received malformed event payload",
-                        "trace_id": None,
-                    }
-                yield _with_defaults(data)
-            await asyncio.sleep(0.1)
-    finally:
+            client = self._redis()
+            try:
+                # "$" only means "from now" on the first read; pin it to a concrete id.
+                if last_id == "$":
+                    newest = await client.xrevrange(self.key, count=1)
+                    last_id = newest[0][0] if newest else "0-0"
+                if not self._ready.done():
+                    self._ready.set_result(True)
+                backoff = 0.5
+                while True:
+                    response = await client.xread(
+                        {self.key: last_id}, block=settings.EVENT_STREAM_BLOCK_MS, count=500
+                    )
+                    for _, entries in response or []:
+                        for entry_id, fields in entries:
+                            last_id = entry_id
+                            self._broadcast(_entry_to_event(entry_id, fields))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if not self._ready.done():
+                    # Nobody is connected yet: report the failure to the first subscriber.
+                    self._ready.set_exception(exc)
+                    return
+                logger.warning("Event hub lost its Redis connection, reconnecting: %s", exc)
+            finally:
+                if client is not self._client:
+                    try:
+                        await client.close()
+                    except Exception:
+                        pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _candidates(self, event: Dict[str, Any]) -> List[SubscriberQueue]:
+        keys = [None]
+        for _, field in EventFilter.INDEX_FIELDS:
+            if event.get(field) is not None:
+                keys.append((field, str(event[field])))
+        candidates = []
+        for key in keys:
+            candidates.extend(self._subscribers.get(key, ()))
+        return candidates
+
+    def _broadcast(self, event: Dict[str, Any]) -> None:
+        for queue in self._candidates(event):
+            if queue.event_filter.matches(event):
+                queue.put_nowait(event)
+
+    async def read_after(self, last_event_id: str, limit: int) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """The id of the oldest retained entry and up to `limit` events after `last_event_id`."""
+        client = self._redis()
         try:
-            await pubsub.unsubscribe(channel)
+            oldest = await client.xrange(self.key, count=1)
+            entries = await client.xrange(self.key, min=next_event_id(last_event_id), max="+", count=limit)
         finally:
-            await pubsub.close()
-            await client.close()
+            if client is not self._client:
+                await client.close()
+        return (
+            oldest[0][0] if oldest else None,
+            [_entry_to_event(entry_id, fields) for entry_id, fields in entries],
+        )
+
+    async def replay(
+        self,
+        last_event_id: str,
+        limit: Optional[int] = None,
+        event_filter: Optional[EventFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Events after `last_event_id` matching `event_filter`, oldest first, read
+        from at most `limit` stream entries. If the stream was already trimmed
+        past the cursor, a warning event marks the gap.
+        """
+        oldest_id, events = await self.read_after(last_event_id, limit or settings.EVENT_REPLAY_LIMIT)
+        return _replayed(oldest_id, next_event_id(last_event_id), events, event_filter)
+
+    @asynccontextmanager
+    async def subscribe(
+        self,
+        event_filter: Optional[EventFilter] = None,
+        overflow: Optional[str] = None,
+        label: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[SubscriberQueue]:
+        await self.start()
+        queue = SubscriberQueue(
+            self.queue_size,
+            event_filter,
+            policy=overflow or settings.EVENT_SUBSCRIBER_OVERFLOW,
+            label=label,
+        )
+        key = queue.event_filter.index_key
+        self._subscribers.setdefault(key, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(key, set())
+            queues.discard(queue)
+            if not queues:
+                self._subscribers.pop(key, None)
+
+
+event_hub = EventHub()
+
+
+class MemoryEventBus(EventHub):
+    """
+    Event bus of a single process, for installs without Redis. Publishing
+    appends the event to a ring buffer of the newest `EVENT_STREAM_MAXLEN`
+    events and hands it to the subscribers on the event loop; ids, filters,
+    overflow policies and replay work as with the Redis stream. Events are
+    only seen inside the publishing process, which is why it pairs with
+    `JOB_BACKEND=local`.
+    """
+
+    def __init__(
+        self,
+        channel: str = AUTOMATION_EVENTS_CHANNEL,
+        queue_size: Optional[int] = None,
+        maxlen: Optional[int] = None,
+    ):
+        super().__init__(channel, queue_size)
+        self._log: Deque[Dict[str, Any]] = deque(maxlen=maxlen or settings.EVENT_STREAM_MAXLEN or None)
+        self._log_lock = threading.Lock()
+        self._last_id = (0, 0)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
+
+    def _next_id(self) -> str:
+        ms = int(time.time() * 1000)
+        last_ms, last_seq = self._last_id
+        self._last_id = (ms, 0) if ms > last_ms else (last_ms, last_seq + 1)
+        return f"{self._last_id[0]}-{self._last_id[1]}"
+
+    def publish(self, event: Dict[str, Any]) -> bool:
+        # Serialized like a stream entry, so subscribers see the same JSON types.
+        payload = json.loads(json.dumps(with_defaults(event), default=str))
+        with self._log_lock:
+            payload["event_id"] = self._next_id()
+            self._log.append(payload)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return True
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._broadcast(payload)
+        else:
+            # Published from a job or worker thread; subscribers live on the loop.
+            loop.call_soon_threadsafe(self._broadcast, payload)
+        return True
+
+    async def read_after(self, last_event_id: str, limit: int) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        with self._log_lock:
+            log = list(self._log)
+        after = parse_event_id(next_event_id(last_event_id))
+        events = [event for event in log if parse_event_id(event["event_id"]) >= after][:limit]
+        return log[0]["event_id"] if log else None, events
+
+
+_memory_buses: Dict[str, MemoryEventBus] = {}
+
+
+def memory_bus(channel: str = AUTOMATION_EVENTS_CHANNEL) -> MemoryEventBus:
+    if channel not in _memory_buses:
+        _memory_buses[channel] = MemoryEventBus(channel)
+    return _memory_buses[channel]
+
+
+def event_backend() -> str:
+    """
+    `redis` or `memory`, decided once per process. With `EVENT_BACKEND=auto` the
+    in-memory bus is used in DEMO_MODE or with JOB_BACKEND=local, where every
+    event is published inside the API process. Otherwise events stay on Redis
+    even if it is briefly unreachable at startup: the publisher buffers and the
+    hub reconnects, whereas a process-local bus would never see worker events.
+    """
+    global _event_backend
+    if _event_backend is None:
+        backend = settings.EVENT_BACKEND
+        if backend == EVENT_BACKEND_AUTO:
+            if settings.DEMO_MODE or settings.JOB_BACKEND == "local":
+                backend = EVENT_BACKEND_MEMORY
+            else:
+                backend = EVENT_BACKEND_REDIS
+        _event_backend = backend
+        logger.info(f"Automation events use the {backend} backend")
+    return _event_backend
+
+
+def _hub_for(channel: str) -> EventHub:
+    if event_backend() == EVENT_BACKEND_MEMORY:
+        return memory_bus(channel)
+    return event_hub if channel == AUTOMATION_EVENTS_CHANNEL else EventHub(channel)
+
+
+def subscriber_stats(channel: str = AUTOMATION_EVENTS_CHANNEL) -> List[Dict[str, Any]]:
+    """Per-connection queue stats of this process, from whichever bus `event_backend` picked."""
+    return _hub_for(channel).subscriber_stats()
+
+
+async def _replay_pages(
+    hub: EventHub,
+    queue: SubscriberQueue,
+    last_event_id: str,
+    event_filter: Optional[EventFilter],
+) -> AsyncGenerator[Tuple[List[Dict[str, Any]], str], None]:
+    """
+    Pages through the stream after `last_event_id`, EVENT_REPLAY_LIMIT entries
+    at a time, until it reaches the live events already queued for the
+    subscriber (or the end of the stream). Yields each page's matching events
+    with the id of the last entry read, so nothing between the cursor and the
+    live queue is skipped however long the client was away.
+    """
+    limit = settings.EVENT_REPLAY_LIMIT
+    after = last_event_id
+    first_page = True
+    while True:
+        oldest_id, events = await hub.read_after(after, limit)
+        if not events and not first_page:
+            return
+        page = _replayed(oldest_id if first_page else None, next_event_id(after), events, event_filter)
+        first_page = False
+        if events:
+            after = events[-1]["event_id"]
+        yield page, after
+        live_from = queue.oldest_event_id()
+        if len(events) < limit or (live_from is not None and parse_event_id(live_from) <= parse_event_id(after)):
+            return
+
+
+async def subscribe_event_batches(
+    channel: str = AUTOMATION_EVENTS_CHANNEL,
+    last_event_id: Optional[str] = None,
+    event_filter: Optional[EventFilter] = None,
+    overflow: Optional[str] = None,
+    max_batch: int = 1,
+    label: Optional[Dict[str, Any]] = None,
+) -> AsyncGenerator[List[Dict[str, Any]], None]:
+    """
+    Yield lists of automation events matching `event_filter`: whatever has
+    queued up since the last batch, at most `max_batch` at a time. With
+    `last_event_id`, first replays the events after it from the stream, then
+    continues live without gaps or duplicates. All subscribers of a process
+    share one stream reader through `event_hub` (or the in-memory bus, see
+    `event_backend`); raises if Redis is unreachable, and `SubscriberOverflow`
+    when the `disconnect` overflow policy trips.
+    """
+    hub = _hub_for(channel)
+    async with hub.subscribe(event_filter, overflow, label) as queue:
+        # Subscribed before reading the backlog, so live events during the replay are queued.
+        cursor = None
+        if last_event_id:
+            cursor = parse_event_id(last_event_id)
+            async for page, read_up_to in _replay_pages(hub, queue, last_event_id, event_filter):
+                cursor = parse_event_id(read_up_to)
+                for start in range(0, len(page), max_batch):
+                    yield page[start:start + max_batch]
+        while True:
+            batch = [
+                event for event in await queue.get_batch(max_batch)
+                if cursor is None or "event_id" not in event or parse_event_id(event["event_id"]) > cursor
+            ]
+            if batch:
+                yield batch
+
+
+async def subscribe_events(
+    channel: str = AUTOMATION_EVENTS_CHANNEL,
+    last_event_id: Optional[str] = None,
+    event_filter: Optional[EventFilter] = None,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Yield automation events one at a time; see `subscribe_event_batches`."""
+    async for batch in subscribe_event_batches(channel, last_event_id, event_filter):
+        for event in batch:
+            yield event
@@ -0,0 +1,80 @@
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+
+class Lane(str, Enum):
+    """Priority lanes for automation work sharing the same worker pool."""
+    INTERACTIVE = "interactive"
+    SCHEDULED = "scheduled"
+    BACKGROUND = "background"
+
+
+# Queues that are not named after a lane but belong to one, e.g. the analytics
+# queue is background work. Filled in by app.core.celery_app.
+QUEUE_LANES: Dict[str, Lane] = {}
+
+
+def lane_queue(base_queue: str, lane: Optional[Lane]) -> str:
+    """The interactive lane keeps the plain queue name; other lanes get a suffix."""
+    if lane is None or Lane(lane) == Lane.INTERACTIVE:
+        return base_queue
+    return f"{base_queue}.{Lane(lane).value}"
+
+
+def lane_of_queue(queue: str) -> Lane:
+    if queue in QUEUE_LANES:
+        return QUEUE_LANES[queue]
+    for lane in (Lane.SCHEDULED, Lane.BACKGROUND):
+        if queue.endswith(f".{lane.value}"):
+            return lane
+    return Lane.INTERACTIVE
+
+
+def lane_weight(lane: Lane) -> int:
+    weights = {
+        Lane.INTERACTIVE: settings.CELERY_LANE_WEIGHT_INTERACTIVE,
+        Lane.SCHEDULED: settings.CELERY_LANE_WEIGHT_SCHEDULED,
+        Lane.BACKGROUND: settings.CELERY_LANE_WEIGHT_BACKGROUND,
+    }
+    # A zero weight would starve the lane; every lane keeps at least one share.
+    return max(1, weights[lane])
+
+
+class WeightedLaneCycle:
+    """
+    kombu queue order strategy (`broker_transport_options.queue_order_strategy`).
+
+    The Redis transport BRPOPs the consumed queues in the order returned by
+    `consume`, so the first non-empty queue wins each fetch. The order comes from
+    smooth weighted round-robin over the queues' lane weights: with weights
+    6/3/1, interactive queues lead 6 of every 10 fetches, scheduled 3 and
+    background 1. Interactive work preempts background work whenever both are
+    waiting, while background queues still lead a fixed share of fetches and
+    cannot be starved by a busy interactive lane.
+    """
+
+    def __init__(self, it: Optional[Iterable[str]] = None):
+        self.items: List[str] = []
+        self._credit: Dict[str, int] = {}
+        if it is not None:
+            self.update(it)
+
+    def update(self, it: Iterable[str]) -> None:
+        self.items[:] = sorted(set(it))
+        self._credit = {queue: self._credit.get(queue, 0) for queue in self.items}
+
+    def consume(self, n: int) -> List[str]:
+        if not self.items:
+            return []
+        weights = {queue: lane_weight(lane_of_queue(queue)) for queue in self.items}
+        for queue, weight in weights.items():
+            self._credit[queue] += weight
+        order = sorted(self.items, key=lambda queue: self._credit[queue], reverse=True)
+        self._credit[order[0]] -= sum(weights.values())
+        return order[:n]
+
+    def rotate(self, last_used: str) -> str:
+        # Ordering is driven by weights in `consume`, not by the last queue served.
+        return last_used
@@ -0,0 +1,63 @@
+"""
+Schema upgrades for databases created before a column existed.
+
+`Base.metadata.create_all` creates missing tables but never alters existing
+ones, so columns and indexes added to existing tables are applied here. Every
+step checks the live schema first, so it is safe to run on each start:
+
+    python -m app.core.migrations
+"""
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# (table, column, DDL type and constraints)
+ADDED_COLUMNS = [
+    # Optimistic-concurrency counter used by crud.transition_post_status.
+    ("posts", "version", "INTEGER NOT NULL DEFAULT 1"),
+]
+
+# (index, table, columns)
+ADDED_INDEXES = [
+    ("ix_posts_status_scheduled_at", "posts", "status, scheduled_at"),
+]
+
+
+def upgrade_schema(engine: Engine) -> int:
+    """Applies missing columns and indexes; returns the number of steps applied."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    applied = 0
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            if table not in tables:
+                continue
+            if column in {existing["name"] for existing in inspector.get_columns(table)}:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            logger.info(f"Added column {table}.{column}")
+            applied += 1
+        for index, table, columns in ADDED_INDEXES:
+            if table not in tables:
+                continue
+            if index in {existing["name"] for existing in inspector.get_indexes(table)}:
+                continue
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({columns})"))
+            logger.info(f"Created index {index}")
+            applied += 1
+    return applied
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    from app.core.db import engine
+
+    applied = upgrade_schema(engine)
+    logger.info(f"Schema up to date ({applied} steps applied)")
+
+
+if __name__ == "__main__":
+    main()
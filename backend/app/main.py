@@ -2,10 +2,15 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.api import api_router
+from app.api import api_router, deps
 from app.core.config import settings
+from app.core.celery_app import local_jobs_enabled
+from app.core.event_bus import event_backend, event_hub
+from app.core.migrations import upgrade_schema
+from app.services.rate_limiter import request_rate_limiter
+from app.tasks.outbox_relay import outbox_relay
+import asyncio
 import time
-from collections import defaultdict
 import os
 import redis
 import logging
@@ -22,9 +27,33 @@ async def lifespan(_: FastAPI):
     """Initialize database tables without crashing the app on transient DB issues."""
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all never alters existing tables; add columns introduced since.
+        upgrade_schema(engine)
     except Exception as exc:
         logger.exception("Database initialization failed during startup: %s", exc)
+
+    # Settle on Redis or the in-process event bus before the first event.
+    await asyncio.to_thread(event_backend)
+    if settings.OUTBOX_RELAY_IN_API:
+        outbox_relay.start()
+
+    # JOB_BACKEND=local: this process is also the worker.
+    local_jobs = None
+    if local_jobs_enabled():
+        from app.tasks.local_backend import local_jobs
+        from app.tasks.worker import start_worker_loop
+
+        start_worker_loop()
+        local_jobs.start()
     yield
+    await event_hub.stop()
+    if settings.OUTBOX_RELAY_IN_API:
+        await asyncio.to_thread(outbox_relay.stop)
+    if local_jobs is not None:
+        from app.tasks.worker import stop_worker_loop
+
+        await asyncio.to_thread(local_jobs.stop)
+        stop_worker_loop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -90,15 +119,6 @@ async def trace_id_middleware(request: Request, call_next):
     response.headers["X-Trace-ID"] = trace_id
     return response
 
-# Simple in-memory rate limiter (Token Bucket)
-# implementation for demonstration. In prod use Redis via 'slowapi'
-request_counts = defaultdict(list)
-RATE_LIMIT = 100  # requests per minute for default routes
-AUTH_RATE_LIMIT = 20  # tighter control for auth endpoints
-AUTOMATION_RATE_LIMIT = 60  # moderate protection for automation APIs
-TIME_WINDOW = 60  # seconds
-
-
 def _resolve_client_ip(request: Request) -> str:
     forwarded_for = request.headers.get("x-forwarded-for")
     if forwarded_for:
@@ -108,12 +128,21 @@ def _resolve_client_ip(request: Request) -> str:
     return "unknown"
 
 
+def _rate_limit_identity(request: Request) -> str:
+    """Signed-in users are limited per account, everyone else per client IP."""
+    token = request.headers.get("authorization") or request.cookies.get("access_token")
+    subject = deps.token_subject(token)
+    if subject:
+        return f"user:{subject}"
+    return f"ip:{_resolve_client_ip(request)}"
+
+
 def _route_bucket(path: str) -> tuple[str, int]:
     if path.startswith("/api/v1/auth"):
-        return ("auth", AUTH_RATE_LIMIT)
+        return ("auth", settings.RATE_LIMIT_AUTH)
     if path.startswith("/api/v1/automation"):
-        return ("automation", AUTOMATION_RATE_LIMIT)
-    return ("default", RATE_LIMIT)
+        return ("automation", settings.RATE_LIMIT_AUTOMATION)
+    return ("default", settings.RATE_LIMIT_DEFAULT)
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
@@ -121,20 +150,15 @@ async def rate_limit_middleware(request: Request, call_next):
     if request.url.path in ["/docs", "/redoc", "/openapi.json", "/health", "/api/v1/health", "/favicon.ico"]:
         return await call_next(request)
 
-    client_ip = _resolve_client_ip(request)
     bucket, route_limit = _route_bucket(request.url.path)
-    key = f"{client_ip}:{bucket}"
+    key = f"{_rate_limit_identity(request)}:{bucket}"
+    result = await request_rate_limiter.hit(key, route_limit, settings.RATE_LIMIT_WINDOW_SECONDS)
+    if not result.allowed:
+        return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"}, headers=result.headers())
 
-    now = time.time()
-    
-    # Clean old requests
-    request_counts[key] = [t for t in request_counts[key] if now - t < TIME_WINDOW]
-    
-    if len(request_counts[key]) >= route_limit:
-        return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
-        
-    request_counts[key].append(now)
-    return await call_next(request)
+    response = await call_next(request)
+    response.headers.update(result.headers())
+    return response
 
 @app.get("/")
 async def root():
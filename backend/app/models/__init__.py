@@ -6,3 +6,7 @@ from app.models.account import SocialAccount
 from app.models.chat import AIChatMessage
 from app.models.platform import Platform
 from app.models.selector import Selector
+from app.models.idempotency import IdempotencyKey
+from app.models.dead_letter import DeadLetter
+from app.models.job import Job
+from app.models.outbox import OutboxEvent
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, ForeignKey, Index
+from app.core.db import Base
+from datetime import datetime
+
+
+class DeadLetter(Base):
+    """
+    A publication task that failed for good: retries were exhausted or the
+    error was not retryable. Keeps everything needed to replay it.
+    """
+    __tablename__ = "dead_letters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_name = Column(String, nullable=False)
+    task_id = Column(String, nullable=True)
+    args = Column(JSON, nullable=False, default=list)
+    kwargs = Column(JSON, nullable=False, default=dict)
+    queue = Column(String, nullable=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    platform = Column(String, nullable=True)
+    error_code = Column(String(64), nullable=True)
+    error = Column(Text, nullable=True)
+    trace_id = Column(String, nullable=True)
+    audit_log_id = Column(Integer, nullable=True)
+    retry_count = Column(Integer, nullable=False, default=0)
+    # Post and execution snapshot at failure time (content, accounts, steps, retry reason).
+    context = Column(JSON, nullable=True)
+    # "dead" until replayed; "replayed" or "skipped" afterwards
+    status = Column(String(16), nullable=False, default="dead")
+    replay_count = Column(Integer, nullable=False, default=0)
+    replay_task_id = Column(String, nullable=True)
+    replayed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_dead_letters_status_error_code", "status", "error_code"),
+        Index("ix_dead_letters_status_platform", "status", "platform"),
+    )
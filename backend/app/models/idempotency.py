@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from app.core.db import Base
+from datetime import datetime
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "publication": one per (post, content hash, account), claimed by workers
+    # "request": a client-supplied Idempotency-Key, scoped to the user
+    key = Column(String(128), unique=True, nullable=False)
+    scope = Column(String(32), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=True, index=True)
+    task_id = Column(String, nullable=True)
+    status = Column(String(32), nullable=False, default="in_progress")
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
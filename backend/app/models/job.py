@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index
+from app.core.db import Base
+from datetime import datetime
+
+
+class Job(Base):
+    """
+    A task run by the in-process job backend (JOB_BACKEND=local): the queued
+    call with its arguments and ETA, and the Celery-style state and result.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(String(155), primary_key=True)
+    task_name = Column(String, nullable=False)
+    args = Column(JSON, nullable=False, default=list)
+    kwargs = Column(JSON, nullable=False, default=dict)
+    queue = Column(String, nullable=True)
+    retries = Column(Integer, nullable=False, default=0)
+    eta = Column(DateTime, nullable=True)
+    # PENDING until it runs; then whatever the task reports (RUNNING, RETRY,
+    # DEFERRED, ...) and finally SUCCESS or FAILURE.
+    state = Column(String(32), nullable=False, default="PENDING")
+    result = Column(JSON, nullable=True)
+    traceback = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    date_done = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_state_eta", "state", "eta"),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from app.core.db import Base
+from datetime import datetime
+
+
+class OutboxEvent(Base):
+    """
+    An automation event written in the same transaction as the post or audit
+    change it describes. The outbox relay publishes undelivered rows to the
+    event bus in id order and stamps `delivered_at`.
+    """
+    __tablename__ = "event_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_event_outbox_delivered_at_id", "delivered_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 import enum
@@ -11,6 +11,18 @@ class PostStatus(str, enum.Enum):
     FAILED = "failed"
     DRAFT = "draft"
 
+# Allowed status transitions; anything else is rejected by
+# crud.transition_post_status. RUNNING -> RUNNING lets a redelivered task
+# reclaim a post whose worker died, guarded by the version check.
+# SCHEDULED -> PUBLISHED is the demo-mode shortcut without a worker run.
+POST_STATUS_TRANSITIONS = {
+    PostStatus.DRAFT: {PostStatus.SCHEDULED},
+    PostStatus.SCHEDULED: {PostStatus.SCHEDULED, PostStatus.RUNNING, PostStatus.PUBLISHED, PostStatus.FAILED, PostStatus.DRAFT},
+    PostStatus.RUNNING: {PostStatus.RUNNING, PostStatus.PUBLISHED, PostStatus.FAILED},
+    PostStatus.FAILED: {PostStatus.SCHEDULED, PostStatus.RUNNING, PostStatus.FAILED, PostStatus.DRAFT},
+    PostStatus.PUBLISHED: set(),
+}
+
 class Platform(str, enum.Enum):
     LINKEDIN = "linkedin"
     TWITTER = "twitter"
@@ -27,11 +39,20 @@ class Post(Base):
     scheduled_at = Column(DateTime, nullable=True)
     published_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relationships
     user = relationship("User", back_populates="posts")
     analytics = relationship("Analytics", back_populates="post", uselist=False)
 
+    __table_args__ = (
+        # Dispatcher catch-up scans scheduled posts by due time.
+        Index("ix_posts_status_scheduled_at", "status", "scheduled_at"),
+    )
+    # ORM updates also check and bump the version, so they cannot silently
+    # overwrite a concurrent status transition.
+    __mapper_args__ = {"version_id_col": version}
+
 
 class Draft(Base):
     __tablename__ = "drafts"
@@ -0,0 +1,49 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.core.lanes import Lane
+
+class DeadLetter(BaseModel):
+    id: int
+    task_name: str
+    task_id: Optional[str] = None
+    post_id: Optional[int] = None
+    platform: Optional[str] = None
+    error_code: Optional[str] = None
+    error: Optional[str] = None
+    trace_id: Optional[str] = None
+    audit_log_id: Optional[int] = None
+    retry_count: int = 0
+    context: Optional[Dict[str, Any]] = None
+    status: str
+    replay_count: int = 0
+    replay_task_id: Optional[str] = None
+    replayed_at: Optional[datetime] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class DeadLetterReplayRequest(BaseModel):
+    ids: Optional[List[int]] = None
+    error_code: Optional[str] = None
+    platform: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    limit: int = Field(default=100, ge=1, le=500)
+    # Replays are spread out with countdowns so a recovering platform is not hit all at once.
+    rate_per_minute: float = Field(default=30, gt=0, le=600)
+    lane: Lane = Lane.BACKGROUND
+
+class DeadLetterReplayItem(BaseModel):
+    id: int
+    post_id: Optional[int] = None
+    status: str
+    job_id: Optional[str] = None
+    countdown: Optional[float] = None
+    reason: Optional[str] = None
+
+class DeadLetterReplayResponse(BaseModel):
+    trace_id: str
+    replayed: int
+    skipped: int
+    items: List[DeadLetterReplayItem]
@@ -2,12 +2,15 @@ from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
+from app.core.lanes import Lane
+
 
 class PlanningRequest(BaseModel):
     goal: str = Field(..., min_length=3, max_length=500)
     context: Dict[str, Any] = Field(default_factory=dict)
     max_steps: int = Field(default=5, ge=1, le=10)
     execute: bool = False
+    lane: Lane = Lane.BACKGROUND
 
 
 class PlannedTask(BaseModel):
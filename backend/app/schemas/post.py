@@ -1,6 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional, List
+from app.core.lanes import Lane
 from app.models.post import PostStatus, Platform
 
 class PostBase(BaseModel):
@@ -18,11 +19,24 @@ class PostUpdate(BaseModel):
     status: Optional[PostStatus] = None
     scheduled_at: Optional[datetime] = None
 
+class PostScheduleRequest(BaseModel):
+    scheduled_at: Optional[datetime] = None
+    publish_now: bool = False
+    # Defaults: interactive when publishing right away, scheduled when the dispatcher publishes it.
+    lane: Optional[Lane] = None
+
+class PostBulkScheduleRequest(BaseModel):
+    post_ids: List[int] = Field(..., min_length=1, max_length=500)
+    publish_now: bool = False
+    # Defaults to the scheduled lane, also for posts that are already due.
+    lane: Optional[Lane] = None
+
 class Post(PostBase):
     id: int
     status: PostStatus
     published_at: Optional[datetime] = None
     created_at: datetime
+    version: int = 1
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -62,5 +62,17 @@ class AIService:
         """Runs browser automation based on a natural language goal."""
         return await self.act_service.execute_goal(goal, context or {})
 
+    async def run_multi_account_automation(
+        self,
+        goal: str,
+        account_contexts: List[Dict[str, Any]],
+    ) -> Dict[int, Dict[str, Any]]:
+        """Runs the same automation goal for several accounts inside one browser."""
+        return await self.act_service.execute_goal_for_accounts(goal, account_contexts)
+
+    async def shutdown(self) -> None:
+        """Releases long-lived automation resources such as the warm browser."""
+        await self.act_service.shutdown()
+
 # Singleton instance
 ai_service = AIService()
@@ -53,12 +53,14 @@ class AuditService:
         status: str,
         result: Optional[Dict] = None,
         error: Optional[str] = None,
-        error_code: Optional[str] = None
+        error_code: Optional[str] = None,
+        commit: bool = True
     ):
         log = db.query(AuditLog).filter(AuditLog.id == log_id).first()
         if log:
             log.status = status
-            details = log.details or {}
+            # Copy so the JSON column sees a new value and persists the change.
+            details = dict(log.details or {})
             if result is not None:
                 details["result"] = result
             if error is not None:
@@ -67,6 +69,10 @@ class AuditService:
                 details["error_code"] = error_code
             details["updated_at"] = datetime.utcnow().isoformat()
             log.details = details
+            if not commit:
+                # Left to the caller, e.g. together with outbox events.
+                db.flush()
+                return log
             db.commit()
             db.refresh(log)
             return log
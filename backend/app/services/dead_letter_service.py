@@ -0,0 +1,111 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Query, Session
+
+from app.models.dead_letter import DeadLetter
+from app.tasks.results import compact_error, error_code_value
+
+logger = logging.getLogger(__name__)
+
+STATUS_DEAD = "dead"
+STATUS_REPLAYED = "replayed"
+STATUS_SKIPPED = "skipped"
+
+# Per-attempt scheduling state that must not follow a task into its replay.
+REPLAY_DROPPED_KWARGS = ("retry_delay", "trace_id")
+
+
+class DeadLetterService:
+    @staticmethod
+    def record(
+        db: Session,
+        task_name: str,
+        args: List[Any],
+        kwargs: Dict[str, Any],
+        queue: Optional[str] = None,
+        post_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        error: Any = None,
+        error_code: Any = None,
+        trace_id: Optional[str] = None,
+        audit_log_id: Optional[int] = None,
+        retry_count: int = 0,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Optional[DeadLetter]:
+        """Stores a terminally failed task. Never raises: losing the letter must not fail the task."""
+        letter = DeadLetter(
+            task_name=task_name,
+            args=list(args or []),
+            kwargs=dict(kwargs or {}),
+            queue=queue,
+            post_id=post_id,
+            user_id=user_id,
+            platform=platform,
+            error=compact_error(error),
+            error_code=error_code_value(error_code),
+            trace_id=trace_id,
+            audit_log_id=audit_log_id,
+            retry_count=retry_count,
+            context=context,
+            status=STATUS_DEAD,
+        )
+        try:
+            db.add(letter)
+            db.commit()
+            db.refresh(letter)
+            return letter
+        except Exception as exc:
+            db.rollback()
+            logger.error(f"Failed to record dead letter for {task_name} {args}: {exc}")
+            return None
+
+    @staticmethod
+    def query(
+        db: Session,
+        user_id: Optional[int] = None,
+        status: Optional[str] = STATUS_DEAD,
+        error_code: Optional[str] = None,
+        platform: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        ids: Optional[List[int]] = None,
+    ) -> Query:
+        query = db.query(DeadLetter)
+        if user_id is not None:
+            query = query.filter(DeadLetter.user_id == user_id)
+        if status:
+            query = query.filter(DeadLetter.status == status)
+        if error_code:
+            query = query.filter(DeadLetter.error_code == error_code)
+        if platform:
+            query = query.filter(DeadLetter.platform == platform)
+        if since:
+            query = query.filter(DeadLetter.created_at >= since)
+        if until:
+            query = query.filter(DeadLetter.created_at < until)
+        if ids:
+            query = query.filter(DeadLetter.id.in_(ids))
+        return query.order_by(DeadLetter.created_at, DeadLetter.id)
+
+    @staticmethod
+    def replay_kwargs(letter: DeadLetter, trace_id: str) -> Dict[str, Any]:
+        kwargs = {key: value for key, value in (letter.kwargs or {}).items() if key not in REPLAY_DROPPED_KWARGS}
+        kwargs["trace_id"] = trace_id
+        return kwargs
+
+    @staticmethod
+    def mark_replayed(db: Session, letter: DeadLetter, task_id: str) -> None:
+        letter.status = STATUS_REPLAYED
+        letter.replay_task_id = task_id
+        letter.replay_count = (letter.replay_count or 0) + 1
+        letter.replayed_at = datetime.utcnow()
+        db.commit()
+
+    @staticmethod
+    def mark_skipped(db: Session, letter: DeadLetter, reason: str) -> None:
+        letter.status = STATUS_SKIPPED
+        letter.context = {**(letter.context or {}), "skip_reason": reason}
+        db.commit()
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+SCOPE_PUBLICATION = "publication"
+SCOPE_REQUEST = "request"
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+# A claim not refreshed for this long belongs to a worker that died without
+# its message being redelivered; another task may take it over. Claims held
+# across a retry or deferral are renewed to run this long past the wake-up.
+CLAIM_LEASE = timedelta(minutes=30)
+
+
+@dataclass
+class Claim:
+    key: str
+    acquired: bool
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    task_id: Optional[str] = None
+    post_id: Optional[int] = None
+
+
+class IdempotencyService:
+    @staticmethod
+    def content_hash(content: str, media_url: Optional[str] = None) -> str:
+        return hashlib.sha256(f"{content}\0{media_url or ''}".encode()).hexdigest()
+
+    @staticmethod
+    def publication_key(post_id: int, content_hash: str, account_key: str) -> str:
+        raw = f"{post_id}:{content_hash}:{account_key}"
+        return f"pub:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+    @staticmethod
+    def request_key(user_id: int, client_key: str) -> str:
+        return f"req:{hashlib.sha256(f'{user_id}:{client_key}'.encode()).hexdigest()}"
+
+    @staticmethod
+    def claim(db: Session, key: str, scope: str, task_id: str, post_id: Optional[int] = None) -> Claim:
+        """
+        Claims a key for `task_id`. Inserting relies on the unique constraint, and
+        taking over an existing key is one conditional UPDATE, so two workers can
+        never both hold it. A key is taken over when the previous attempt failed,
+        when the same task runs again (retry, redelivery, deferral) or when its
+        lease has expired. Otherwise the existing claim is returned unacquired.
+        """
+        db.add(IdempotencyKey(key=key, scope=scope, post_id=post_id, task_id=task_id, status=STATUS_IN_PROGRESS))
+        try:
+            db.commit()
+            return Claim(key=key, acquired=True, status=STATUS_IN_PROGRESS, task_id=task_id, post_id=post_id)
+        except IntegrityError:
+            db.rollback()
+
+        now = datetime.utcnow()
+        taken = (
+            db.query(IdempotencyKey)
+            .filter(
+                IdempotencyKey.key == key,
+                IdempotencyKey.status != STATUS_SUCCEEDED,
+                or_(
+                    IdempotencyKey.status == STATUS_FAILED,
+                    IdempotencyKey.task_id == task_id,
+                    IdempotencyKey.updated_at < now - CLAIM_LEASE,
+                ),
+            )
+            .update(
+                {"status": STATUS_IN_PROGRESS, "task_id": task_id, "result": None, "updated_at": now},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if taken:
+            return Claim(key=key, acquired=True, status=STATUS_IN_PROGRESS, task_id=task_id, post_id=post_id)
+
+        existing = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+        if existing is None:
+            # Released between our insert and lookup; try once more.
+            return IdempotencyService.claim(db, key, scope, task_id, post_id=post_id)
+        return Claim(
+            key=key,
+            acquired=False,
+            status=existing.status,
+            result=existing.result,
+            task_id=existing.task_id,
+            post_id=existing.post_id,
+        )
+
+    @staticmethod
+    def renew(db: Session, keys: Iterable[str], task_id: str, hold_for: timedelta) -> int:
+        """
+        Keeps `task_id`'s in-progress claims until `hold_for` from now plus the
+        lease, for a task about to sleep through a retry or deferral. The lease
+        is measured from updated_at, so it is moved past the wake-up time.
+        """
+        keys = list(keys)
+        if not keys:
+            return 0
+        renewed = (
+            db.query(IdempotencyKey)
+            .filter(
+                IdempotencyKey.key.in_(keys),
+                IdempotencyKey.task_id == task_id,
+                IdempotencyKey.status == STATUS_IN_PROGRESS,
+            )
+            .update({"updated_at": datetime.utcnow() + hold_for}, synchronize_session=False)
+        )
+        db.commit()
+        return renewed
+
+    @staticmethod
+    def complete(db: Session, key: str, status: str, result: Optional[Dict[str, Any]] = None) -> None:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(
+            {"status": status, "result": result, "updated_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+        db.commit()
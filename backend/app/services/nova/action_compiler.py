@@ -0,0 +1,106 @@
+"""
+Fuses consecutive form steps (fills followed by a click) into a single batch
+that the browser executes as one injected script with one wait condition,
+instead of one CDP round trip and auto-wait per step.
+"""
+from typing import Any, Dict, List
+
+FUSIBLE_TYPES = {"type", "click"}
+# Playwright-only selector engines cannot be resolved with document.querySelector.
+NON_CSS_MARKERS = ("text=", "xpath=", "css=", "id=", "data-testid=", ">>", "//", ":has-text(", ":text(", ":nth-match(")
+
+BATCH_WAIT_SCRIPT = """
+selectors => selectors.every(selector => {
+    const element = document.querySelector(selector);
+    return Boolean(element)
+        && !element.disabled
+        && element.getClientRects().length > 0
+        && getComputedStyle(element).visibility !== "hidden";
+})
+"""
+
+# Returns {completed, error, partial}: the index of the first step that did not run, so
+# the caller resumes from there instead of replaying steps that already ran.
+BATCH_EXECUTE_SCRIPT = """
+steps => {
+    for (let index = 0; index < steps.length; index++) {
+        const step = steps[index];
+        const element = document.querySelector(step.selector);
+        if (!element) {
+            return { completed: index, error: `selector not found: ${step.selector}` };
+        }
+        if (element.disabled) {
+            return { completed: index, error: `element is disabled: ${step.selector}` };
+        }
+        try {
+            if (step.type === "type") {
+                element.focus();
+                if (element.isContentEditable) {
+                    element.textContent = step.value;
+                } else {
+                    const proto = element instanceof HTMLTextAreaElement
+                        ? HTMLTextAreaElement.prototype
+                        : HTMLInputElement.prototype;
+                    const setter = Object.getOwnPropertyDescriptor(proto, "value").set;
+                    setter.call(element, step.value);
+                }
+                element.dispatchEvent(new Event("input", { bubbles: true }));
+                element.dispatchEvent(new Event("change", { bubbles: true }));
+            } else if (step.type === "click") {
+                element.click();
+            }
+        } catch (error) {
+            // A click that threw may still have been dispatched; never replay it.
+            return { completed: index, error: String(error), partial: step.type === "click" };
+        }
+    }
+    return { completed: steps.length, error: null, partial: false };
+}
+"""
+
+
+def is_fusible(action: Dict[str, Any]) -> bool:
+    selector = action.get("selector")
+    if action.get("type") not in FUSIBLE_TYPES or not isinstance(selector, str) or not selector:
+        return False
+    if action.get("type") == "type" and not isinstance(action.get("value"), str):
+        return False
+    return not any(marker in selector for marker in NON_CSS_MARKERS)
+
+
+class ActionBatcher:
+    """
+    Groups actions as they arrive. Fills accumulate until a click closes the
+    batch (a click may navigate, so nothing is fused after it); any other
+    action flushes the pending fills and runs on its own.
+    """
+
+    def __init__(self):
+        self._pending: List[Dict[str, Any]] = []
+
+    def add(self, action: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+        if not is_fusible(action):
+            ready = self.flush()
+            ready.append([action])
+            return ready
+
+        self._pending.append(action)
+        if action.get("type") == "click":
+            return self.flush()
+        return []
+
+    def flush(self) -> List[List[Dict[str, Any]]]:
+        if not self._pending:
+            return []
+        batch, self._pending = self._pending, []
+        return [batch]
+
+
+def compile_actions(actions: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Splits a complete plan into batches; single-element batches run unfused."""
+    batcher = ActionBatcher()
+    batches: List[List[Dict[str, Any]]] = []
+    for action in actions:
+        batches.extend(batcher.add(action))
+    batches.extend(batcher.flush())
+    return batches
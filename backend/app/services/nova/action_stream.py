@@ -0,0 +1,136 @@
+"""
+Incremental parsing of Nova Act plans streamed via `converse_stream`.
+Complete action objects are emitted as soon as their closing brace arrives,
+so execution can start before the full plan has been generated.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from app.models.error_codes import ErrorCode
+
+ACTIONS_KEY_RE = re.compile(r'"actions"\s*:\s*\[')
+ACTION_TYPES = ["navigate", "click", "type", "wait", "screenshot"]
+
+ACTION_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "type": {"type": "string", "enum": ACTION_TYPES},
+        "selector": {"type": "string"},
+        "value": {"type": "string"},
+        "url": {"type": "string"}
+    },
+    "required": ["type"]
+}
+
+ACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "actions": {
+            "type": "array",
+            "items": ACTION_ITEM_SCHEMA
+        }
+    },
+    "required": ["actions"]
+}
+
+
+class ActionStreamError(ValueError):
+    """A streamed plan could not be parsed or failed validation."""
+
+    def __init__(self, message: str, error_code: ErrorCode = ErrorCode.INVALID_JSON_RESPONSE):
+        super().__init__(message)
+        self.error_code = error_code
+
+
+class IncrementalActionParser:
+    """
+    Scans streamed model output for the `"actions": [...]` array and returns
+    each action object once it is complete. Tracks string/escape state so
+    braces inside values do not confuse the scanner.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._closed = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start: Optional[int] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        if self._closed or not text:
+            return []
+        self._buffer += text
+
+        if not self._in_array:
+            match = ACTIONS_KEY_RE.search(self._buffer, self._pos)
+            if not match:
+                # Keep enough tail to match a key split across chunks.
+                self._pos = max(0, len(self._buffer) - 32)
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        return self._scan()
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        actions = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._obj_start is None:
+                if char == "{":
+                    self._obj_start = i
+                    self._depth = 1
+                elif char == "]":
+                    self._closed = True
+                    i += 1
+                    break
+                elif not (char.isspace() or char == ","):
+                    raise ActionStreamError(f"Unexpected character in actions array: {char!r}")
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = buffer[self._obj_start:i + 1]
+                    self._obj_start = None
+                    try:
+                        actions.append(json.loads(raw))
+                    except json.JSONDecodeError as exc:
+                        raise ActionStreamError(f"Malformed action object: {exc.msg}")
+            i += 1
+
+        # Drop consumed text so the buffer only holds the pending object.
+        keep_from = self._obj_start if self._obj_start is not None else i
+        self._buffer = buffer[keep_from:]
+        if self._obj_start is not None:
+            self._obj_start = 0
+            self._pos = i - keep_from
+        else:
+            self._pos = 0
+        return actions
+
+    def finish(self) -> None:
+        """Raises if the stream ended before a complete actions array was seen."""
+        if not self._in_array:
+            raise ActionStreamError("Response did not contain an actions array")
+        if not self._closed:
+            raise ActionStreamError("Action stream ended before the plan was complete")
@@ -1,42 +1,45 @@
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
-from playwright.async_api import async_playwright, Page, Browser
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext
 from datetime import datetime
 import json
 
+from app.core.config import settings
+from app.services.nova.action_compiler import BATCH_EXECUTE_SCRIPT, BATCH_WAIT_SCRIPT
+from app.services.nova.browser_governor import BrowserGovernor, browser_governor
+
 logger = logging.getLogger(__name__)
 
-class BrowserExecutor:
-    def __init__(self):
-        self._browser: Optional[Browser] = None
-        self._playwright = None
-        self._page: Optional[Page] = None
+# Playwright raises these when the page navigates away while a script is running.
+NAVIGATION_ERROR_MARKERS = ("Execution context was destroyed", "navigation", "frame was detached")
 
-    async def start(self):
-        if not self._playwright:
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(
-                headless=False,  # Visible for debugging/demo, can be True in prod
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            self._page = await self._browser.new_page()
 
-    async def stop(self):
-        if self._page:
+class BrowserSession:
+    """
+    An isolated browser context (own cookies/storage) with a single page.
+    Several sessions can run concurrently inside one warm browser.
+    """
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self._context = context
+        self._page = page
+
+    @property
+    def page(self) -> Page:
+        return self._page
+
+    async def close(self):
+        try:
             await self._page.close()
-        if self._browser:
-            await self._browser.close()
-        if self._playwright:
-            await self._playwright.stop()
+        finally:
+            await self._context.close()
 
     async def execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """
         Executes a single action step.
         """
-        if not self._page:
-            await self.start()
-
         action_type = action.get("type")
         selector = action.get("selector")
         value = action.get("value")
@@ -52,28 +55,28 @@ class BrowserExecutor:
         try:
             if action_type == "navigate":
                 await self._page.goto(url, timeout=30000)
-            
+
             elif action_type == "click":
                 await self._page.click(selector)
-            
+
             elif action_type == "type":
                 await self._page.fill(selector, value)
-            
+
             elif action_type == "wait":
                 await self._page.wait_for_timeout(float(value or 1000))
-            
+
             elif action_type == "screenshot":
                 path = f"evidence_{datetime.now().timestamp()}.png"
                 await self._page.screenshot(path=path)
                 result["screenshot"] = path
 
             # Always take a screenshot on failure or critical steps (customizable)
-            
+
         except Exception as e:
             logger.error(f"Browser Action Failed: {e}")
             result["status"] = "failed"
             result["error"] = str(e)
-            
+
             # Capture failure state
             fail_path = f"error_{datetime.now().timestamp()}.png"
             try:
@@ -83,3 +86,209 @@ class BrowserExecutor:
                 pass
 
         return result
+
+    async def execute_batch(self, actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Executes fused form steps as one injected script behind a single wait
+        condition. The script reports how far it got; remaining steps are
+        resumed one by one, and a step the script already ran is never replayed.
+        Only the closing click can navigate, so losing the page mid-script
+        means the click fired and the batch counts as done.
+        Returns one result per step either way, keeping audit evidence intact.
+        """
+        if len(actions) == 1:
+            return [await self.execute_action(actions[0])]
+
+        selectors = [action["selector"] for action in actions]
+        try:
+            await self._page.wait_for_function(
+                BATCH_WAIT_SCRIPT, arg=selectors, timeout=settings.BROWSER_BATCH_WAIT_TIMEOUT_MS
+            )
+        except Exception as e:
+            # Nothing has touched the page yet, so every step can run on its own.
+            logger.info(f"Batch wait condition failed, falling back to step-by-step: {e}")
+            return await self._execute_remaining(actions, [])
+
+        try:
+            outcome = await self._page.evaluate(
+                BATCH_EXECUTE_SCRIPT,
+                [
+                    {"type": action["type"], "selector": action["selector"], "value": action.get("value")}
+                    for action in actions
+                ],
+            )
+        except Exception as e:
+            if _is_navigation_error(e):
+                return self._batched_results(actions)
+            # The script may have run partway; report instead of risking a double submit.
+            logger.error(f"Batched actions interrupted, not replaying: {e}")
+            return [
+                {
+                    "action": action,
+                    "status": "failed",
+                    "error": f"batch interrupted: {e}",
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "screenshot": None,
+                    "batched": True
+                }
+                for action in actions
+            ]
+
+        completed = int((outcome or {}).get("completed", len(actions)))
+        results = self._batched_results(actions[:completed])
+        if completed >= len(actions):
+            return results
+
+        error = outcome.get("error")
+        if outcome.get("partial"):
+            logger.error(f"Batched click failed after dispatch, not replaying: {error}")
+            results.append({
+                "action": actions[completed],
+                "status": "failed",
+                "error": error,
+                "timestamp": datetime.utcnow().isoformat(),
+                "screenshot": None,
+                "batched": True
+            })
+            return results
+
+        logger.info(f"Batch stopped at step {completed}, resuming step-by-step: {error}")
+        return await self._execute_remaining(actions[completed:], results)
+
+    async def _execute_remaining(
+        self, actions: List[Dict[str, Any]], results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        for action in actions:
+            step_result = await self.execute_action(action)
+            step_result["batch_fallback"] = True
+            results.append(step_result)
+            if step_result["status"] == "failed":
+                break
+        return results
+
+    @staticmethod
+    def _batched_results(actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        timestamp = datetime.utcnow().isoformat()
+        return [
+            {
+                "action": action,
+                "status": "success",
+                "timestamp": timestamp,
+                "screenshot": None,
+                "batched": True
+            }
+            for action in actions
+        ]
+
+
+def _log_close_failure(future) -> None:
+    if not future.cancelled() and future.exception():
+        logger.warning(f"Failed to close stale browser: {future.exception()}")
+
+
+def _is_navigation_error(exc: Exception) -> bool:
+    message = str(exc)
+    return any(marker in message for marker in NAVIGATION_ERROR_MARKERS)
+
+
+class BrowserExecutor:
+    def __init__(self, governor: Optional[BrowserGovernor] = None):
+        self._browser: Optional[Browser] = None
+        self._playwright = None
+        self._default_session: Optional[BrowserSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._governor = governor or browser_governor
+
+    async def launch(self):
+        """Starts the shared browser process if it is not already running."""
+        loop = asyncio.get_running_loop()
+        if self._playwright and self._loop is not loop:
+            # Playwright handles are bound to the loop that created them; a warm
+            # browser is only reusable from the long-lived worker loop.
+            logger.warning("Browser was started on another event loop; relaunching")
+            self._close_on_original_loop()
+        if not self._playwright:
+            self._loop = loop
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=settings.BROWSER_HEADLESS,
+                args=['--no-sandbox', '--disable-setuid-sandbox']
+            )
+
+    def _close_on_original_loop(self):
+        """
+        Hands the stale handles back to the loop that created them to be closed
+        there, so the old Chromium process does not outlive the relaunch.
+        """
+        browser, playwright, old_loop = self._browser, self._playwright, self._loop
+        self._playwright = None
+        self._browser = None
+        self._default_session = None
+
+        async def close():
+            try:
+                if browser:
+                    await browser.close()
+            finally:
+                await playwright.stop()
+
+        if old_loop and old_loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(close(), old_loop)
+            future.add_done_callback(_log_close_failure)
+        else:
+            logger.warning("Original browser loop is gone; stale browser cannot be closed cleanly")
+
+    async def start(self):
+        await self.launch()
+        if not self._default_session:
+            self._default_session = await self._open_session()
+
+    async def stop(self):
+        if self._default_session:
+            await self._default_session.close()
+            self._default_session = None
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _open_session(self, storage_state: Optional[Dict[str, Any]] = None) -> BrowserSession:
+        context = await self._browser.new_context(storage_state=storage_state)
+        page = await context.new_page()
+        return BrowserSession(context, page)
+
+    @asynccontextmanager
+    async def session(self, storage_state: Optional[Dict[str, Any]] = None) -> AsyncIterator[BrowserSession]:
+        """
+        Opens an isolated BrowserContext in the shared browser.
+        The governor queues the request while the per-worker context cap is
+        reached and recycles the browser when it grows past the memory limit.
+        """
+        async with self._governor.slot(recycle=self.stop):
+            await self.launch()
+            browser_session = await self._open_session(storage_state)
+            try:
+                yield browser_session
+            finally:
+                try:
+                    await browser_session.close()
+                except Exception as exc:
+                    logger.warning("Failed to close browser context: %s", exc)
+
+    async def execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Executes a single action step on the default page.
+        """
+        if not self._default_session:
+            await self.start()
+        return await self._default_session.execute_action(action)
+
+    async def execute_batch(self, actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Executes a batch of fused steps on the default page.
+        """
+        if not self._default_session:
+            await self.start()
+        return await self._default_session.execute_batch(actions)
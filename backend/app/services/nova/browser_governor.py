@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import psutil
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BROWSER_METRICS_KEY = "novapilot:metrics:browsers"
+BROWSER_PROCESS_MARKERS = ("chrome", "chromium", "headless_shell")
+
+
+def browser_process_rss_bytes() -> int:
+    """
+    Sums resident memory of every Chromium process spawned below this worker.
+    Playwright does not expose the browser pid, so the process tree is scanned.
+    """
+    total = 0
+    try:
+        children = psutil.Process(os.getpid()).children(recursive=True)
+    except psutil.Error:
+        return 0
+    for child in children:
+        try:
+            name = child.name().lower()
+            if any(marker in name for marker in BROWSER_PROCESS_MARKERS):
+                total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+class BrowserGovernor:
+    """
+    Per-process admission control for browser automation.
+
+    - caps concurrently open BrowserContexts; excess requests queue for a slot
+    - samples RSS of the Chromium process tree as contexts close
+    - once RSS exceeds the limit, stops admitting new contexts, waits for the
+      active ones to drain, then recycles the browser via the supplied callback
+    - exports its state to Redis so the API can serve it as metrics
+    """
+
+    def __init__(
+        self,
+        max_contexts: Optional[int] = None,
+        rss_limit_mb: Optional[int] = None,
+        rss_sampler: Callable[[], int] = browser_process_rss_bytes,
+    ):
+        self.max_contexts = max_contexts or settings.BROWSER_MAX_CONTEXTS_PER_WORKER
+        self.rss_limit_bytes = (rss_limit_mb or settings.BROWSER_RSS_LIMIT_MB) * 1024 * 1024
+        self._rss_sampler = rss_sampler
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._drained: Optional[asyncio.Condition] = None
+        self.active_contexts = 0
+        self.queued_requests = 0
+        self.draining = False
+        self.recycles = 0
+        self.last_rss_bytes = 0
+        self.peak_rss_bytes = 0
+        self._last_export = 0.0
+        self._export_paused_until = 0.0
+        self._export_pending = False
+        self._redis: Optional[redis.Redis] = None
+
+    def _ensure_loop(self) -> None:
+        # asyncio primitives are bound to the loop that first waits on them.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_contexts)
+            self._drained = asyncio.Condition()
+            self.active_contexts = 0
+            self.queued_requests = 0
+            self.draining = False
+
+    @asynccontextmanager
+    async def slot(self, recycle: Callable[[], Awaitable[None]]) -> AsyncIterator[None]:
+        """
+        Holds one context slot for the duration of the block.
+        `recycle` stops the browser; it is called once the tree is over the limit
+        and no context is active, and the browser relaunches lazily afterwards.
+        """
+        self._ensure_loop()
+        self.queued_requests += 1
+        self.export_metrics()
+        try:
+            await self._slots.acquire()
+            try:
+                async with self._drained:
+                    await self._drained.wait_for(lambda: not self.draining)
+                    self.active_contexts += 1
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            self.queued_requests -= 1
+
+        self.export_metrics()
+        try:
+            yield
+        finally:
+            recycled = False
+            async with self._drained:
+                self.active_contexts -= 1
+                self._sample_rss()
+                if self.last_rss_bytes > self.rss_limit_bytes:
+                    self.draining = True
+                if self.draining and self.active_contexts == 0:
+                    await self._recycle(recycle)
+                    self._drained.notify_all()
+                    recycled = True
+            self._slots.release()
+            self.export_metrics(force=recycled)
+
+    async def _recycle(self, recycle: Callable[[], Awaitable[None]]) -> None:
+        logger.warning(
+            "Browser RSS %.0fMB exceeds limit %.0fMB; recycling browser",
+            self.last_rss_bytes / 1024 / 1024,
+            self.rss_limit_bytes / 1024 / 1024,
+        )
+        try:
+            await recycle()
+            self.recycles += 1
+        except Exception as exc:
+            logger.error("Browser recycle failed: %s", exc)
+        finally:
+            self.draining = False
+            self._sample_rss()
+
+    def _sample_rss(self) -> None:
+        self.last_rss_bytes = self._rss_sampler()
+        self.peak_rss_bytes = max(self.peak_rss_bytes, self.last_rss_bytes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "worker": f"{socket.gethostname()}:{os.getpid()}",
+            "active_contexts": self.active_contexts,
+            "queued_requests": self.queued_requests,
+            "max_contexts": self.max_contexts,
+            "draining": self.draining,
+            "rss_mb": round(self.last_rss_bytes / 1024 / 1024, 1),
+            "peak_rss_mb": round(self.peak_rss_bytes / 1024 / 1024, 1),
+            "rss_limit_mb": round(self.rss_limit_bytes / 1024 / 1024, 1),
+            "recycles": self.recycles,
+            "updated_at": time.time(),
+        }
+
+    def export_metrics(self, force: bool = False) -> None:
+        """
+        Writes the snapshot to a Redis hash keyed by worker; throttled to 1/s.
+        Inside an event loop the write runs on the default executor so a slow
+        Redis never stalls browser automation.
+        """
+        now = time.monotonic()
+        if now < self._export_paused_until or self._export_pending:
+            return
+        if not force and now - self._last_export < 1.0:
+            return
+        self._last_export = now
+        snapshot = self.snapshot()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_snapshot(snapshot)
+            return
+        self._export_pending = True
+        future = loop.run_in_executor(None, self._write_snapshot, snapshot)
+        future.add_done_callback(lambda _: setattr(self, "_export_pending", False))
+
+    def _write_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        try:
+            if self._redis is None:
+                self._redis = redis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+            self._redis.hset(BROWSER_METRICS_KEY, snapshot["worker"], json.dumps(snapshot))
+        except Exception as exc:
+            # Avoid queueing exports while Redis is down.
+            self._export_paused_until = time.monotonic() + 30
+            logger.debug("Failed to export browser metrics: %s", exc)
+
+
+def read_browser_metrics(max_age_seconds: int = 300) -> List[Dict[str, Any]]:
+    """Returns per-worker governor snapshots, dropping workers that stopped reporting."""
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1)
+    try:
+        entries = client.hgetall(BROWSER_METRICS_KEY)
+        now = time.time()
+        snapshots = []
+        stale = []
+        for worker, raw in entries.items():
+            snapshot = json.loads(raw)
+            if now - snapshot.get("updated_at", 0) > max_age_seconds:
+                stale.append(worker)
+                continue
+            snapshots.append(snapshot)
+        if stale:
+            client.hdel(BROWSER_METRICS_KEY, *stale)
+        return sorted(snapshots, key=lambda item: item["worker"])
+    finally:
+        client.close()
+
+
+browser_governor = BrowserGovernor()
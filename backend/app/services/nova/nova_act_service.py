@@ -1,12 +1,21 @@
+import asyncio
 import logging
 import json
+import threading
 from datetime import datetime, timezone
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncContextManager, AsyncIterator
 from botocore.exceptions import ClientError
 from app.core.config import settings
 from app.core.aws import get_aws_client
 from app.core.exceptions import PlatformError
 from app.services.nova.browser_executor import BrowserExecutor
+from app.services.nova.action_compiler import ActionBatcher, compile_actions
+from app.services.nova.action_stream import (
+    ACTION_ITEM_SCHEMA,
+    ACTION_SCHEMA,
+    ActionStreamError,
+    IncrementalActionParser,
+)
 from jsonschema import validate, ValidationError
 from app.models.error_codes import ErrorCode
 
@@ -22,6 +31,11 @@ class NovaActService:
         self.model_id = settings.NOVA_ACT_MODEL_ID
         self.browser = None if self.demo_mode else BrowserExecutor()
 
+    async def shutdown(self) -> None:
+        """Stops the warm browser kept alive across goals on the worker loop."""
+        if self.browser:
+            await self.browser.stop()
+
     @staticmethod
     def _is_auth_error(exc: ClientError) -> bool:
         code = exc.response.get("Error", {}).get("Code")
@@ -54,6 +68,29 @@ class NovaActService:
                     )
                 raise
 
+    def _converse_stream_with_retry(self, **kwargs) -> dict:
+        if self.client is None:
+            raise RuntimeError("Bedrock client is unavailable")
+        try:
+            return self.client.converse_stream(**kwargs)
+        except ClientError as exc:
+            if not self._is_auth_error(exc):
+                raise
+
+            code = exc.response.get("Error", {}).get("Code", "Unknown")
+            logger.warning("Bedrock auth error (%s). Refreshing client and retrying once.", code)
+            self._refresh_client()
+
+            try:
+                return self.client.converse_stream(**kwargs)
+            except ClientError as retry_exc:
+                if self._is_auth_error(retry_exc):
+                    raise PlatformError(
+                        "AWS credentials/token invalid for Bedrock. "
+                        "Run `aws sts get-caller-identity` and restart the backend."
+                    )
+                raise
+
     def validate_nova_response(self, response: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validates the Nova response against a JSON schema.
@@ -65,46 +102,53 @@ class NovaActService:
             logger.error(f"Nova Response Validation Failed: {e.message}")
             raise ValueError(f"Invalid Nova Response: {e.message}")
 
+    @staticmethod
+    def _demo_plan(goal: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "type": "navigate",
+                "url": "https://example.com/demo-social-publisher",
+            },
+            {
+                "type": "type",
+                "selector": "#content",
+                "value": context.get("content", f"Demo automation for: {goal}")[:280],
+            },
+            {
+                "type": "click",
+                "selector": "#publish",
+            },
+            {
+                "type": "screenshot",
+            },
+        ]
+
+    def _plan_request(self, goal: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        from app.services.nova.prompts import NOVA_ACT_SYSTEM_PROMPT, get_automation_prompt
+
+        prompt = get_automation_prompt(goal, json.dumps(context))
+        return {
+            "modelId": self.model_id,
+            "system": [{"text": NOVA_ACT_SYSTEM_PROMPT}],
+            "messages": [{
+                "role": "user",
+                "content": [{"text": prompt}]
+            }],
+            "inferenceConfig": {
+                "maxTokens": 2048,
+                "temperature": 0.1
+            }
+        }
+
     async def _get_execution_plan(self, goal: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Consults Amazon Nova to generate a plan of actions.
         """
         if self.demo_mode:
-            return [
-                {
-                    "type": "navigate",
-                    "url": "https://example.com/demo-social-publisher",
-                },
-                {
-                    "type": "type",
-                    "selector": "#content",
-                    "value": context.get("content", f"Demo automation for: {goal}")[:280],
-                },
-                {
-                    "type": "click",
-                    "selector": "#publish",
-                },
-                {
-                    "type": "screenshot",
-                },
-            ]
-        from app.services.nova.prompts import NOVA_ACT_SYSTEM_PROMPT, get_automation_prompt
-        
-        prompt = get_automation_prompt(goal, json.dumps(context))
+            return self._demo_plan(goal, context)
 
         try:
-            response = self._converse_with_retry(
-                modelId=self.model_id,
-                system=[{"text": NOVA_ACT_SYSTEM_PROMPT}],
-                messages=[{
-                    "role": "user",
-                    "content": [{"text": prompt}]
-                }],
-                inferenceConfig={
-                    "maxTokens": 2048,
-                    "temperature": 0.1
-                }
-            )
+            response = self._converse_with_retry(**self._plan_request(goal, context))
 
             response_text = response['output']['message']['content'][0]['text']
             
@@ -117,26 +161,6 @@ class NovaActService:
             plan = json.loads(response_text)
             
             # Validate Schema
-            ACTION_SCHEMA = {
-                "type": "object",
-                "properties": {
-                    "actions": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "type": {"type": "string", "enum": ["navigate", "click", "type", "wait", "screenshot"]},
-                                "selector": {"type": "string"},
-                                "value": {"type": "string"},
-                                "url": {"type": "string"}
-                            },
-                            "required": ["type"]
-                        }
-                    }
-                },
-                "required": ["actions"]
-            }
-            
             self.validate_nova_response(plan, ACTION_SCHEMA)
             
             return plan.get("actions", [])
@@ -145,31 +169,224 @@ class NovaActService:
             logger.error(f"Nova Act Planning Failed: {e}")
             raise
 
+    async def _stream_plan_text(self, request: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Yields text deltas from `converse_stream`. The blocking event stream is
+        drained on a worker thread so the event loop stays free for the browser.
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(chunks.put_nowait, item)
+            except RuntimeError:
+                # Event loop already closed; nobody is listening anymore.
+                pass
+
+        def pump() -> None:
+            stream = None
+            try:
+                response = self._converse_stream_with_retry(**request)
+                stream = response["stream"]
+                for event in stream:
+                    if cancelled.is_set():
+                        break
+                    text = event.get("contentBlockDelta", {}).get("delta", {}).get("text")
+                    if text:
+                        put(("text", text))
+                put(("end", None))
+            except Exception as exc:
+                put(("error", exc))
+            finally:
+                if stream is not None and hasattr(stream, "close"):
+                    try:
+                        stream.close()
+                    except Exception:
+                        pass
+
+        pump_future = loop.run_in_executor(None, pump)
+        try:
+            while True:
+                kind, payload = await chunks.get()
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise payload
+                yield payload
+        finally:
+            cancelled.set()
+            pump_future.cancel()
+
+    async def _stream_execution_plan(self, goal: str, context: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the execution plan from Amazon Nova, yielding each action as soon
+        as it has been fully received and validated.
+        """
+        if self.demo_mode:
+            for action in self._demo_plan(goal, context):
+                yield action
+            return
+
+        parser = IncrementalActionParser()
+        async for text in self._stream_plan_text(self._plan_request(goal, context)):
+            for action in parser.feed(text):
+                try:
+                    validate(instance=action, schema=ACTION_ITEM_SCHEMA)
+                except ValidationError as e:
+                    raise ActionStreamError(
+                        f"Invalid Nova action: {e.message}", error_code=ErrorCode.VALIDATION_ERROR
+                    )
+                yield action
+            if parser.closed:
+                return
+        parser.finish()
+
+    async def _execute_streamed_plan(
+        self,
+        goal: str,
+        context: Dict[str, Any],
+        open_session: AsyncContextManager,
+        audit_log: Dict[str, Any],
+    ) -> None:
+        """
+        Pipelines planning and execution: actions are handed to the browser as
+        they stream in, so the browser context opens and navigation starts while
+        the rest of the plan is still being generated.
+        A planning failure mid-stream aborts execution and is recorded in the audit log.
+        """
+        planned: asyncio.Queue = asyncio.Queue()
+        batcher = ActionBatcher() if settings.BROWSER_BATCH_ACTIONS else None
+
+        async def produce() -> None:
+            try:
+                async for action in self._stream_execution_plan(goal, context):
+                    await planned.put(("action", action))
+                await planned.put(("done", None))
+            except Exception as exc:
+                await planned.put(("error", exc))
+
+        producer = asyncio.create_task(produce())
+        try:
+            async with open_session as session:
+                while True:
+                    kind, payload = await planned.get()
+                    if kind == "done":
+                        if batcher is not None:
+                            for batch in batcher.flush():
+                                await self._run_batch(session, batch, audit_log)
+                        return
+                    if kind == "error":
+                        logger.error(f"Nova Act Planning Failed: {payload}")
+                        audit_log["error_code"] = getattr(payload, "error_code", ErrorCode.SYSTEM_ERROR)
+                        raise Exception(
+                            f"Planning failed mid-stream after {len(audit_log['steps'])} steps: {payload}"
+                        )
+                    if batcher is None:
+                        await self._run_batch(session, [payload], audit_log)
+                        continue
+                    for batch in batcher.add(payload):
+                        await self._run_batch(session, batch, audit_log)
+        finally:
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    @staticmethod
+    def _demo_result(goal: str, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        steps = []
+        for action in actions:
+            steps.append(
+                {
+                    "action": action,
+                    "status": "success",
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "screenshot": "demo_evidence.png" if action.get("type") == "screenshot" else None,
+                }
+            )
+        return {
+            "goal": goal,
+            "status": "success",
+            "steps": steps,
+            "error": None,
+            "error_code": None,
+            "mode": "demo",
+        }
+
+    async def _run_batch(self, session, batch: List[Dict[str, Any]], audit_log: Dict[str, Any]) -> None:
+        """
+        Executes one compiled batch, recording a result per step into the audit log.
+        Raises on the first failed step after categorizing the error.
+        """
+        if len(batch) == 1:
+            step_results = [await session.execute_action(batch[0])]
+        else:
+            step_results = await session.execute_batch(batch)
+
+        for step_result in step_results:
+            audit_log["steps"].append(step_result)
+
+            if step_result["status"] == "failed":
+                # Categorize error
+                error_msg = step_result.get('error', '').lower()
+                if "timeout" in error_msg:
+                    audit_log["error_code"] = ErrorCode.TIMEOUT
+                elif "selector" in error_msg:
+                    audit_log["error_code"] = ErrorCode.SELECTOR_NOT_FOUND
+                else:
+                    audit_log["error_code"] = ErrorCode.SYSTEM_ERROR
+
+                raise Exception(f"Action failed: {step_result.get('error')}")
+
+    async def _run_actions(self, session, actions: List[Dict[str, Any]], audit_log: Dict[str, Any]) -> None:
+        """
+        Executes planned actions in order, fusing compatible form steps when enabled.
+        """
+        if settings.BROWSER_BATCH_ACTIONS:
+            batches = compile_actions(actions)
+        else:
+            batches = [[action] for action in actions]
+        for batch in batches:
+            await self._run_batch(session, batch, audit_log)
+
     async def execute_goal(self, goal: str, context: Dict[str, Any] = {}) -> Dict[str, Any]:
         """
         Orchestrates the full goal execution: Plan -> Execute -> Audit.
         """
         if self.demo_mode:
             actions = await self._get_execution_plan(goal, context)
-            steps = []
-            for action in actions:
-                steps.append(
-                    {
-                        "action": action,
-                        "status": "success",
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "screenshot": "demo_evidence.png" if action.get("type") == "screenshot" else None,
-                    }
-                )
+            return self._demo_result(goal, actions)
+
+        if not self.browser:
             return {
                 "goal": goal,
-                "status": "success",
-                "steps": steps,
-                "error": None,
-                "error_code": None,
-                "mode": "demo",
+                "status": "failed",
+                "steps": [],
+                "error": "Unexpected error: Browser executor is unavailable",
+                "error_code": ErrorCode.SYSTEM_ERROR
             }
 
+        try:
+            return await self._execute_goal_in_session(goal, context)
+        except Exception as e:
+            return {
+                "goal": goal,
+                "status": "failed",
+                "steps": [],
+                "error": f"Unexpected error: {str(e)}",
+                "error_code": ErrorCode.SYSTEM_ERROR
+            }
+
+    async def _execute_goal_in_session(
+        self,
+        goal: str,
+        context: Dict[str, Any],
+        storage_state: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Plans and executes a goal inside its own isolated BrowserContext.
+        """
         audit_log = {
             "goal": goal,
             "status": "pending",
@@ -178,52 +395,83 @@ class NovaActService:
             "error_code": None
         }
 
-        try:
-            # 1. Get Plan
+        if settings.NOVA_ACT_STREAM_PLANNING:
             try:
-                actions = await self._get_execution_plan(goal, context)
-            except Exception as e:
-                audit_log["status"] = "failed"
-                audit_log["error"] = f"Planning failed: {str(e)}"
-                audit_log["error_code"] = ErrorCode.SYSTEM_ERROR
-                return audit_log
-            
-            # 2. Execute Actions
-            try:
-                if not self.browser:
-                    raise RuntimeError("Browser executor is unavailable")
-                await self.browser.start()
-                
-                for action in actions:
-                    step_result = await self.browser.execute_action(action)
-                    audit_log["steps"].append(step_result)
-                    
-                    if step_result["status"] == "failed":
-                        # Categorize error
-                        error_msg = step_result.get('error', '').lower()
-                        if "timeout" in error_msg:
-                            audit_log["error_code"] = ErrorCode.TIMEOUT
-                        elif "selector" in error_msg:
-                            audit_log["error_code"] = ErrorCode.SELECTOR_NOT_FOUND
-                        else:
-                            audit_log["error_code"] = ErrorCode.SYSTEM_ERROR
-                            
-                        raise Exception(f"Action failed: {step_result.get('error')}")
-
+                await self._execute_streamed_plan(
+                    goal,
+                    context,
+                    self.browser.session(storage_state=storage_state),
+                    audit_log,
+                )
                 audit_log["status"] = "success"
-
             except Exception as e:
                 audit_log["status"] = "failed"
                 audit_log["error"] = str(e)
                 if not audit_log["error_code"]:
                     audit_log["error_code"] = ErrorCode.SYSTEM_ERROR
-            
-            finally:
-                await self.browser.stop()
+            return audit_log
 
+        try:
+            actions = await self._get_execution_plan(goal, context)
         except Exception as e:
             audit_log["status"] = "failed"
-            audit_log["error"] = f"Unexpected error: {str(e)}"
+            audit_log["error"] = f"Planning failed: {str(e)}"
             audit_log["error_code"] = ErrorCode.SYSTEM_ERROR
-            
+            return audit_log
+
+        try:
+            async with self.browser.session(storage_state=storage_state) as session:
+                await self._run_actions(session, actions, audit_log)
+            audit_log["status"] = "success"
+        except Exception as e:
+            audit_log["status"] = "failed"
+            audit_log["error"] = str(e)
+            if not audit_log["error_code"]:
+                audit_log["error_code"] = ErrorCode.SYSTEM_ERROR
+
         return audit_log
+
+    async def execute_goal_for_accounts(
+        self,
+        goal: str,
+        account_contexts: List[Dict[str, Any]],
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Executes the same goal for several accounts concurrently in one warm browser.
+        Each account gets an isolated BrowserContext; concurrency is bounded by the
+        browser governor's per-worker context cap. Returns audit logs keyed by account id.
+        """
+        if self.demo_mode:
+            results = {}
+            for account_context in account_contexts:
+                actions = await self._get_execution_plan(goal, account_context["context"])
+                results[account_context["account_id"]] = self._demo_result(goal, actions)
+            return results
+
+        if not self.browser:
+            raise RuntimeError("Browser executor is unavailable")
+
+        async def run_for_account(account_context: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return await self._execute_goal_in_session(
+                    goal,
+                    account_context["context"],
+                    storage_state=account_context.get("storage_state"),
+                )
+            except Exception as e:
+                return {
+                    "goal": goal,
+                    "status": "failed",
+                    "steps": [],
+                    "error": f"Unexpected error: {str(e)}",
+                    "error_code": ErrorCode.SYSTEM_ERROR,
+                }
+
+        outcomes = await asyncio.gather(
+            *(run_for_account(account_context) for account_context in account_contexts)
+        )
+
+        return {
+            account_context["account_id"]: outcome
+            for account_context, outcome in zip(account_contexts, outcomes)
+        }
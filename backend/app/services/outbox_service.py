@@ -0,0 +1,53 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.core.event_bus import AUTOMATION_EVENTS_CHANNEL, with_defaults
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    @staticmethod
+    def add(db: Session, event: Dict[str, Any], channel: str = AUTOMATION_EVENTS_CHANNEL) -> OutboxEvent:
+        """
+        Stages an event in the caller's transaction; it is published by the
+        outbox relay once, and only if, the caller commits.
+        """
+        row = OutboxEvent(channel=channel, payload=with_defaults(event))
+        db.add(row)
+        return row
+
+    @staticmethod
+    def claim_pending(db: Session, limit: int) -> List[OutboxEvent]:
+        """Oldest undelivered rows; other relays skip the rows locked here (PostgreSQL)."""
+        return (
+            db.query(OutboxEvent)
+            .filter(OutboxEvent.delivered_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    @staticmethod
+    def mark_delivered(db: Session, rows: List[OutboxEvent]) -> None:
+        now = datetime.utcnow()
+        for row in rows:
+            row.delivered_at = now
+            row.attempts = (row.attempts or 0) + 1
+        db.commit()
+
+    @staticmethod
+    def purge_delivered(db: Session, older_than: timedelta) -> int:
+        deleted = (
+            db.query(OutboxEvent)
+            .filter(OutboxEvent.delivered_at.isnot(None))
+            .filter(OutboxEvent.delivered_at < datetime.utcnow() - older_than)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import redis
+import redis.asyncio as redis_async
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY_PREFIX = "novapilot:ratelimit:publish"
+REQUEST_KEY_PREFIX = "novapilot:ratelimit:request"
+
+# Token buckets stored as hashes {tokens, ts}. Takes one token from every
+# bucket or from none, so a multi-account publication never burns capacity on
+# some accounts while waiting for others. Uses the Redis clock so all workers
+# agree on refill timing. Returns {1, 0} on success or {0, wait_ms}.
+ACQUIRE_SCRIPT = """
+redis.replicate_commands()
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) / rate))
+    end
+end
+if wait > 0 then
+    return {0, wait}
+end
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'ts', now)
+    redis.call('PEXPIRE', key, ttl)
+end
+return {1, 0}
+"""
+
+
+def parse_rate(spec: str) -> Tuple[int, float]:
+    """Parses "<posts>/<seconds>" into (bucket capacity, refill period in seconds)."""
+    posts, _, seconds = spec.partition("/")
+    capacity = int(posts)
+    period = float(seconds)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f"Invalid publish rate '{spec}'")
+    return capacity, period
+
+
+def platform_rate(platform: str) -> Optional[Tuple[int, float]]:
+    spec = getattr(settings, f"PUBLISH_RATE_LIMIT_{platform.upper()}", None)
+    if not spec:
+        return None
+    return parse_rate(spec)
+
+
+class PublishRateLimiter:
+    """
+    Distributed token bucket per platform and account.
+
+    Workers call `acquire` before launching automation; a non-zero result is
+    the number of seconds until a token is available, which is when the task
+    should run again. With the local job backend every publication runs in
+    the API process, so the buckets are kept in memory instead of in Redis.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+        self._acquire = None
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+        return self._client
+
+    @staticmethod
+    def bucket_key(platform: str, account_key: str) -> str:
+        return f"{BUCKET_KEY_PREFIX}:{platform}:{account_key}"
+
+    def acquire(self, platform: str, account_keys: Iterable[str]) -> float:
+        rate = platform_rate(platform)
+        keys = [self.bucket_key(platform, account_key) for account_key in account_keys]
+        if rate is None or not keys:
+            return 0.0
+        capacity, period = rate
+        refill_per_ms = capacity / (period * 1000)
+        # Idle buckets refill completely after one period; let them expire then.
+        ttl_ms = int(period * 1000) + 1000
+        from app.core.celery_app import local_jobs_enabled
+
+        if local_jobs_enabled():
+            return self._acquire_in_process(keys, capacity, refill_per_ms)
+        try:
+            if self._acquire is None:
+                self._acquire = self.client.register_script(ACQUIRE_SCRIPT)
+            allowed, wait_ms = self._acquire(keys=keys, args=[capacity, refill_per_ms, ttl_ms])
+        except redis.RedisError as exc:
+            # Fail open: the platform will answer with RATE_LIMITED if we overshoot.
+            logger.warning(f"Publish rate limiter unavailable, allowing {platform} publish: {exc}")
+            return 0.0
+        if int(allowed):
+            return 0.0
+        return int(wait_ms) / 1000
+
+    def _acquire_in_process(self, keys: List[str], capacity: int, refill_per_ms: float) -> float:
+        """ACQUIRE_SCRIPT over this process's buckets."""
+        now = time.time() * 1000
+        with self._lock:
+            levels = []
+            wait_ms = 0
+            for key in keys:
+                tokens, ts = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + max(0.0, now - ts) * refill_per_ms)
+                levels.append(tokens)
+                if tokens < 1:
+                    wait_ms = max(wait_ms, math.ceil((1 - tokens) / refill_per_ms))
+            if wait_ms > 0:
+                return wait_ms / 1000
+            for key, tokens in zip(keys, levels):
+                self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+
+publish_rate_limiter = PublishRateLimiter()
+
+
+# GCRA (generic cell rate algorithm) for API requests: one key per client and
+# route bucket holding the theoretical arrival time (TAT) in ms. `limit`
+# requests per `period` are allowed, as a burst or spread out. One GET and at
+# most one SET per request, using the Redis clock. Returns
+# {allowed, remaining, retry_after_ms, reset_after_ms}.
+GCRA_SCRIPT = """
+redis.replicate_commands()
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local emission = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+local new_tat = tat + emission
+local allow_at = new_tat - emission * limit
+if allow_at > now then
+    return {0, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / emission), 0, math.ceil(new_tat - now)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+    def headers(self) -> Dict[str, str]:
+        """IETF RateLimit header fields, plus Retry-After when rejected."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def gcra(tat: Optional[float], now: float, emission: float, limit: int) -> Tuple[RateLimitResult, Optional[float]]:
+    """GCRA_SCRIPT in Python (times in ms); returns the result and the new TAT, None if rejected."""
+    tat = max(tat or now, now)
+    new_tat = tat + emission
+    allow_at = new_tat - emission * limit
+    if allow_at > now:
+        return RateLimitResult(False, limit, 0, (allow_at - now) / 1000, (tat - now) / 1000), None
+    remaining = int((now - allow_at) // emission)
+    return RateLimitResult(True, limit, remaining, 0.0, (new_tat - now) / 1000), new_tat
+
+
+class LocalRateLimiter:
+    """
+    Per-process GCRA used while Redis is unreachable. Holds at most
+    `max_keys` clients; the least recently seen are evicted first, which only
+    forgets clients that have been quiet the longest.
+    """
+
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_LOCAL_MAX_KEYS
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, period: float, now: Optional[float] = None) -> RateLimitResult:
+        now = (now if now is not None else time.time()) * 1000
+        emission = period * 1000 / limit
+        with self._lock:
+            result, new_tat = gcra(self._tats.get(key), now, emission, limit)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+            if key in self._tats:
+                self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class RequestRateLimiter:
+    """
+    API request limiter shared by all API processes through Redis, one Lua
+    call per request. If Redis fails, requests are limited per process by
+    `LocalRateLimiter` and Redis is retried after
+    `RATE_LIMIT_REDIS_RETRY_SECONDS`.
+    """
+
+    def __init__(self, client: Optional[redis_async.Redis] = None, local: Optional[LocalRateLimiter] = None):
+        self._client = client
+        self._client_loop = None
+        self._script = None
+        self.local = local or LocalRateLimiter()
+        self._redis_retry_at = 0.0
+
+    def _redis(self) -> redis_async.Redis:
+        loop = asyncio.get_running_loop()
+        if self._client is None or (self._client_loop is not None and self._client_loop is not loop):
+            # Async connections belong to the loop that opened them.
+            self._client = redis_async.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+            self._client_loop = loop
+            self._script = None
+        if self._script is None:
+            self._script = self._client.register_script(GCRA_SCRIPT)
+        return self._client
+
+    async def hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        if time.monotonic() >= self._redis_retry_at:
+            try:
+                self._redis()
+                allowed, remaining, retry_ms, reset_ms = await self._script(
+                    keys=[f"{REQUEST_KEY_PREFIX}:{key}"], args=[period * 1000 / limit, limit]
+                )
+                return RateLimitResult(bool(int(allowed)), limit, int(remaining), int(retry_ms) / 1000, int(reset_ms) / 1000)
+            except (redis.RedisError, OSError) as exc:
+                logger.warning(f"Request rate limiter falling back to per-process limits: {exc}")
+                self._redis_retry_at = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+        return self.local.hit(key, limit, period)
+
+
+request_rate_limiter = RequestRateLimiter()
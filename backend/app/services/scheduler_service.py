@@ -0,0 +1,257 @@
+import calendar
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.post import Post, PostStatus
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = "novapilot:schedule:posts"
+DISPATCHED_KEY = "novapilot:schedule:dispatched"
+# Priority lane per scheduled post, only for posts that asked for a non-default lane.
+LANES_KEY = "novapilot:schedule:lanes"
+
+# Atomically moves due members out of the schedule and records "<due>@<claimed at>"
+# as dispatched, so concurrent dispatchers never hand out the same post twice.
+CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[2]))
+for i = 1, #due, 2 do
+    redis.call('ZREM', KEYS[1], due[i])
+    redis.call('HSET', KEYS[2], due[i], due[i + 1] .. '@' .. ARGV[1])
+end
+return due
+"""
+
+
+def parse_dispatch_marker(raw: str) -> Tuple[float, float]:
+    """Returns (due, claimed_at); markers written before leases count as claimed when due."""
+    due, _, claimed_at = raw.partition("@")
+    return float(due), float(claimed_at or due)
+
+
+def to_epoch(value: datetime) -> float:
+    """Naive datetimes are treated as UTC, matching `datetime.utcnow()` usage in the models."""
+    if value.tzinfo is not None:
+        return value.timestamp()
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1_000_000
+
+
+def utc_now_naive() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Normalizes client timestamps to the naive-UTC form stored in the database."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class PublicationScheduler:
+    """
+    Holds future publication times in a Redis sorted set (post_id -> due epoch).
+    Insert, reschedule and cancel are O(log N); claiming due posts only touches
+    the due head of the set, so the backlog can grow to millions of posts.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+        self._claim_due = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._client
+
+    def schedule(self, post_id: int, due_at: datetime, lane: Optional[str] = None) -> None:
+        pipe = self.client.pipeline()
+        pipe.zadd(SCHEDULE_KEY, {str(post_id): to_epoch(due_at)})
+        pipe.hdel(DISPATCHED_KEY, str(post_id))
+        if lane:
+            pipe.hset(LANES_KEY, str(post_id), lane)
+        else:
+            pipe.hdel(LANES_KEY, str(post_id))
+        pipe.execute()
+
+    def schedule_many(self, entries: Iterable[Tuple[int, datetime]], lane: Optional[str] = None) -> None:
+        mapping = {str(post_id): to_epoch(due_at) for post_id, due_at in entries}
+        if not mapping:
+            return
+        pipe = self.client.pipeline()
+        pipe.zadd(SCHEDULE_KEY, mapping)
+        pipe.hdel(DISPATCHED_KEY, *mapping.keys())
+        if lane:
+            pipe.hset(LANES_KEY, mapping={post_id: lane for post_id in mapping})
+        else:
+            pipe.hdel(LANES_KEY, *mapping.keys())
+        pipe.execute()
+
+    def reschedule(self, post_id: int, due_at: datetime) -> bool:
+        """Moves an already scheduled post; returns False if it was not scheduled here."""
+        if self.client.zscore(SCHEDULE_KEY, str(post_id)) is None:
+            return False
+        self.client.zadd(SCHEDULE_KEY, {str(post_id): to_epoch(due_at)}, xx=True)
+        return True
+
+    def cancel(self, post_id: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.zrem(SCHEDULE_KEY, str(post_id))
+        pipe.hdel(DISPATCHED_KEY, str(post_id))
+        pipe.hdel(LANES_KEY, str(post_id))
+        pipe.execute()
+
+    def cancel_many(self, post_ids: Iterable[int]) -> None:
+        ids = [str(post_id) for post_id in post_ids]
+        if not ids:
+            return
+        pipe = self.client.pipeline()
+        pipe.zrem(SCHEDULE_KEY, *ids)
+        pipe.hdel(DISPATCHED_KEY, *ids)
+        pipe.hdel(LANES_KEY, *ids)
+        pipe.execute()
+
+    def claim_due(self, now: Optional[float] = None, limit: int = 500) -> List[Tuple[int, float]]:
+        if self._claim_due is None:
+            self._claim_due = self.client.register_script(CLAIM_DUE_SCRIPT)
+        now = now if now is not None else time.time()
+        raw = self._claim_due(keys=[SCHEDULE_KEY, DISPATCHED_KEY], args=[now, limit])
+        return [(int(raw[i]), float(raw[i + 1])) for i in range(0, len(raw), 2)]
+
+    def pop_lanes(self, post_ids: Iterable[int]) -> Dict[int, str]:
+        """Returns and clears the requested lanes of claimed posts."""
+        ids = [str(post_id) for post_id in post_ids]
+        if not ids:
+            return {}
+        pipe = self.client.pipeline()
+        pipe.hmget(LANES_KEY, ids)
+        pipe.hdel(LANES_KEY, *ids)
+        lanes, _ = pipe.execute()
+        return {int(post_id): lane for post_id, lane in zip(ids, lanes) if lane}
+
+    def forget(self, post_ids: Iterable[int]) -> None:
+        """Drops dispatch markers, e.g. for claimed posts that were no longer scheduled."""
+        ids = [str(post_id) for post_id in post_ids]
+        if ids:
+            self.client.hdel(DISPATCHED_KEY, *ids)
+
+    def release(self, post_id: int, due: float, lane: Optional[str] = None) -> None:
+        """Puts a claimed post back, e.g. when enqueueing it failed."""
+        pipe = self.client.pipeline()
+        pipe.zadd(SCHEDULE_KEY, {str(post_id): due})
+        pipe.hdel(DISPATCHED_KEY, str(post_id))
+        if lane:
+            pipe.hset(LANES_KEY, str(post_id), lane)
+        pipe.execute()
+
+    def next_due(self) -> Optional[float]:
+        head = self.client.zrange(SCHEDULE_KEY, 0, 0, withscores=True)
+        return head[0][1] if head else None
+
+    def reconcile(
+        self,
+        db: Session,
+        catchup_window: Optional[timedelta] = None,
+        batch_size: int = 1000,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        Re-adds scheduled posts from the database that are missing from Redis,
+        e.g. after Redis lost data. Posts dispatched for the same due time within
+        the dispatch lease are skipped, so a restart never dispatches them twice;
+        an older marker means the dispatcher died before the task was enqueued
+        (or the task was lost), and the post is added again. Returns the count added.
+        """
+        window = catchup_window or timedelta(hours=settings.SCHEDULER_CATCHUP_WINDOW_HOURS)
+        now = now if now is not None else time.time()
+        lease_expired_before = now - settings.SCHEDULER_DISPATCH_LEASE_SECONDS
+        oldest = utc_now_naive() - window
+        added = 0
+        last_id = 0
+        while True:
+            rows = (
+                db.query(Post.id, Post.scheduled_at)
+                .filter(
+                    Post.status == PostStatus.SCHEDULED,
+                    Post.scheduled_at.isnot(None),
+                    Post.scheduled_at >= oldest,
+                    Post.id > last_id,
+                )
+                .order_by(Post.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            ids = [str(row.id) for row in rows]
+            dispatched = self.client.hmget(DISPATCHED_KEY, ids)
+            pipe = self.client.pipeline()
+            for row, marker in zip(rows, dispatched):
+                due = to_epoch(row.scheduled_at)
+                if marker is not None:
+                    dispatched_due, claimed_at = parse_dispatch_marker(marker)
+                    if abs(dispatched_due - due) < 1 and claimed_at >= lease_expired_before:
+                        continue
+                pipe.zadd(SCHEDULE_KEY, {str(row.id): due}, nx=True)
+            added += sum(1 for result in pipe.execute() if result)
+        return added
+
+    def reclaim_expired(self, db: Session, now: Optional[float] = None, batch_size: int = 1000) -> int:
+        """
+        Puts back posts whose dispatch marker outlived the lease while the
+        database still has them scheduled. Only the markers are scanned, so it
+        is cheap enough to run periodically. Returns the count put back.
+        """
+        now = now if now is not None else time.time()
+        lease_expired_before = now - settings.SCHEDULER_DISPATCH_LEASE_SECONDS
+        cursor = 0
+        reclaimed = 0
+        while True:
+            cursor, entries = self.client.hscan(DISPATCHED_KEY, cursor=cursor, count=batch_size)
+            expired = [
+                int(post_id)
+                for post_id, marker in entries.items()
+                if parse_dispatch_marker(marker)[1] < lease_expired_before
+            ]
+            if expired:
+                rows = db.query(Post.id, Post.scheduled_at).filter(
+                    Post.id.in_(expired),
+                    Post.status == PostStatus.SCHEDULED,
+                    Post.scheduled_at.isnot(None),
+                )
+                pipe = self.client.pipeline()
+                for row in rows:
+                    pipe.zadd(SCHEDULE_KEY, {str(row.id): to_epoch(row.scheduled_at)}, nx=True)
+                reclaimed += sum(1 for result in pipe.execute() if result)
+            if cursor == 0:
+                break
+        return reclaimed
+
+    def prune_dispatched(self, db: Session, batch_size: int = 1000) -> int:
+        """Drops dispatch markers for posts that have left the scheduled state."""
+        cursor = 0
+        removed = 0
+        while True:
+            cursor, entries = self.client.hscan(DISPATCHED_KEY, cursor=cursor, count=batch_size)
+            if entries:
+                ids = [int(post_id) for post_id in entries]
+                still_scheduled = {
+                    row.id
+                    for row in db.query(Post.id).filter(Post.id.in_(ids), Post.status == PostStatus.SCHEDULED)
+                }
+                stale = [str(post_id) for post_id in ids if post_id not in still_scheduled]
+                if stale:
+                    removed += self.client.hdel(DISPATCHED_KEY, *stale)
+            if cursor == 0:
+                break
+        return removed
+
+
+publication_scheduler = PublicationScheduler()
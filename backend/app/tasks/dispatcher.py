@@ -0,0 +1,228 @@
+"""
+Publication dispatcher.
+
+Run one (or more, for redundancy) alongside the Celery workers:
+
+    python -m app.tasks.dispatcher
+
+It claims posts from the Redis schedule as they fall due and enqueues
+`execute_post_publication` for each, so a post starts within a poll interval
+of its `scheduled_at` instead of relying on Celery ETAs held by workers.
+"""
+import logging
+import signal
+import time
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from app.api import crud
+from app.core.celery_app import browser_queue
+from app.core.config import settings
+from app.core.event_bus import publish_event
+from app.core.lanes import Lane
+from app.core.db import SessionLocal
+from app.models.post import Post, PostStatus
+from app.services.scheduler_service import PublicationScheduler, publication_scheduler, to_epoch, utc_now_naive
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_due(
+    scheduler: PublicationScheduler,
+    db,
+    task=None,
+    now: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Claims due posts and enqueues them. A claimed post is only dispatched if the
+    database still has it scheduled for the claimed time; cancelled posts are
+    dropped and posts rescheduled behind Redis's back are put back at their new
+    time. Posts go to the scheduled lane unless they were scheduled with
+    another one. Returns the number of posts enqueued.
+    """
+    if task is None:
+        from app.tasks.worker import execute_post_publication
+
+        task = execute_post_publication
+
+    claimed = scheduler.claim_due(now=now, limit=limit or settings.SCHEDULER_BATCH_SIZE)
+    if not claimed:
+        return 0
+
+    due_by_id = dict(claimed)
+    lanes = scheduler.pop_lanes(list(due_by_id))
+    rows = (
+        db.query(Post.id, Post.scheduled_at)
+        .filter(Post.id.in_(list(due_by_id)), Post.status == PostStatus.SCHEDULED)
+        .all()
+    )
+    scheduled = {row.id: row.scheduled_at for row in rows}
+
+    dropped = [post_id for post_id in due_by_id if post_id not in scheduled]
+    if dropped:
+        scheduler.forget(dropped)
+
+    dispatched = 0
+    for post_id, due in claimed:
+        if post_id not in scheduled:
+            continue
+        scheduled_at = scheduled[post_id]
+        lane = lanes.get(post_id)
+        if scheduled_at is not None and abs(to_epoch(scheduled_at) - due) >= 1:
+            scheduler.schedule(post_id, scheduled_at, lane=lane)
+            continue
+        try:
+            task.apply_async(
+                args=[post_id],
+                kwargs={"trace_id": str(uuid.uuid4())},
+                queue=browser_queue(Lane(lane or Lane.SCHEDULED)),
+            )
+            dispatched += 1
+        except Exception as exc:
+            logger.error(f"Failed to enqueue scheduled post {post_id}: {exc}")
+            scheduler.release(post_id, due, lane=lane)
+    return dispatched
+
+
+def fail_missed(
+    scheduler: PublicationScheduler,
+    db,
+    catchup_window: Optional[timedelta] = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Marks scheduled posts older than the catch-up window as failed: they are
+    too stale to publish late, and leaving them scheduled would hide them from
+    their owners forever. Returns the number of posts marked.
+    """
+    window = catchup_window or timedelta(hours=settings.SCHEDULER_CATCHUP_WINDOW_HOURS)
+    cutoff = utc_now_naive() - window
+    failed = 0
+    while True:
+        rows = (
+            db.query(Post.id, Post.user_id, Post.version, Post.scheduled_at)
+            .filter(
+                Post.status == PostStatus.SCHEDULED,
+                Post.scheduled_at.isnot(None),
+                Post.scheduled_at < cutoff,
+            )
+            .order_by(Post.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        missed = []
+        for row in rows:
+            if crud.transition_post_status(db, row.id, PostStatus.FAILED, expected_version=row.version, commit=False):
+                missed.append(row)
+        db.commit()
+        scheduler.cancel_many([row.id for row in rows])
+        for row in missed:
+            logger.warning(f"Post {row.id} missed its slot at {row.scheduled_at}; marked failed")
+            publish_event({
+                "level": "ERROR",
+                "message": f"Post {row.id} missed its scheduled time ({row.scheduled_at.isoformat()}Z) and was not published",
+                "post_id": row.id,
+                "user_id": row.user_id,
+                "status": "missed"
+            })
+        failed += len(missed)
+        if len(rows) < batch_size:
+            break
+    return failed
+
+
+class Dispatcher:
+    def __init__(self, scheduler: PublicationScheduler = publication_scheduler):
+        self.scheduler = scheduler
+        self.poll_interval = settings.SCHEDULER_POLL_INTERVAL_SECONDS
+        self._running = False
+        self._next_reclaim = 0.0
+
+    def recover(self) -> None:
+        """
+        Catches up after a restart: fails posts past the catch-up window,
+        restores missing schedule entries and prunes stale markers.
+        """
+        db = SessionLocal()
+        try:
+            missed = fail_missed(self.scheduler, db)
+            added = self.scheduler.reconcile(db)
+            pruned = self.scheduler.prune_dispatched(db)
+            logger.info(
+                f"Dispatcher recovered {added} scheduled posts, marked {missed} missed, "
+                f"pruned {pruned} dispatch markers"
+            )
+        finally:
+            db.close()
+        self._next_reclaim = time.time() + settings.SCHEDULER_DISPATCH_LEASE_SECONDS
+
+    def reclaim(self) -> int:
+        """
+        Re-queues posts the schedule lost while they stayed scheduled in the
+        database: missing from Redis (an API request failed after the status
+        change, a schedule sync was only logged) or dispatched but never run.
+        """
+        self._next_reclaim = time.time() + settings.SCHEDULER_DISPATCH_LEASE_SECONDS
+        db = SessionLocal()
+        try:
+            restored = self.scheduler.reconcile(db)
+            expired = self.scheduler.reclaim_expired(db)
+        finally:
+            db.close()
+        if restored:
+            logger.warning(f"Re-added {restored} scheduled posts missing from the schedule")
+        if expired:
+            logger.warning(f"Re-queued {expired} scheduled posts whose dispatch lease expired")
+        return restored + expired
+
+    def tick(self) -> int:
+        db = SessionLocal()
+        try:
+            return dispatch_due(self.scheduler, db)
+        finally:
+            db.close()
+
+    def _sleep_seconds(self) -> float:
+        next_due = self.scheduler.next_due()
+        if next_due is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, next_due - time.time()))
+
+    def run(self) -> None:
+        self._running = True
+        self.recover()
+        backoff = self.poll_interval
+        while self._running:
+            try:
+                if time.time() >= self._next_reclaim:
+                    self.reclaim()
+                dispatched = self.tick()
+                if dispatched:
+                    logger.info(f"Dispatched {dispatched} scheduled posts")
+                    # More may already be due; claim the next batch right away.
+                    continue
+                time.sleep(self._sleep_seconds())
+                backoff = self.poll_interval
+            except Exception as exc:
+                logger.error(f"Dispatcher loop error: {exc}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def stop(self, *args) -> None:
+        self._running = False
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    dispatcher = Dispatcher()
+    signal.signal(signal.SIGTERM, dispatcher.stop)
+    signal.signal(signal.SIGINT, dispatcher.stop)
+    dispatcher.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerEventLoop:
+    """
+    A long-lived asyncio loop running on a background thread of the worker process.
+
+    Celery tasks are synchronous; they submit coroutines here instead of creating
+    and closing a loop per task, so browsers, connection pools and async clients
+    bound to this loop survive across tasks for the lifetime of the process.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="worker-event-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            logger.info("Worker event loop started")
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Registers a coroutine function awaited on the loop before it stops."""
+        self._shutdown_hooks.append(hook)
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Runs a coroutine on the worker loop and blocks until it completes."""
+        if not self.running:
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Distinct from the builtin TimeoutError before Python 3.11.
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 30) -> None:
+        with self._lock:
+            if not self.running:
+                return
+            loop, thread = self._loop, self._thread
+
+            async def shutdown() -> None:
+                for hook in self._shutdown_hooks:
+                    try:
+                        await hook()
+                    except Exception as exc:
+                        logger.warning("Worker loop shutdown hook failed: %s", exc)
+
+            try:
+                asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+            except Exception as exc:
+                logger.warning("Worker loop shutdown did not complete: %s", exc)
+
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not loop.is_running():
+                loop.close()
+            self._loop = None
+            self._thread = None
+            logger.info("Worker event loop stopped")
+
+
+worker_loop = WorkerEventLoop()
+
+
+def run_async(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    return worker_loop.run(coro, timeout=timeout)
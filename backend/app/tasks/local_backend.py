@@ -0,0 +1,314 @@
+"""
+In-process job backend for single-node installs (JOB_BACKEND=local).
+
+Tasks keep their Celery surface: `delay()`, `apply_async()` and signatures
+submit here instead of to the broker (see `NovaTask`), and
+`celery_app.AsyncResult(job_id)` reads state through `LocalJobBackend`.
+Jobs run in a bounded thread pool inside the API process; their arguments,
+ETA, state and result live in the `jobs` table, so pending and interrupted
+jobs are picked up again after a restart. Other processes (the dispatcher,
+CLI scripts) submit by inserting rows, which the API's runner polls for.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from celery import states
+from celery.backends.base import BaseBackend
+from celery.exceptions import Ignore, Retry
+from celery.signals import task_postrun, task_prerun
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+
+def _eta_from_options(options: Dict[str, Any]) -> Optional[datetime]:
+    eta = options.get("eta")
+    if isinstance(eta, str):
+        eta = datetime.fromisoformat(eta)
+    if isinstance(eta, datetime):
+        if eta.tzinfo is not None:
+            eta = datetime.utcfromtimestamp(eta.timestamp())
+        return eta
+    countdown = options.get("countdown")
+    if countdown:
+        return datetime.utcnow() + timedelta(seconds=float(countdown))
+    return None
+
+
+class LocalJobBackend(BaseBackend):
+    """Celery result backend over the `jobs` table."""
+
+    def __init__(self, app=None, url=None, **kwargs):
+        super().__init__(app, url=url, **kwargs)
+
+    def _store_result(self, task_id, result, state, traceback=None, request=None, **kwargs):
+        db = SessionLocal()
+        try:
+            job = db.get(Job, task_id)
+            if job is None:
+                job = Job(id=task_id, task_name=getattr(request, "task", None) or "unknown")
+                db.add(job)
+            job.state = state
+            job.result = result
+            job.traceback = traceback
+            job.date_done = datetime.utcnow() if state in states.READY_STATES else None
+            db.commit()
+        finally:
+            db.close()
+        return result
+
+    def _get_task_meta_for(self, task_id):
+        db = SessionLocal()
+        try:
+            job = db.get(Job, task_id)
+            if job is None:
+                return {"task_id": task_id, "status": states.PENDING, "result": None}
+            return self.meta_from_decoded({
+                "task_id": job.id,
+                "status": job.state,
+                "result": job.result,
+                "traceback": job.traceback,
+                "children": [],
+                "date_done": job.date_done,
+            })
+        finally:
+            db.close()
+
+    def _forget(self, task_id):
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == task_id).delete()
+            db.commit()
+        finally:
+            db.close()
+
+
+class LocalJobRunner:
+    """
+    Runs submitted jobs on at most `concurrency` threads. A scheduler thread
+    holds jobs until their ETA and hands them over only when a slot is free,
+    so waiting jobs stay in ETA order instead of piling up in the pool.
+    A poll thread picks up PENDING jobs that other processes wrote to the
+    table; in those processes the runner is never started and `submit`
+    only persists the job.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or settings.LOCAL_JOB_CONCURRENCY
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._active = set()
+        self._queued = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._poll_thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        # Registers the task functions the jobs refer to.
+        import app.tasks.worker  # noqa: F401
+
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="local-job")
+        self._running = True
+        self._thread = threading.Thread(target=self._schedule_loop, name="local-job-scheduler", daemon=True)
+        self._thread.start()
+        recovered = self.recover()
+        self._poll_thread = threading.Thread(target=self._poll_loop, name="local-job-poller", daemon=True)
+        self._poll_thread.start()
+        logger.info(f"Local job runner started with {self.concurrency} slots, {recovered} jobs recovered")
+
+    def stop(self, wait: bool = True) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._poll_thread is not None:
+            self._poll_thread.join(timeout=5)
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        self._executor = None
+        self._thread = None
+        self._poll_thread = None
+
+    def recover(self) -> int:
+        """Re-queues jobs that were waiting or running when the process stopped."""
+        db = SessionLocal()
+        try:
+            rows = db.query(Job.id, Job.eta).filter(Job.state.notin_(list(states.READY_STATES))).all()
+        finally:
+            db.close()
+        for row in rows:
+            self._push(row.id, row.eta)
+        return len(rows)
+
+    def poll(self) -> int:
+        """Queues PENDING jobs submitted by other processes; returns the count picked up."""
+        db = SessionLocal()
+        try:
+            rows = db.query(Job.id, Job.eta).filter(Job.state == states.PENDING).all()
+        finally:
+            db.close()
+        with self._cond:
+            known = self._queued | self._active
+        picked = [row for row in rows if row.id not in known]
+        for row in picked:
+            self._push(row.id, row.eta)
+        return len(picked)
+
+    def _poll_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: not self._running, timeout=settings.LOCAL_JOB_POLL_INTERVAL_SECONDS)
+                if not self._running:
+                    return
+            try:
+                picked = self.poll()
+                if picked:
+                    logger.info(f"Local job runner picked up {picked} jobs submitted elsewhere")
+            except Exception as exc:
+                logger.error(f"Local job poll failed: {exc}")
+
+    def submit(self, task_name: str, args=None, kwargs=None, task_id: Optional[str] = None, **options) -> str:
+        """
+        Persists the call and schedules it. Re-submitting an existing job id
+        (retries, rate-limit deferrals, a rescheduled post) updates its
+        arguments and ETA but keeps the state the task last reported; a
+        finished job submitted again starts over as PENDING.
+        """
+        job_id = task_id or str(uuid.uuid4())
+        eta = _eta_from_options(options)
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            if job is None:
+                job = Job(id=job_id, task_name=task_name, state=states.PENDING)
+                db.add(job)
+            elif job.state in states.READY_STATES:
+                job.state, job.result, job.traceback, job.date_done, job.retries = states.PENDING, None, None, None, 0
+            job.task_name = task_name
+            job.args = list(args or [])
+            job.kwargs = dict(kwargs or {})
+            job.queue = options.get("queue") or job.queue
+            job.retries = options.get("retries", job.retries or 0)
+            job.eta = eta
+            db.commit()
+        finally:
+            db.close()
+        if self._running:
+            self._push(job_id, eta)
+        else:
+            # Not the API process: its runner's poll thread will pick the job up.
+            logger.debug(f"Persisted job {job_id} for the API's local job runner")
+        return job_id
+
+    def _push(self, job_id: str, eta: Optional[datetime]) -> None:
+        due = (eta - datetime.utcnow()).total_seconds() if eta else 0.0
+        with self._cond:
+            heapq.heappush(self._heap, (max(0.0, due) + time.monotonic(), next(self._seq), job_id))
+            self._queued.add(job_id)
+            self._cond.notify_all()
+
+    def _schedule_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+                _, _, job_id = heapq.heappop(self._heap)
+            self._slots.acquire()
+            try:
+                self._executor.submit(self._execute, job_id)
+            except RuntimeError:
+                # Executor shut down while a job was being handed over.
+                self._slots.release()
+                return
+
+    def _execute(self, job_id: str) -> None:
+        with self._cond:
+            # A job queued twice (recovery, re-submission) never runs concurrently with itself.
+            duplicate = job_id in self._active
+            self._active.add(job_id)
+            # Dropped from the queued set only once active, so a poll never sees it in neither.
+            self._queued.discard(job_id)
+        try:
+            if not duplicate:
+                self.run_job(job_id)
+        except Exception as exc:
+            logger.error(f"Local job {job_id} crashed the runner: {exc}")
+        finally:
+            if not duplicate:
+                with self._cond:
+                    self._active.discard(job_id)
+            self._slots.release()
+
+    def run_job(self, job_id: str) -> None:
+        from app.core.celery_app import celery_app
+
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            if job is None or job.state in states.READY_STATES:
+                return
+            if job.eta and job.eta > datetime.utcnow() + timedelta(seconds=1):
+                # Superseded by a later re-submission; that one is in the heap.
+                return
+            task_name, args, kwargs = job.task_name, list(job.args or []), dict(job.kwargs or {})
+            retries, queue = job.retries or 0, job.queue
+            enqueued_at = (job.updated_at or job.created_at or datetime.utcnow()).timestamp()
+        finally:
+            db.close()
+
+        task = celery_app.tasks[task_name]
+        task.push_request(
+            id=job_id,
+            task=task_name,
+            args=args,
+            kwargs=kwargs,
+            retries=retries,
+            called_directly=False,
+            is_eager=False,
+            enqueued_at=enqueued_at,
+            delivery_info={"exchange": "", "routing_key": queue},
+        )
+        task_prerun.send(sender=task, task_id=job_id, task=task, args=args, kwargs=kwargs)
+        retval = None
+        state = states.SUCCESS
+        try:
+            retval = task.run(*args, **kwargs)
+            task.backend.mark_as_done(job_id, retval, request=task.request)
+        except (Retry, Ignore):
+            # Already re-submitted (retry, deferral); the task reported its own state.
+            state = states.RETRY
+        except Exception as exc:
+            state = states.FAILURE
+            logger.error(f"Local job {task_name}[{job_id}] failed: {exc}")
+            task.backend.mark_as_failure(job_id, exc, request=task.request)
+        finally:
+            task_postrun.send(
+                sender=task, task_id=job_id, task=task, args=args, kwargs=kwargs, retval=retval, state=state
+            )
+            task.pop_request()
+
+
+local_jobs = LocalJobRunner()
@@ -0,0 +1,169 @@
+"""
+Outbox relay.
+
+Workers stage automation events in the `event_outbox` table in the same
+transaction as the post and audit changes they describe (`OutboxService.add`).
+The relay publishes those rows to the event bus in batches and marks them
+delivered, so an event goes out if and only if its change was committed.
+
+Each API process runs a relay thread by default (`OUTBOX_RELAY_IN_API`);
+it can also run on its own, and several relays can share the table on
+PostgreSQL:
+
+    python -m app.tasks.outbox_relay
+
+SQLite has no SKIP LOCKED, so there only the relay holding a Redis lease
+publishes (see `needs_lease`).
+"""
+import logging
+import signal
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.db import SessionLocal, engine
+from app.core.event_bus import EVENT_BACKEND_MEMORY, event_backend, publish_events_now, redis_pool
+from app.services.outbox_service import OutboxService
+
+logger = logging.getLogger(__name__)
+
+# Seconds between purges of delivered rows.
+PURGE_INTERVAL_SECONDS = 600
+
+# Dialects where `claim_pending`'s FOR UPDATE SKIP LOCKED lets relays share the table.
+SKIP_LOCKED_DIALECTS = {"postgresql", "mysql", "mariadb", "oracle"}
+RELAY_LEASE_KEY = "novapilot:outbox:relay_lease"
+RELAY_LEASE_SECONDS = 10
+
+# Takes the lease for ARGV[1] if it is free, or renews it if ARGV[1] holds it.
+LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+
+def needs_lease() -> bool:
+    """
+    Without SKIP LOCKED (SQLite) every relay would claim and publish every
+    row, e.g. one per `uvicorn --workers` process. The in-process event bus
+    needs no lease: it only works with a single API process.
+    """
+    return engine.dialect.name not in SKIP_LOCKED_DIALECTS and event_backend() != EVENT_BACKEND_MEMORY
+
+
+def relay_pending(db, limit: Optional[int] = None) -> int:
+    """
+    Publishes up to `limit` undelivered events, oldest first, and marks them
+    delivered. If publishing fails nothing is marked and the rows are retried
+    on the next pass. Returns the number of events published.
+    """
+    rows = OutboxService.claim_pending(db, limit or settings.OUTBOX_BATCH_SIZE)
+    if not rows:
+        db.rollback()
+        return 0
+    try:
+        publish_events_now([(row.channel, row.payload) for row in rows])
+    except Exception:
+        db.rollback()
+        raise
+    OutboxService.mark_delivered(db, rows)
+    return len(rows)
+
+
+class OutboxRelay:
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.poll_interval = settings.OUTBOX_POLL_INTERVAL_MS / 1000
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_purge = 0.0
+        self._client = client
+        self._lease = None
+        self._token = uuid.uuid4().hex
+        self._has_lease = False
+        self._lease_checked_at = float("-inf")
+
+    def holds_lease(self) -> bool:
+        """Takes or renews the single-relay lease, at most every third of its TTL."""
+        now = time.monotonic()
+        if now - self._lease_checked_at < RELAY_LEASE_SECONDS / 3:
+            return self._has_lease
+        self._lease_checked_at = now
+        try:
+            if self._lease is None:
+                client = self._client or redis.Redis(connection_pool=redis_pool())
+                self._lease = client.register_script(LEASE_SCRIPT)
+            has_lease = bool(self._lease(keys=[RELAY_LEASE_KEY], args=[self._token, RELAY_LEASE_SECONDS * 1000]))
+        except redis.RedisError as exc:
+            logger.warning(f"Outbox relay lease unavailable: {exc}")
+            has_lease = False
+        if has_lease != self._has_lease:
+            logger.info(f"Outbox relay {'took' if has_lease else 'lost'} the relay lease")
+        self._has_lease = has_lease
+        return has_lease
+
+    def tick(self) -> int:
+        if needs_lease() and not self.holds_lease():
+            return 0
+        db = SessionLocal()
+        try:
+            relayed = relay_pending(db)
+            if time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.monotonic()
+                OutboxService.purge_delivered(db, timedelta(hours=settings.OUTBOX_RETENTION_HOURS))
+            return relayed
+        finally:
+            db.close()
+
+    def run(self) -> None:
+        self._running = True
+        backoff = self.poll_interval
+        while self._running:
+            try:
+                if self.tick() >= settings.OUTBOX_BATCH_SIZE:
+                    # A full batch: more are probably waiting.
+                    continue
+                time.sleep(self.poll_interval)
+                backoff = self.poll_interval
+            except Exception as exc:
+                logger.error(f"Outbox relay error: {exc}")
+                time.sleep(backoff)
+                backoff = min(max(backoff, 0.5) * 2, 30)
+
+    def start(self) -> None:
+        """Runs the relay on a daemon thread of the current process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run, name="outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self, *args) -> None:
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+
+outbox_relay = OutboxRelay()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    relay = OutboxRelay()
+    signal.signal(signal.SIGTERM, relay.stop)
+    signal.signal(signal.SIGINT, relay.stop)
+    relay.run()
+
+
+if __name__ == "__main__":
+    main()
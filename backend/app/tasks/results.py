@@ -0,0 +1,46 @@
+from typing import Any, Dict, Optional
+
+# Task results and progress meta live in the Redis result backend, so they stay
+# small: status, ids, error code and counters. Step traces go to the audit log
+# and are referenced by `audit_log_id`.
+MAX_ERROR_LENGTH = 500
+
+
+def compact_error(error: Any) -> Optional[str]:
+    if error is None:
+        return None
+    text = str(error)
+    if len(text) <= MAX_ERROR_LENGTH:
+        return text
+    return text[: MAX_ERROR_LENGTH - 3] + "..."
+
+
+def error_code_value(error_code: Any) -> Optional[str]:
+    if not error_code:
+        return None
+    return str(getattr(error_code, "value", error_code))
+
+
+def step_counters(results: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    steps = (results or {}).get("steps") or []
+    failed = sum(1 for step in steps if step.get("status") == "failed")
+    return {"steps_total": len(steps), "steps_failed": failed}
+
+
+def result_envelope(
+    status: str,
+    trace_id: Optional[str] = None,
+    audit_log_id: Optional[int] = None,
+    error: Any = None,
+    error_code: Any = None,
+    **fields: Any,
+) -> Dict[str, Any]:
+    envelope = {
+        "status": status,
+        "trace_id": trace_id,
+        "audit_log_id": audit_log_id,
+        "error": compact_error(error),
+        "error_code": error_code_value(error_code),
+    }
+    envelope.update(fields)
+    return envelope
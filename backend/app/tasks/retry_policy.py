@@ -0,0 +1,214 @@
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.models.error_codes import ErrorCode
+
+logger = logging.getLogger(__name__)
+
+RETRY_BUDGET_KEY_PREFIX = "novapilot:retry_budget"
+RETRY_AFTER_PATTERN = re.compile(r"retry[- _]after\D{0,5}(\d+(?:\.\d+)?)", re.IGNORECASE)
+# Headroom between the longest countdown and the broker visibility timeout.
+COUNTDOWN_MARGIN_SECONDS = 300
+
+# Reserves one retry in the newest bucket only if the window is within budget.
+# Reading and incrementing in one script keeps concurrent workers from both
+# spending the last retry.
+# KEYS: window buckets, newest first. ARGV: ratio, min retries, bucket ttl.
+SPEND_RETRY_SCRIPT = """
+local attempts = 0
+local retries = 0
+for _, key in ipairs(KEYS) do
+    local counts = redis.call('HMGET', key, 'attempts', 'retries')
+    attempts = attempts + (tonumber(counts[1]) or 0)
+    retries = retries + (tonumber(counts[2]) or 0)
+end
+local allowed = math.max(tonumber(ARGV[2]), math.floor(attempts * tonumber(ARGV[1])))
+if retries >= allowed then
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'retries', 1)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class RetryRule:
+    """
+    How to retry one class of failure.
+
+    strategy:
+      - "none": fail immediately
+      - "retry_after": wait what the platform asked for, else `base`
+      - "decorrelated_jitter": random delay in [base, 3 * previous], capped
+      - "exponential_jitter": random delay in [0, base * 2**n], capped
+    """
+    strategy: str
+    max_retries: int = 0
+    base: float = 60
+    cap: float = 3600
+
+
+NO_RETRY = RetryRule("none")
+
+RETRY_RULES: Dict[ErrorCode, RetryRule] = {
+    ErrorCode.AUTH_FAILED: NO_RETRY,
+    ErrorCode.UNAUTHORIZED: NO_RETRY,
+    ErrorCode.VALIDATION_ERROR: NO_RETRY,
+    ErrorCode.RATE_LIMITED: RetryRule("retry_after", max_retries=3, base=900, cap=6 * 3600),
+    ErrorCode.TIMEOUT: RetryRule("decorrelated_jitter", max_retries=5, base=30, cap=900),
+    ErrorCode.BROWSER_CRASH: RetryRule("decorrelated_jitter", max_retries=3, base=10, cap=300),
+    ErrorCode.SELECTOR_NOT_FOUND: RetryRule("decorrelated_jitter", max_retries=1, base=60, cap=300),
+    ErrorCode.INVALID_JSON_RESPONSE: RetryRule("decorrelated_jitter", max_retries=2, base=5, cap=120),
+    ErrorCode.SYSTEM_ERROR: RetryRule("exponential_jitter", max_retries=5, base=60, cap=3600),
+}
+
+
+@dataclass(frozen=True)
+class RetryDecision:
+    retry: bool
+    delay: float = 0
+    reason: str = ""
+
+
+def classify_error(exc: Exception, results: Optional[Dict[str, Any]] = None) -> ErrorCode:
+    """Prefers the executor's structured error code, falling back to the message."""
+    reported = (results or {}).get("error_code")
+    if reported:
+        try:
+            return ErrorCode(getattr(reported, "value", reported))
+        except ValueError:
+            pass
+
+    error_msg = str(exc).lower()
+    if "timeout" in error_msg or "timed out" in error_msg:
+        return ErrorCode.TIMEOUT
+    if "auth" in error_msg or "login" in error_msg:
+        return ErrorCode.AUTH_FAILED
+    if "rate" in error_msg or "limit" in error_msg or "429" in error_msg:
+        return ErrorCode.RATE_LIMITED
+    return ErrorCode.SYSTEM_ERROR
+
+
+def parse_retry_after(exc: Exception, results: Optional[Dict[str, Any]] = None) -> Optional[float]:
+    value = (results or {}).get("retry_after")
+    if value is not None:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+    match = RETRY_AFTER_PATTERN.search(str(exc))
+    return float(match.group(1)) if match else None
+
+
+def compute_delay(
+    rule: RetryRule,
+    retries: int,
+    previous_delay: Optional[float] = None,
+    retry_after: Optional[float] = None,
+) -> float:
+    if rule.strategy == "retry_after":
+        return min(rule.cap, retry_after if retry_after is not None else rule.base)
+    if rule.strategy == "decorrelated_jitter":
+        previous = previous_delay or rule.base
+        return min(rule.cap, random.uniform(rule.base, previous * 3))
+    return random.uniform(0, min(rule.cap, rule.base * (2 ** retries)))
+
+
+def max_countdown() -> float:
+    """
+    Longest countdown that may be handed to the broker. With acks_late, Redis
+    redelivers any message still unacknowledged after the visibility timeout,
+    and a countdown/ETA message is held unacknowledged until it runs.
+    """
+    return max(1.0, settings.CELERY_VISIBILITY_TIMEOUT_SECONDS - COUNTDOWN_MARGIN_SECONDS)
+
+
+def countdown_for(delay: float) -> float:
+    """Caps a delay to a safe countdown; longer waits hop via `not_before`."""
+    return min(delay, max_countdown())
+
+
+class RetryBudget:
+    """
+    Caps retries per queue to a share of the tasks that queue has executed in
+    a sliding window, so a failure wave cannot fill the workers with retries.
+    Counters live in Redis in one-minute buckets.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+        self._spend = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+        return self._client
+
+    def _bucket_key(self, queue: str, minute: int) -> str:
+        return f"{RETRY_BUDGET_KEY_PREFIX}:{queue}:{minute}"
+
+    def _window_keys(self, queue: str):
+        minute = int(time.time() // 60)
+        minutes = max(1, settings.RETRY_BUDGET_WINDOW_SECONDS // 60)
+        return [self._bucket_key(queue, minute - offset) for offset in range(minutes)]
+
+    def record_attempt(self, queue: str) -> None:
+        key = self._window_keys(queue)[0]
+        try:
+            pipe = self.client.pipeline()
+            pipe.hincrby(key, "attempts", 1)
+            pipe.expire(key, settings.RETRY_BUDGET_WINDOW_SECONDS + 60)
+            pipe.execute()
+        except redis.RedisError as exc:
+            logger.debug(f"Failed to record task attempt for {queue}: {exc}")
+
+    def try_spend(self, queue: str) -> bool:
+        """Atomically reserves one retry if the queue is within budget."""
+        try:
+            if self._spend is None:
+                self._spend = self.client.register_script(SPEND_RETRY_SCRIPT)
+            spent = self._spend(
+                keys=self._window_keys(queue),
+                args=[
+                    settings.RETRY_BUDGET_RATIO,
+                    settings.RETRY_BUDGET_MIN_RETRIES,
+                    settings.RETRY_BUDGET_WINDOW_SECONDS + 60,
+                ],
+            )
+            return bool(spent)
+        except redis.RedisError as exc:
+            # Without Redis there is no broker either; don't add a second failure mode.
+            logger.warning(f"Retry budget unavailable for {queue}, allowing retry: {exc}")
+            return True
+
+
+retry_budget = RetryBudget()
+
+
+def decide_retry(
+    error_code: ErrorCode,
+    retries: int,
+    queue: str,
+    previous_delay: Optional[float] = None,
+    retry_after: Optional[float] = None,
+    budget: Optional[RetryBudget] = retry_budget,
+) -> RetryDecision:
+    """`budget=None` retries without a budget (the local job backend has no Redis)."""
+    rule = RETRY_RULES.get(error_code, RETRY_RULES[ErrorCode.SYSTEM_ERROR])
+    if rule.strategy == "none":
+        return RetryDecision(False, reason=f"{error_code.value} is not retryable")
+    if retries >= rule.max_retries:
+        return RetryDecision(False, reason=f"Retry limit reached for {error_code.value}")
+    if budget is not None and not budget.try_spend(queue):
+        return RetryDecision(False, reason=f"Retry budget exhausted for queue {queue}")
+    delay = compute_delay(rule, retries, previous_delay=previous_delay, retry_after=retry_after)
+    return RetryDecision(True, delay=round(delay, 1))
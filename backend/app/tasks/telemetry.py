@@ -0,0 +1,150 @@
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+from celery.signals import before_task_publish, task_postrun, task_prerun
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TASK_METRICS_KEY_PREFIX = "novapilot:metrics:tasks"
+ENQUEUED_AT_HEADER = "enqueued_at"
+SAMPLE_LIMIT = 1000
+# kombu's Redis transport keeps one list per priority step next to the plain queue list.
+PRIORITY_SEPARATOR = "\x06\x16"
+PRIORITY_STEPS = (3, 6, 9)
+
+_client: Optional[redis.Redis] = None
+_started_at: Dict[str, float] = {}
+
+
+def _redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+    return _client
+
+
+def _samples_key(queue: str, kind: str) -> str:
+    return f"{TASK_METRICS_KEY_PREFIX}:{queue}:{kind}"
+
+
+def _queue_of(task) -> str:
+    return (task.request.delivery_info or {}).get("routing_key") or "unknown"
+
+
+def _eta_timestamp(eta: Any) -> Optional[float]:
+    if not eta:
+        return None
+    try:
+        return datetime.fromisoformat(str(eta)).timestamp()
+    except ValueError:
+        return None
+
+
+def _record(queue: str, kind: str, seconds: float) -> None:
+    try:
+        pipe = _redis().pipeline()
+        pipe.lpush(_samples_key(queue, kind), round(seconds * 1000))
+        pipe.ltrim(_samples_key(queue, kind), 0, SAMPLE_LIMIT - 1)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.debug(f"Failed to record {kind} time for {queue}: {exc}")
+
+
+def _recording() -> bool:
+    # The local job backend runs without Redis, so there is nowhere to record to.
+    from app.core.celery_app import local_jobs_enabled
+
+    return not local_jobs_enabled()
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """Stamps every published message, including retries and deferrals."""
+    if headers is not None:
+        headers[ENQUEUED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def record_wait_time(task_id=None, task=None, **kwargs):
+    if task is None or task_id is None or not _recording():
+        return
+    now = time.time()
+    _started_at[task_id] = now
+    enqueued_at = task.request.get(ENQUEUED_AT_HEADER)
+    if enqueued_at is None:
+        return
+    # Countdown/ETA tasks only start waiting once they are due.
+    ready_at = max(float(enqueued_at), _eta_timestamp(task.request.get("eta")) or 0)
+    _record(_queue_of(task), "wait", max(0.0, now - ready_at))
+
+
+@task_postrun.connect
+def record_run_time(task_id=None, task=None, **kwargs):
+    started_at = _started_at.pop(task_id, None)
+    if task is None or started_at is None:
+        return
+    _record(_queue_of(task), "run", time.time() - started_at)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _oldest_enqueued_at(raw: Optional[bytes]) -> Optional[float]:
+    if not raw:
+        return None
+    try:
+        return float(json.loads(raw)["headers"][ENQUEUED_AT_HEADER])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def read_queue_metrics(queues: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per queue: depth (LLEN), age of the oldest waiting message (LINDEX on the
+    consuming end) and p50/p95 of the last SAMPLE_LIMIT wait and run times.
+    All of it is one pipelined round trip with O(1) work per queue list.
+    """
+    queues = list(queues)
+    client = _redis()
+    pipe = client.pipeline()
+    for queue in queues:
+        for name in [queue] + [f"{queue}{PRIORITY_SEPARATOR}{step}" for step in PRIORITY_STEPS]:
+            pipe.llen(name)
+            # kombu LPUSHes and workers BRPOP, so the oldest message is last.
+            pipe.lindex(name, -1)
+        pipe.lrange(_samples_key(queue, "wait"), 0, -1)
+        pipe.lrange(_samples_key(queue, "run"), 0, -1)
+    replies = iter(pipe.execute())
+
+    now = time.time()
+    metrics = {}
+    for queue in queues:
+        depth = 0
+        oldest = None
+        for _ in range(1 + len(PRIORITY_STEPS)):
+            depth += next(replies)
+            enqueued_at = _oldest_enqueued_at(next(replies))
+            if enqueued_at is not None:
+                oldest = enqueued_at if oldest is None else min(oldest, enqueued_at)
+        waits = sorted(int(value) / 1000 for value in next(replies))
+        runs = sorted(int(value) / 1000 for value in next(replies))
+        metrics[queue] = {
+            "depth": depth,
+            "oldest_age_seconds": round(now - oldest, 3) if oldest is not None else None,
+            "wait_p50_seconds": percentile(waits, 0.5),
+            "wait_p95_seconds": percentile(waits, 0.95),
+            "run_p50_seconds": percentile(runs, 0.5),
+            "run_p95_seconds": percentile(runs, 0.95),
+            "samples": len(runs),
+        }
+    return metrics
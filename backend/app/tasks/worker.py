@@ -1,45 +1,167 @@
-from celery import Celery
-from app.core.config import settings
-import asyncio
+from celery.exceptions import Ignore, TaskPredicate
+from celery.signals import task_prerun, worker_process_init, worker_process_shutdown
+from app.core.celery_app import QUEUE_BROWSER, celery_app, local_jobs_enabled
 import logging
-from app.api import crud
+from app.api import crud, crud_account
 from app.services.ai_service import ai_service
 from app.services.audit_service import AuditService
+from app.services.dead_letter_service import DeadLetterService
+from app.services.outbox_service import OutboxService
+from app.services.idempotency_service import (
+    IdempotencyService,
+    SCOPE_PUBLICATION,
+    STATUS_FAILED,
+    STATUS_SUCCEEDED,
+)
 from app.core.db import SessionLocal
-from app.schemas.post import PostUpdate
 from app.models.error_codes import ErrorCode
+from app.models.post import PostStatus
+import time
 import uuid
-from datetime import datetime
-from app.core.event_bus import publish_event
+from datetime import datetime, timedelta
+from app.core.event_bus import event_publisher, publish_event
+from app.services.rate_limiter import publish_rate_limiter
+from app.tasks.event_loop import run_async, worker_loop
+from app.tasks.results import compact_error, error_code_value, result_envelope, step_counters
+from app.tasks.retry_policy import classify_error, countdown_for, decide_retry, parse_retry_after, retry_budget
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
-celery_app = Celery(
-    "nova_tasks",
-    broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
-)
-
-celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
-    timezone='UTC',
-    enable_utc=True,
-    worker_concurrency=4
-)
 
 # Service is used via ai_service singleton
 
+
+@worker_process_init.connect
+def start_worker_loop(**kwargs):
+    """Start one long-lived event loop per worker process (after fork)."""
+    worker_loop.add_shutdown_hook(ai_service.shutdown)
+    worker_loop.start()
+
+
+@worker_process_shutdown.connect
+def stop_worker_loop(**kwargs):
+    worker_loop.stop()
+    # Child processes may exit without running atexit hooks.
+    event_publisher.close()
+
+
+def _task_queue(task) -> str:
+    return (task.request.delivery_info or {}).get("routing_key") or QUEUE_BROWSER
+
+
+@task_prerun.connect
+def record_task_attempt(task=None, **kwargs):
+    """
+    Counts executions per queue; the retry budget is a share of these. The
+    local job backend has no Redis and no retry budget.
+    """
+    if task is not None and not local_jobs_enabled():
+        retry_budget.record_attempt(_task_queue(task))
+
+
+def dead_letter(task, db, post, error, error_code, trace_id: str, audit_log_id: int = None, **context) -> None:
+    """Records a publication that will not be retried, with what it takes to replay it."""
+    snapshot = {"task_id": task.request.id, **context}
+    if post is not None:
+        snapshot.update({
+            "content": post.content,
+            "media_url": post.media_url,
+            "scheduled_at": post.scheduled_at.isoformat() if post.scheduled_at else None,
+        })
+    letter = DeadLetterService.record(
+        db,
+        task_name=task.name,
+        args=task.request.args,
+        kwargs=task.request.kwargs,
+        queue=_task_queue(task),
+        post_id=post.id if post is not None else None,
+        user_id=post.user_id if post is not None else None,
+        platform=post.platform.value if post is not None else None,
+        error=error,
+        error_code=error_code,
+        trace_id=trace_id,
+        audit_log_id=audit_log_id,
+        retry_count=task.request.retries or 0,
+        context=snapshot,
+    )
+    if letter is not None:
+        logger.info(f"Dead-lettered {task.name} for post {letter.post_id} as #{letter.id}")
+
+
+def defer_until_rate_allows(
+    task,
+    platform: str,
+    account_keys: list,
+    trace_id: str,
+    post_id: int,
+    user_id: int = None,
+    db=None,
+    claim_keys: list = (),
+) -> None:
+    """
+    Takes a publishing token for every account, or re-enqueues the task for
+    the moment the next token frees up. The deferred run keeps its task id
+    and does not count against the task's error retries; its idempotency
+    claims are renewed so no other task takes them over meanwhile.
+    """
+    wait = publish_rate_limiter.acquire(platform, account_keys)
+    if wait <= 0:
+        return
+    if db is not None:
+        IdempotencyService.renew(db, claim_keys, task.request.id, timedelta(seconds=wait))
+
+    logger.info(f"Post {post_id} deferred {wait:.1f}s by {platform} publish rate limit")
+    task.update_state(
+        state="DEFERRED",
+        meta={
+            "trace_id": trace_id,
+            "post_id": post_id,
+            "platform": platform,
+            "deferred_seconds": wait
+        }
+    )
+    publish_event({
+        "level": "INFO",
+        "message": f"Post {post_id} deferred {wait:.0f}s by {platform} rate limit",
+        "trace_id": trace_id,
+        "task_id": task.request.id,
+        "post_id": post_id,
+        "user_id": user_id,
+        "status": "deferred",
+        "deferred_seconds": wait
+    })
+    task.signature_from_request().apply_async(countdown=countdown_for(wait))
+    raise Ignore()
+
+
+def defer_until_not_before(task, not_before: float = None) -> None:
+    """
+    Re-enqueues a retry that woke up early because its delay was longer than
+    the broker allows for a countdown; it hops until `not_before` has passed.
+    """
+    remaining = (not_before or 0) - time.time()
+    if remaining <= 1:
+        return
+    task.signature_from_request().apply_async(countdown=countdown_for(remaining))
+    raise Ignore()
+
+
 @celery_app.task(bind=True, max_retries=5)
-def execute_post_publication(self, post_id: int, trace_id: str = None):
+def execute_post_publication(
+    self, post_id: int, trace_id: str = None, retry_delay: float = None, not_before: float = None
+):
     db = SessionLocal()
+    post = None
+    user_id = None
     audit_log = None
+    results = None
+    publication_key = None
     current_trace_id = trace_id or str(uuid.uuid4())
     task_id = self.request.id
 
     try:
+        defer_until_not_before(self, not_before)
         post = crud.get_post(db, post_id)
         if not post:
             logger.error(f"Post {post_id} not found")
@@ -51,9 +173,63 @@ def execute_post_publication(self, post_id: int, trace_id: str = None):
                 "post_id": post_id
             })
             return {"status": "failed", "error": f"Post {post_id} not found", "trace_id": current_trace_id}
+        post_version = post.version
+        user_id = post.user_id
 
-        # Update status to running
-        crud.update_post(db, post_id=post_id, post_in=PostUpdate(status="running"))
+        # Single-account publishing runs as the user's session for the platform.
+        account_key = f"user:{post.user_id}"
+        publication_key = IdempotencyService.publication_key(
+            post_id, IdempotencyService.content_hash(post.content, post.media_url), account_key
+        )
+        claim = IdempotencyService.claim(db, publication_key, SCOPE_PUBLICATION, task_id, post_id=post_id)
+        if not claim.acquired:
+            logger.info(f"Post {post_id} already {claim.status} by task {claim.task_id}; skipping duplicate")
+            publish_event({
+                "level": "INFO",
+                "message": f"Skipped duplicate publication of post {post_id} ({claim.status})",
+                "trace_id": current_trace_id,
+                "task_id": task_id,
+                "post_id": post_id,
+                "user_id": user_id,
+                "status": "duplicate"
+            })
+            prior = claim.result or {"status": claim.status}
+            return {**prior, "post_id": post_id, "duplicate_of": claim.task_id}
+
+        defer_until_rate_allows(
+            self, post.platform.value, [account_key], current_trace_id, post_id, user_id,
+            db=db, claim_keys=[publication_key]
+        )
+
+        # Compare-and-set: bail out if the post was cancelled, published or
+        # picked up by another worker since it was loaded.
+        running = crud.transition_post_status(
+            db, post_id, PostStatus.RUNNING, expected_version=post_version, commit=False
+        )
+        if running is not None:
+            OutboxService.add(db, {
+                "level": "INFO",
+                "message": f"Started publishing post {post_id}",
+                "trace_id": current_trace_id,
+                "task_id": task_id,
+                "post_id": post_id,
+                "user_id": user_id,
+                "platform": str(post.platform),
+                "status": "running"
+            })
+        db.commit()
+        if running is None:
+            current = crud.get_post(db, post_id)
+            current_status = current.status.value if current else "deleted"
+            logger.info(f"Post {post_id} is {current_status}; not publishing")
+            outcome = {
+                "status": "skipped",
+                "post_id": post_id,
+                "trace_id": current_trace_id,
+                "error": f"Post is {current_status}"
+            }
+            IdempotencyService.complete(db, publication_key, STATUS_FAILED, result=outcome)
+            return outcome
         self.update_state(
             state="RUNNING",
             meta={
@@ -63,15 +239,6 @@ def execute_post_publication(self, post_id: int, trace_id: str = None):
                 "platform": str(post.platform)
             }
         )
-        publish_event({
-            "level": "INFO",
-            "message": f"Started publishing post {post_id}",
-            "trace_id": current_trace_id,
-            "task_id": task_id,
-            "post_id": post_id,
-            "platform": str(post.platform),
-            "status": "running"
-        })
 
         # Create initial audit log
         audit_payload = {
@@ -90,11 +257,7 @@ def execute_post_publication(self, post_id: int, trace_id: str = None):
         )
 
         try:
-            # Run Async Nova Act Service
-            # We need a fresh loop for each task in Celery worker
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
+            # Run Async Nova Act Service on the process-wide worker loop
             goal = f"Publish content to {post.platform.value}"
             context = {
                 "content": post.content, 
@@ -102,71 +265,75 @@ def execute_post_publication(self, post_id: int, trace_id: str = None):
                 "post_id": post_id
             }
 
-            try:
-                results = loop.run_until_complete(ai_service.run_automation(goal, context))
-            finally:
-                loop.close()
+            results = run_async(ai_service.run_automation(goal, context))
 
             if results["status"] == "success":
-                crud.update_post(
-                    db,
-                    post_id=post_id,
-                    post_in=PostUpdate(status="published", published_at=datetime.utcnow())
+                # Post, audit log and event commit together.
+                crud.transition_post_status(
+                    db, post_id, PostStatus.PUBLISHED, published_at=datetime.utcnow(), commit=False
                 )
-                AuditService.update_audit_log(db, audit_log.id, status="SUCCESS", result=results)
-                publish_event({
+                AuditService.update_audit_log(db, audit_log.id, status="SUCCESS", result=results, commit=False)
+                OutboxService.add(db, {
                     "level": "INFO",
                     "message": f"Published post {post_id} successfully",
                     "trace_id": current_trace_id,
                     "task_id": task_id,
                     "post_id": post_id,
+                    "user_id": user_id,
                     "status": "success"
                 })
-                return {
-                    "status": "success",
-                    "post_id": post_id,
-                    "trace_id": current_trace_id,
-                    "retry_count": self.request.retries
-                }
+                db.commit()
+                outcome = result_envelope(
+                    "success",
+                    trace_id=current_trace_id,
+                    audit_log_id=audit_log.id,
+                    post_id=post_id,
+                    retry_count=self.request.retries,
+                    **step_counters(results)
+                )
+                IdempotencyService.complete(db, publication_key, STATUS_SUCCEEDED, result=outcome)
+                return outcome
             else:
+                # Keep executed steps and the planner/executor error code as evidence.
+                AuditService.update_audit_log(db, audit_log.id, status="FAILED", result=results)
                 raise Exception(f"Nova Act execution failed: {results.get('error')}")
 
         except Exception as e:
             logger.error(f"Execution Error: {e}")
-            crud.update_post(db, post_id=post_id, post_in=PostUpdate(status="failed"))
-            
-            # Categorize error
-            error_code = ErrorCode.SYSTEM_ERROR
-            error_msg = str(e).lower()
-            if "timeout" in error_msg:
-                error_code = ErrorCode.TIMEOUT
-            elif "auth" in error_msg or "login" in error_msg:
-                error_code = ErrorCode.AUTH_FAILED
-            elif "rate" in error_msg or "limit" in error_msg:
-                error_code = ErrorCode.RATE_LIMITED
+            error_code = classify_error(e, results)
 
+            crud.transition_post_status(db, post_id, PostStatus.FAILED, commit=False)
             if audit_log:
                 AuditService.update_audit_log(
                     db,
                     audit_log.id,
                     status="FAILED",
                     error=str(e),
-                    error_code=error_code.value
+                    error_code=error_code.value,
+                    commit=False
                 )
-
-            publish_event({
+            OutboxService.add(db, {
                 "level": "ERROR",
                 "message": f"Post {post_id} failed: {str(e)}",
                 "trace_id": current_trace_id,
                 "task_id": task_id,
                 "post_id": post_id,
+                "user_id": user_id,
                 "status": "failed",
                 "error_code": error_code.value
             })
+            db.commit()
 
-            if self.request.retries < self.max_retries:
+            decision = decide_retry(
+                error_code,
+                self.request.retries,
+                _task_queue(self),
+                previous_delay=retry_delay,
+                retry_after=parse_retry_after(e, results),
+                budget=None if local_jobs_enabled() else retry_budget
+            )
+            if decision.retry:
                 retry_count = self.request.retries + 1
-                countdown = 60 * (2 ** self.request.retries)
                 self.update_state(
                     state="RETRY",
                     meta={
@@ -174,50 +341,93 @@ def execute_post_publication(self, post_id: int, trace_id: str = None):
                         "trace_id": current_trace_id,
                         "post_id": post_id,
                         "error_code": error_code.value,
-                        "error": str(e)
+                        "error": compact_error(e),
+                        "audit_log_id": audit_log.id if audit_log else None,
+                        "retry_in_seconds": decision.delay
                     }
                 )
-                publish_event({
+                # Through the outbox as well, so it cannot overtake the failure event.
+                OutboxService.add(db, {
                     "level": "WARNING",
-                    "message": f"Retrying post {post_id} (attempt {retry_count})",
+                    "message": f"Retrying post {post_id} in {decision.delay:.0f}s (attempt {retry_count})",
                     "trace_id": current_trace_id,
                     "task_id": task_id,
                     "post_id": post_id,
+                    "user_id": user_id,
                     "status": "retrying",
-                    "retry_count": retry_count
+                    "retry_count": retry_count,
+                    "error_code": error_code.value
                 })
-                raise self.retry(exc=e, countdown=countdown)
+                db.commit()
+                if publication_key:
+                    # Hold the claim through the wait; the retry runs as the same task.
+                    IdempotencyService.renew(db, [publication_key], task_id, timedelta(seconds=decision.delay))
+                raise self.retry(
+                    exc=e,
+                    countdown=countdown_for(decision.delay),
+                    kwargs={
+                        **self.request.kwargs,
+                        "retry_delay": decision.delay,
+                        "not_before": time.time() + decision.delay
+                    }
+                )
 
-            return {
-                "status": "failed",
-                "post_id": post_id,
-                "trace_id": current_trace_id,
-                "retry_count": self.request.retries,
-                "error": str(e),
-                "error_code": error_code.value
-            }
+            logger.info(f"Not retrying post {post_id}: {decision.reason}")
+            outcome = result_envelope(
+                "failed",
+                trace_id=current_trace_id,
+                audit_log_id=audit_log.id if audit_log else None,
+                error=e,
+                error_code=error_code,
+                post_id=post_id,
+                retry_count=self.request.retries,
+                retry_skipped=decision.reason,
+                **step_counters(results)
+            )
+            IdempotencyService.complete(db, publication_key, STATUS_FAILED, result=outcome)
+            dead_letter(
+                self, db, post, e, error_code, current_trace_id,
+                audit_log_id=audit_log.id if audit_log else None,
+                retry_skipped=decision.reason,
+                **step_counters(results)
+            )
+            return outcome
 
+    except TaskPredicate:
+        # Retry/Ignore are control flow for Celery, not worker failures.
+        raise
     except Exception as e:
         logger.error(f"Critical Worker Error: {e}")
-        # Only try to update DB if we can
-        try:
-           crud.update_post(db, post_id=post_id, post_in=PostUpdate(status="failed"))
-        except:
-           pass
-        publish_event({
+        critical_event = {
             "level": "ERROR",
             "message": f"Critical error for post {post_id}: {str(e)}",
             "trace_id": current_trace_id,
             "task_id": task_id,
             "post_id": post_id,
+            "user_id": user_id,
             "status": "failed"
-        })
+        }
+        # Only try to update DB if we can
+        try:
+           db.rollback()
+           crud.transition_post_status(db, post_id, PostStatus.FAILED, commit=False)
+           OutboxService.add(db, critical_event)
+           db.commit()
+           critical_event = None
+           if publication_key:
+               IdempotencyService.complete(db, publication_key, STATUS_FAILED, result={"error": str(e)})
+           dead_letter(self, db, post, e, ErrorCode.SYSTEM_ERROR, current_trace_id)
+        except:
+           pass
+        if critical_event is not None:
+            # The database is unusable, so the outbox is too.
+            publish_event(critical_event)
         return {
             "status": "failed",
             "post_id": post_id,
             "trace_id": current_trace_id,
             "retry_count": self.request.retries,
-            "error": str(e)
+            "error": compact_error(e)
         }
     finally:
         db.close()
@@ -226,6 +436,8 @@ def execute_post_publication(self, post_id: int, trace_id: str = None):
 def execute_act_goal_task(self, goal: str, context: dict = None):
     """
     Task to execute a specific Nova Act goal.
+    The step trace is stored in the audit log; the task result only holds
+    a compact envelope referencing it.
     """
     trace_id = str(uuid.uuid4())
     publish_event({
@@ -236,17 +448,289 @@ def execute_act_goal_task(self, goal: str, context: dict = None):
         "status": "running"
     })
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    results = run_async(ai_service.run_automation(goal, context or {}))
+    succeeded = results.get("status") == "success"
+
+    completed_event = {
+        "level": "INFO" if succeeded else "ERROR",
+        "message": f"Completed automation goal: {goal}",
+        "trace_id": trace_id,
+        "task_id": self.request.id,
+        "status": results.get("status", "unknown")
+    }
+    audit_log_id = None
+    db = SessionLocal()
     try:
-        results = loop.run_until_complete(ai_service.run_automation(goal, context or {}))
-        publish_event({
-            "level": "INFO" if results.get("status") == "success" else "ERROR",
-            "message": f"Completed automation goal: {goal}",
-            "trace_id": trace_id,
-            "task_id": self.request.id,
-            "status": results.get("status", "unknown")
-        })
-        return results
+        audit_log = AuditService.create_audit_log(
+            db=db,
+            action_id=trace_id,
+            goal=goal,
+            payload={"goal": goal, "context": context or {}, "task_id": self.request.id}
+        )
+        AuditService.update_audit_log(
+            db,
+            audit_log.id,
+            status="SUCCESS" if succeeded else "FAILED",
+            result=results,
+            error=results.get("error"),
+            error_code=error_code_value(results.get("error_code")),
+            commit=False
+        )
+        OutboxService.add(db, completed_event)
+        db.commit()
+        audit_log_id = audit_log.id
+        completed_event = None
+    except Exception as e:
+        logger.error(f"Failed to store automation trace for {self.request.id}: {e}")
+    finally:
+        db.close()
+
+    if completed_event is not None:
+        # The trace could not be stored; announce the outcome directly.
+        publish_event(completed_event)
+    return result_envelope(
+        results.get("status", "unknown"),
+        trace_id=trace_id,
+        audit_log_id=audit_log_id,
+        error=results.get("error"),
+        error_code=results.get("error_code"),
+        **step_counters(results)
+    )
+
+
+@celery_app.task(bind=True)
+def execute_multi_account_publication(self, post_id: int, account_ids: list, trace_id: str = None):
+    """
+    Publishes one post to several social accounts inside a single warm browser.
+    Each account runs in its own isolated BrowserContext; results are reported
+    per account into the audit log. Accounts already published for the same
+    content are skipped via their idempotency keys, so re-running the task
+    after a partial failure only publishes to the remaining accounts.
+    """
+    db = SessionLocal()
+    current_trace_id = trace_id or str(uuid.uuid4())
+    task_id = self.request.id
+    post = None
+    user_id = None
+    publication_keys = {}
+
+    try:
+        post = crud.get_post(db, post_id)
+        if not post:
+            logger.error(f"Post {post_id} not found")
+            return {"status": "failed", "error": f"Post {post_id} not found", "trace_id": current_trace_id}
+        user_id = post.user_id
+
+        accounts = crud_account.get_social_accounts_by_ids(
+            db, user_id=post.user_id, account_ids=account_ids, platform=post.platform
+        )
+        if not accounts:
+            return {"status": "failed", "error": "No matching social accounts", "trace_id": current_trace_id}
+
+        content_hash = IdempotencyService.content_hash(post.content, post.media_url)
+        prior_claims = {}
+        for account in accounts:
+            key = IdempotencyService.publication_key(post_id, content_hash, f"account:{account.id}")
+            claim = IdempotencyService.claim(db, key, SCOPE_PUBLICATION, task_id, post_id=post_id)
+            if claim.acquired:
+                publication_keys[account.id] = key
+            else:
+                prior_claims[account.id] = claim
+        duplicates = [
+            {
+                "account_id": account_id,
+                "status": "success" if claim.status == STATUS_SUCCEEDED else "duplicate",
+                "duplicate_of": claim.task_id
+            }
+            for account_id, claim in prior_claims.items()
+        ]
+        accounts = [account for account in accounts if account.id in publication_keys]
+        if not accounts:
+            logger.info(f"Post {post_id} already published or in progress for all accounts")
+            return {
+                "status": "duplicate",
+                "post_id": post_id,
+                "trace_id": current_trace_id,
+                "accounts": duplicates
+            }
+
+        defer_until_rate_allows(
+            self,
+            post.platform.value,
+            [f"account:{account.id}" for account in accounts],
+            current_trace_id,
+            post_id,
+            user_id,
+            db=db,
+            claim_keys=list(publication_keys.values())
+        )
+
+        running = crud.transition_post_status(db, post_id, PostStatus.RUNNING, commit=False)
+        if running is not None:
+            OutboxService.add(db, {
+                "level": "INFO",
+                "message": f"Started publishing post {post_id} to {len(accounts)} accounts",
+                "trace_id": current_trace_id,
+                "task_id": task_id,
+                "post_id": post_id,
+                "user_id": user_id,
+                "platform": str(post.platform),
+                "status": "running"
+            })
+        db.commit()
+        if running is None:
+            for key in publication_keys.values():
+                IdempotencyService.complete(db, key, STATUS_FAILED)
+            return {
+                "status": "skipped",
+                "post_id": post_id,
+                "trace_id": current_trace_id,
+                "error": "Post is no longer schedulable"
+            }
+        self.update_state(
+            state="RUNNING",
+            meta={
+                "trace_id": current_trace_id,
+                "post_id": post_id,
+                "platform": str(post.platform),
+                "account_count": len(accounts)
+            }
+        )
+
+        goal = f"Publish content to {post.platform.value}"
+        account_contexts = []
+        for account in accounts:
+            try:
+                credentials = crud_account.get_account_credentials(account)
+            except Exception:
+                credentials = {}
+            account_contexts.append({
+                "account_id": account.id,
+                "storage_state": credentials.get("storage_state"),
+                "context": {
+                    "content": post.content,
+                    "platform": post.platform.value,
+                    "post_id": post_id,
+                    "account_username": account.username
+                }
+            })
+
+        results = run_async(ai_service.run_multi_account_automation(goal, account_contexts))
+
+        account_results = []
+        for account in accounts:
+            outcome = results.get(account.id, {"status": "failed", "error": "No result"})
+            succeeded = outcome.get("status") == "success"
+            error_code = outcome.get("error_code")
+            audit_log = AuditService.create_audit_log(
+                db=db,
+                action_id=current_trace_id,
+                goal=f"Publish to {post.platform.value} as {account.username}",
+                payload={
+                    "post_id": post_id,
+                    "account_id": account.id,
+                    "platform": str(post.platform),
+                    "content": post.content
+                },
+                user_id=str(post.user_id) if post.user_id else None,
+                platform=str(post.platform)
+            )
+            AuditService.update_audit_log(
+                db,
+                audit_log.id,
+                status="SUCCESS" if succeeded else "FAILED",
+                result=outcome,
+                error=None if succeeded else outcome.get("error"),
+                error_code=str(getattr(error_code, "value", error_code)) if error_code else None,
+                commit=False
+            )
+            # Committed with the audit update by IdempotencyService.complete below.
+            OutboxService.add(db, {
+                "level": "INFO" if succeeded else "ERROR",
+                "message": (
+                    f"Post {post_id} published as {account.username}" if succeeded
+                    else f"Post {post_id} failed for {account.username}: {outcome.get('error')}"
+                ),
+                "trace_id": current_trace_id,
+                "task_id": task_id,
+                "post_id": post_id,
+                "user_id": user_id,
+                "account_id": account.id,
+                "status": "success" if succeeded else "failed"
+            })
+            account_result = {
+                "account_id": account.id,
+                "status": "success" if succeeded else "failed",
+                "audit_log_id": audit_log.id,
+                "error": None if succeeded else compact_error(outcome.get("error"))
+            }
+            IdempotencyService.complete(
+                db,
+                publication_keys.pop(account.id),
+                STATUS_SUCCEEDED if succeeded else STATUS_FAILED,
+                result=account_result
+            )
+            account_results.append(account_result)
+
+        failed = [item for item in account_results if item["status"] == "failed"]
+        if failed:
+            first_error = results.get(failed[0]["account_id"], {})
+            dead_letter(
+                self, db, post, failed[0]["error"],
+                first_error.get("error_code") or ErrorCode.SYSTEM_ERROR,
+                current_trace_id,
+                audit_log_id=failed[0]["audit_log_id"],
+                failed_accounts=[item["account_id"] for item in failed]
+            )
+
+        account_results.extend(duplicates)
+        all_succeeded = all(item["status"] == "success" for item in account_results)
+        if all_succeeded:
+            crud.transition_post_status(
+                db, post_id, PostStatus.PUBLISHED, published_at=datetime.utcnow()
+            )
+        elif any(item["status"] == "failed" for item in account_results):
+            crud.transition_post_status(db, post_id, PostStatus.FAILED)
+
+        return {
+            "status": "success" if all_succeeded else "partial_failure",
+            "post_id": post_id,
+            "trace_id": current_trace_id,
+            "accounts": account_results
+        }
+
+    except TaskPredicate:
+        raise
+    except Exception as e:
+        logger.error(f"Critical Worker Error: {e}")
+        critical_event = {
+            "level": "ERROR",
+            "message": f"Critical error for post {post_id}: {str(e)}",
+            "trace_id": current_trace_id,
+            "task_id": task_id,
+            "post_id": post_id,
+            "user_id": user_id,
+            "status": "failed"
+        }
+        try:
+           db.rollback()
+           crud.transition_post_status(db, post_id, PostStatus.FAILED, commit=False)
+           OutboxService.add(db, critical_event)
+           db.commit()
+           critical_event = None
+           for key in publication_keys.values():
+               IdempotencyService.complete(db, key, STATUS_FAILED, result={"error": str(e)})
+           dead_letter(self, db, post, e, ErrorCode.SYSTEM_ERROR, current_trace_id)
+        except:
+           pass
+        if critical_event is not None:
+            # The database is unusable, so the outbox is too.
+            publish_event(critical_event)
+        return {
+            "status": "failed",
+            "post_id": post_id,
+            "trace_id": current_trace_id,
+            "error": compact_error(e)
+        }
     finally:
-        loop.close()
+        db.close()
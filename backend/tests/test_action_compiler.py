@@ -0,0 +1,110 @@
+import pytest
+
+from app.services.nova.action_compiler import compile_actions
+from app.services.nova.browser_executor import BrowserSession
+
+
+def test_compile_fuses_fills_with_closing_click():
+    actions = [
+        {"type": "navigate", "url": "https://x.test"},
+        {"type": "type", "selector": "#user", "value": "me"},
+        {"type": "type", "selector": "#pass", "value": "pw"},
+        {"type": "click", "selector": "#login"},
+        {"type": "click", "selector": "text=Start a post"},
+        {"type": "type", "selector": "#content", "value": "hello"},
+        {"type": "screenshot"},
+    ]
+
+    batches = compile_actions(actions)
+
+    assert [len(batch) for batch in batches] == [1, 3, 1, 1, 1]
+    assert [action["selector"] for action in batches[1]] == ["#user", "#pass", "#login"]
+
+
+class FakePage:
+    def __init__(self, outcome=None, script_error=None, wait_error=None):
+        self.outcome = outcome or {"completed": 3, "error": None, "partial": False}
+        self.script_error = script_error
+        self.wait_error = wait_error
+        self.calls = []
+
+    async def wait_for_function(self, script, arg=None, timeout=None):
+        self.calls.append(("wait", arg))
+        if self.wait_error:
+            raise self.wait_error
+
+    async def evaluate(self, script, arg=None):
+        self.calls.append(("evaluate", arg))
+        if self.script_error:
+            raise self.script_error
+        return self.outcome
+
+    async def fill(self, selector, value):
+        self.calls.append(("fill", selector))
+
+    async def click(self, selector):
+        self.calls.append(("click", selector))
+
+
+BATCH = [
+    {"type": "type", "selector": "#user", "value": "me"},
+    {"type": "type", "selector": "#pass", "value": "pw"},
+    {"type": "click", "selector": "#login"},
+]
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_as_single_script_with_per_step_results():
+    page = FakePage()
+    session = BrowserSession(context=None, page=page)
+
+    results = await session.execute_batch(BATCH)
+
+    assert [call[0] for call in page.calls] == ["wait", "evaluate"]
+    assert len(results) == 3
+    assert all(result["status"] == "success" and result["batched"] for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_falls_back_to_step_by_step_when_wait_fails():
+    page = FakePage(wait_error=TimeoutError("#pass not visible"))
+    session = BrowserSession(context=None, page=page)
+
+    results = await session.execute_batch(BATCH)
+
+    assert [call[0] for call in page.calls] == ["wait", "fill", "fill", "click"]
+    assert all(result["status"] == "success" and result["batch_fallback"] for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_resumes_from_the_step_the_script_reached():
+    page = FakePage(outcome={"completed": 1, "error": "selector not found: #pass", "partial": False})
+    session = BrowserSession(context=None, page=page)
+
+    results = await session.execute_batch(BATCH)
+
+    assert [call[0] for call in page.calls] == ["wait", "evaluate", "fill", "click"]
+    assert results[0]["batched"] and results[1]["batch_fallback"] and results[2]["batch_fallback"]
+    assert all(result["status"] == "success" for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_navigation_error_counts_as_success_without_replay():
+    page = FakePage(script_error=RuntimeError("Execution context was destroyed, most likely because of a navigation"))
+    session = BrowserSession(context=None, page=page)
+
+    results = await session.execute_batch(BATCH)
+
+    assert [call[0] for call in page.calls] == ["wait", "evaluate"]
+    assert all(result["status"] == "success" for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_never_replays_click_after_script_started():
+    page = FakePage(script_error=RuntimeError("Target crashed"))
+    session = BrowserSession(context=None, page=page)
+
+    results = await session.execute_batch(BATCH)
+
+    assert ("click", "#login") not in page.calls
+    assert all(result["status"] == "failed" for result in results)
@@ -0,0 +1,63 @@
+from contextlib import nullcontext
+
+import pytest
+
+from app.models.error_codes import ErrorCode
+from app.services.nova.action_stream import ActionStreamError, IncrementalActionParser
+from app.services.nova.nova_act_service import NovaActService
+
+
+PLAN = (
+    '```json\n{"actions": [{"type": "navigate", "url": "https://x.test/?q={a}"}, '
+    '{"type": "type", "selector": "#c", "value": "He said \\"}\\" ok"}, '
+    '{"type": "click", "selector": "#go"}]}\n```'
+)
+
+
+def test_parser_emits_actions_as_chunks_complete():
+    parser = IncrementalActionParser()
+    emitted = []
+    for i in range(0, len(PLAN), 7):
+        emitted.extend(parser.feed(PLAN[i:i + 7]))
+
+    parser.finish()
+    assert [action["type"] for action in emitted] == ["navigate", "type", "click"]
+    assert emitted[1]["value"] == 'He said "}" ok'
+    assert parser.closed
+
+
+def test_parser_rejects_truncated_stream():
+    parser = IncrementalActionParser()
+    parser.feed('{"actions": [{"type": "navigate", "url": "https://x.test"}, {"type": "cli')
+    with pytest.raises(ActionStreamError):
+        parser.finish()
+
+
+class RecordingSession:
+    def __init__(self):
+        self.executed = []
+
+    async def execute_action(self, action):
+        self.executed.append(action)
+        return {"action": action, "status": "success"}
+
+
+@pytest.mark.asyncio
+async def test_streamed_validation_failure_aborts_and_is_recorded():
+    service = NovaActService.__new__(NovaActService)
+    service.demo_mode = False
+
+    async def fake_text(request):
+        yield '{"actions": [{"type": "navigate", "url": "https://x.test"},'
+        yield ' {"type": "drag", "selector": "#a"}, {"type": "click", "selector": "#b"}]}'
+
+    service._stream_plan_text = fake_text
+    service._plan_request = lambda goal, context: {}
+    session = RecordingSession()
+    audit_log = {"goal": "g", "status": "pending", "steps": [], "error": None, "error_code": None}
+
+    with pytest.raises(Exception, match="Planning failed mid-stream after 1 steps"):
+        await service._execute_streamed_plan("g", {}, nullcontext(session), audit_log)
+
+    assert [action["type"] for action in session.executed] == ["navigate"]
+    assert audit_log["error_code"] == ErrorCode.VALIDATION_ERROR
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.nova.browser_governor import BrowserGovernor
+
+
+class Sampler:
+    def __init__(self):
+        self.rss = 0
+
+    def __call__(self):
+        return self.rss
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    sampler = Sampler()
+    governor = BrowserGovernor(max_contexts=2, rss_limit_mb=100, rss_sampler=sampler)
+    monkeypatch.setattr(governor, "export_metrics", lambda force=False: None)
+    governor.sampler = sampler
+    return governor
+
+
+@pytest.mark.asyncio
+async def test_governor_caps_contexts_and_queues_excess(governor):
+    peak = 0
+    queued_seen = 0
+
+    async def noop():
+        pass
+
+    async def job():
+        nonlocal peak, queued_seen
+        async with governor.slot(recycle=noop):
+            peak = max(peak, governor.active_contexts)
+            queued_seen = max(queued_seen, governor.queued_requests)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(job() for _ in range(5)))
+
+    assert peak == 2
+    assert queued_seen >= 1
+    assert governor.active_contexts == 0
+    assert governor.recycles == 0
+
+
+@pytest.mark.asyncio
+async def test_governor_recycles_after_drain_when_over_limit(governor):
+    recycled_with_active = []
+
+    async def recycle():
+        recycled_with_active.append(governor.active_contexts)
+        governor.sampler.rss = 0
+
+    async def job(delay):
+        async with governor.slot(recycle=recycle):
+            await asyncio.sleep(delay)
+            governor.sampler.rss = 200 * 1024 * 1024
+
+    await asyncio.gather(job(0.01), job(0.03))
+
+    assert recycled_with_active == [0]
+    assert governor.recycles == 1
+    assert governor.draining is False
+    assert governor.snapshot()["peak_rss_mb"] == 200.0
+
+
+class RecordingRedis:
+    def __init__(self):
+        self.threads = []
+
+    def hset(self, key, field, value):
+        self.threads.append(threading.get_ident())
+
+
+@pytest.mark.asyncio
+async def test_governor_exports_metrics_off_the_event_loop():
+    governor = BrowserGovernor(max_contexts=1, rss_limit_mb=100, rss_sampler=Sampler())
+    client = RecordingRedis()
+    governor._redis = client
+
+    async def noop():
+        pass
+
+    async with governor.slot(recycle=noop):
+        pass
+    await asyncio.sleep(0.05)
+
+    # Acquire and release inside the same second collapse into one pooled write.
+    assert len(client.threads) == 1
+    assert client.threads[0] != threading.get_ident()
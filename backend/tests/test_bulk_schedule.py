@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import celery
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core.db import SessionLocal
+from app.main import app
+from app.models.post import Platform, Post, PostStatus
+from app.models.user import User
+
+
+client = TestClient(app)
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.scheduled = []
+        self.cancelled = []
+
+    def schedule_many(self, entries, lane=None):
+        self.scheduled.extend(post_id for post_id, _ in entries)
+
+    def cancel_many(self, post_ids):
+        self.cancelled.extend(post_ids)
+
+
+class FakeGroup:
+    sent = []
+
+    def __init__(self, signatures):
+        self.signatures = list(signatures)
+
+    def apply_async(self):
+        FakeGroup.sent.append([signature.args[0] for signature in self.signatures])
+        return SimpleNamespace(
+            results=[SimpleNamespace(id=f"job-{signature.args[0]}") for signature in self.signatures]
+        )
+
+
+@pytest.fixture
+def owner(monkeypatch):
+    db = SessionLocal()
+    user = User(id=981, email="bulk@example.com", hashed_password="x", full_name="Bulk", is_active=True)
+    db.add(user)
+    db.commit()
+    scheduler = RecordingScheduler()
+    monkeypatch.setattr("app.api.endpoints.posts.publication_scheduler", scheduler)
+    monkeypatch.setattr(celery, "group", FakeGroup)
+    FakeGroup.sent = []
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    try:
+        yield db, scheduler
+    finally:
+        app.dependency_overrides.pop(deps.get_current_active_user, None)
+        db.query(Post).filter(Post.user_id == 981).delete()
+        db.query(User).filter(User.id == 981).delete()
+        db.commit()
+        db.close()
+
+
+def _post(db, scheduled_at, status=PostStatus.DRAFT, user_id=981):
+    post = Post(
+        user_id=user_id,
+        content="Week of content",
+        platform=Platform.LINKEDIN,
+        status=status,
+        scheduled_at=scheduled_at,
+    )
+    db.add(post)
+    db.commit()
+    db.refresh(post)
+    return post
+
+
+def test_bulk_schedule_splits_future_and_due_posts(owner):
+    db, scheduler = owner
+    future = _post(db, datetime.utcnow() + timedelta(days=2))
+    due = _post(db, datetime.utcnow() - timedelta(minutes=1))
+
+    response = client.post(
+        "/api/v1/posts/posts/schedule/bulk", json={"post_ids": [future.id, due.id, future.id]}
+    )
+
+    assert response.status_code == 200
+    posts = response.json()["posts"]
+    assert [item["post_id"] for item in posts] == [future.id, due.id]
+    assert posts[0]["status"] == "scheduled" and posts[0]["job_id"] is None
+    assert posts[1] == {"post_id": due.id, "status": "queued", "job_id": f"job-{due.id}"}
+    assert scheduler.scheduled == [future.id]
+    assert FakeGroup.sent == [[due.id]]
+
+    statuses = {row.id: row.status for row in db.query(Post.id, Post.status).filter(Post.user_id == 981)}
+    assert statuses == {future.id: PostStatus.SCHEDULED, due.id: PostStatus.SCHEDULED}
+
+
+def test_bulk_schedule_is_all_or_nothing(owner):
+    db, scheduler = owner
+    draft = _post(db, None)
+    published = _post(db, None, status=PostStatus.PUBLISHED)
+
+    response = client.post(
+        "/api/v1/posts/posts/schedule/bulk", json={"post_ids": [draft.id, published.id]}
+    )
+
+    assert response.status_code == 409
+    assert str(published.id) in response.json()["detail"]
+    db.expire_all()
+    assert db.get(Post, draft.id).status == PostStatus.DRAFT
+    assert FakeGroup.sent == []
+
+
+def test_bulk_schedule_restores_due_posts_when_enqueue_fails(owner, monkeypatch):
+    db, scheduler = owner
+    future = _post(db, datetime.utcnow() + timedelta(days=2))
+    draft = _post(db, None)
+    failed = _post(db, None, status=PostStatus.FAILED)
+
+    def broker_down(self):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(FakeGroup, "apply_async", broker_down)
+    response = client.post(
+        "/api/v1/posts/posts/schedule/bulk", json={"post_ids": [future.id, draft.id, failed.id]}
+    )
+
+    assert response.status_code == 503
+    db.expire_all()
+    assert db.get(Post, draft.id).status == PostStatus.DRAFT
+    assert db.get(Post, failed.id).status == PostStatus.FAILED
+    assert db.get(Post, future.id).status == PostStatus.SCHEDULED
+    assert scheduler.scheduled == [future.id]
+    assert scheduler.cancelled == []
+
+
+def test_bulk_schedule_rejects_posts_of_other_users(owner):
+    db, _ = owner
+    mine = _post(db, None)
+
+    response = client.post("/api/v1/posts/posts/schedule/bulk", json={"post_ids": [mine.id, 999999]})
+
+    assert response.status_code == 404
@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core.db import SessionLocal
+from app.main import app
+from app.models.dead_letter import DeadLetter
+from app.models.error_codes import ErrorCode
+from app.models.idempotency import IdempotencyKey
+from app.models.post import Platform, Post, PostStatus
+from app.models.user import User
+from app.services.dead_letter_service import DeadLetterService
+from app.tasks import worker
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def owner():
+    db = SessionLocal()
+    user = User(id=971, email="dead-letters@example.com", hashed_password="x", full_name="DLQ", is_active=True)
+    db.add(user)
+    db.commit()
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    try:
+        yield db
+    finally:
+        app.dependency_overrides.pop(deps.get_current_active_user, None)
+        post_ids = [row.id for row in db.query(Post.id).filter(Post.user_id == 971)]
+        db.query(DeadLetter).filter(DeadLetter.user_id == 971).delete()
+        db.query(IdempotencyKey).filter(IdempotencyKey.post_id.in_(post_ids)).delete()
+        db.query(Post).filter(Post.user_id == 971).delete()
+        db.query(User).filter(User.id == 971).delete()
+        db.commit()
+        db.close()
+
+
+def _post(db, status=PostStatus.FAILED, platform=Platform.LINKEDIN):
+    post = Post(user_id=971, content="Outage day", platform=platform, status=status)
+    db.add(post)
+    db.commit()
+    db.refresh(post)
+    return post
+
+
+def _letter(db, post, error_code="TIMEOUT"):
+    return DeadLetterService.record(
+        db,
+        task_name="app.tasks.worker.execute_post_publication",
+        args=[post.id],
+        kwargs={"trace_id": "old-trace", "retry_delay": 120},
+        post_id=post.id,
+        user_id=post.user_id,
+        platform=post.platform.value,
+        error="platform unavailable",
+        error_code=error_code,
+        retry_count=5,
+    )
+
+
+def test_terminal_failure_is_dead_lettered_with_context(owner, monkeypatch):
+    db = owner
+    post = _post(db, status=PostStatus.SCHEDULED)
+
+    async def fake_run_automation(goal, context):
+        return {"status": "failed", "steps": [], "error": "login wall", "error_code": ErrorCode.AUTH_FAILED}
+
+    monkeypatch.setattr(worker.ai_service, "run_automation", fake_run_automation)
+    monkeypatch.setattr(worker, "run_async", lambda coro, timeout=None: asyncio.run(coro))
+    monkeypatch.setattr(worker, "publish_event", lambda event: None)
+    monkeypatch.setattr(worker.publish_rate_limiter, "acquire", lambda platform, keys: 0.0)
+    monkeypatch.setattr(worker.execute_post_publication, "update_state", lambda **kwargs: None)
+
+    outcome = worker.execute_post_publication.apply(args=[post.id], kwargs={"trace_id": "trace-dlq"}).get()
+
+    assert outcome["status"] == "failed"
+    letter = db.query(DeadLetter).filter(DeadLetter.post_id == post.id).one()
+    assert letter.error_code == "AUTH_FAILED"
+    assert letter.platform == "linkedin"
+    assert letter.args == [post.id]
+    assert letter.trace_id == "trace-dlq"
+    assert letter.context["content"] == "Outage day"
+    assert letter.context["retry_skipped"]
+
+
+def test_replay_filters_skips_and_spaces_out_jobs(owner, monkeypatch):
+    db = owner
+    first, second = _post(db), _post(db)
+    published = _post(db, status=PostStatus.PUBLISHED)
+    auth = _post(db)
+    letters = [_letter(db, first), _letter(db, second), _letter(db, first), _letter(db, published)]
+    _letter(db, auth, error_code="AUTH_FAILED")
+
+    sent = []
+
+    def fake_apply_async(args=None, kwargs=None, countdown=None, queue=None):
+        sent.append((args, kwargs, countdown, queue))
+        return SimpleNamespace(id=f"replay-{args[0]}")
+
+    monkeypatch.setattr(worker.execute_post_publication, "apply_async", fake_apply_async)
+
+    response = client.post(
+        "/api/v1/dead-letters/replay", json={"error_code": "TIMEOUT", "rate_per_minute": 30}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["replayed"] == 3 and body["skipped"] == 1
+    assert [(args, countdown, queue) for args, _, countdown, queue in sent] == [
+        ([first.id], 0.0, "browser.background"),
+        ([second.id], 2.0, "browser.background"),
+    ]
+    assert "retry_delay" not in sent[0][1] and sent[0][1]["trace_id"] != "old-trace"
+
+    by_id = {item["id"]: item for item in body["items"]}
+    assert by_id[letters[2].id]["job_id"] == f"replay-{first.id}"
+    assert by_id[letters[3].id]["reason"] == "Post is published"
+
+    db.expire_all()
+    assert db.get(Post, first.id).status == PostStatus.SCHEDULED
+    assert db.get(Post, auth.id).status == PostStatus.FAILED
+    remaining = client.get("/api/v1/dead-letters/").json()
+    assert [letter["error_code"] for letter in remaining] == ["AUTH_FAILED"]
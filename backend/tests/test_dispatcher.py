@@ -0,0 +1,310 @@
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core.db import SessionLocal
+from app.main import app
+from app.models.post import Platform, Post, PostStatus
+from app.models.user import User
+from app.services import scheduler_service
+from app.services.scheduler_service import DISPATCHED_KEY, SCHEDULE_KEY, PublicationScheduler, to_epoch
+from app.tasks.dispatcher import Dispatcher, dispatch_due, fail_missed
+
+
+client = TestClient(app)
+
+
+class FakeScheduler:
+    """In-memory stand-in for the Redis sorted set and dispatch markers."""
+
+    def __init__(self):
+        self.entries = {}
+        self.dispatched = {}
+        self.lanes = {}
+
+    def schedule(self, post_id, due_at, lane=None):
+        self.entries[post_id] = to_epoch(due_at)
+        self.dispatched.pop(post_id, None)
+        if lane:
+            self.lanes[post_id] = lane
+
+    def reschedule(self, post_id, due_at):
+        if post_id not in self.entries:
+            return False
+        self.entries[post_id] = to_epoch(due_at)
+        return True
+
+    def cancel(self, post_id):
+        self.entries.pop(post_id, None)
+        self.dispatched.pop(post_id, None)
+
+    def forget(self, post_ids):
+        for post_id in post_ids:
+            self.dispatched.pop(post_id, None)
+
+    def pop_lanes(self, post_ids):
+        return {post_id: self.lanes.pop(post_id) for post_id in post_ids if post_id in self.lanes}
+
+    def release(self, post_id, due, lane=None):
+        self.entries[post_id] = due
+        self.dispatched.pop(post_id, None)
+        if lane:
+            self.lanes[post_id] = lane
+
+    def claim_due(self, now=None, limit=500):
+        due = sorted((score, post_id) for post_id, score in self.entries.items() if score <= now)[:limit]
+        for score, post_id in due:
+            del self.entries[post_id]
+            self.dispatched[post_id] = score
+        return [(post_id, score) for score, post_id in due]
+
+
+class FakeRedis:
+    """Just enough of redis-py for reconcile, reclaim and cancel."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.hashes = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def zadd(self, key, mapping, nx=False):
+        zset = self.zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            if nx and member in zset:
+                continue
+            added += member not in zset
+            zset[member] = score
+        return added
+
+    def zrem(self, key, *members):
+        return sum(1 for member in members if self.zsets.get(key, {}).pop(member, None) is not None)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hdel(self, key, *fields):
+        return sum(1 for field in fields if self.hashes.get(key, {}).pop(field, None) is not None)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hscan(self, key, cursor=0, count=None):
+        return 0, dict(self.hashes.get(key, {}))
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.redis, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+class FakeTask:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.queues = []
+        self.fail = fail
+
+    def apply_async(self, args=None, kwargs=None, queue=None):
+        if self.fail:
+            raise ConnectionError("broker down")
+        self.calls.append(args[0])
+        self.queues.append(queue)
+
+
+def _make_user(db, user_id):
+    user = User(
+        id=user_id,
+        email=f"dispatcher-{user_id}@example.com",
+        hashed_password="x",
+        full_name="Dispatcher",
+        is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _make_post(db, user_id, scheduled_at, status=PostStatus.SCHEDULED):
+    post = Post(
+        user_id=user_id,
+        content="Scheduled content",
+        platform=Platform.LINKEDIN,
+        status=status,
+        scheduled_at=scheduled_at,
+    )
+    db.add(post)
+    db.commit()
+    db.refresh(post)
+    return post
+
+
+def _cleanup(db, user_id):
+    db.query(Post).filter(Post.user_id == user_id).delete()
+    db.query(User).filter(User.id == user_id).delete()
+    db.commit()
+
+
+def test_dispatch_due_skips_cancelled_and_rescheduled_posts():
+    db = SessionLocal()
+    _make_user(db, 951)
+    try:
+        due_at = datetime(2030, 1, 1, 9, 0)
+        due = _make_post(db, 951, due_at)
+        cancelled = _make_post(db, 951, due_at, status=PostStatus.DRAFT)
+        moved = _make_post(db, 951, due_at + timedelta(hours=2))
+        later = _make_post(db, 951, due_at + timedelta(hours=1))
+
+        scheduler = FakeScheduler()
+        for post in (due, cancelled, later):
+            scheduler.schedule(post.id, due_at if post is not later else later.scheduled_at)
+        # Redis still holds the old time for a post moved in the database only.
+        scheduler.schedule(moved.id, due_at)
+
+        task = FakeTask()
+        dispatched = dispatch_due(scheduler, db, task=task, now=to_epoch(due_at))
+
+        assert dispatched == 1
+        assert task.calls == [due.id]
+        assert task.queues == ["browser.scheduled"]
+        assert cancelled.id not in scheduler.dispatched
+        assert scheduler.entries[moved.id] == to_epoch(moved.scheduled_at)
+        assert later.id in scheduler.entries
+
+        # Claimed posts are not handed out a second time.
+        assert dispatch_due(scheduler, db, task=task, now=to_epoch(due_at)) == 0
+    finally:
+        _cleanup(db, 951)
+        db.close()
+
+
+def test_dispatch_due_releases_posts_when_enqueue_fails():
+    db = SessionLocal()
+    _make_user(db, 952)
+    try:
+        due_at = datetime(2030, 1, 1, 9, 0)
+        post = _make_post(db, 952, due_at)
+        scheduler = FakeScheduler()
+        scheduler.schedule(post.id, due_at)
+
+        assert dispatch_due(scheduler, db, task=FakeTask(fail=True), now=to_epoch(due_at)) == 0
+        assert scheduler.entries[post.id] == to_epoch(due_at)
+        assert post.id not in scheduler.dispatched
+    finally:
+        _cleanup(db, 952)
+        db.close()
+
+
+def test_schedule_endpoint_defers_future_posts_and_honours_updates(monkeypatch):
+    db = SessionLocal()
+    user = _make_user(db, 953)
+    scheduler = FakeScheduler()
+    monkeypatch.setattr("app.api.endpoints.posts.publication_scheduler", scheduler)
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    try:
+        post = _make_post(db, 953, None, status=PostStatus.DRAFT)
+        scheduled_at = datetime.utcnow() + timedelta(days=1)
+
+        response = client.post(
+            f"/api/v1/posts/posts/{post.id}/schedule",
+            json={"scheduled_at": scheduled_at.isoformat() + "Z"},
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "scheduled"
+        assert response.json()["job_id"] is None
+        assert post.id in scheduler.entries
+
+        moved_to = scheduled_at + timedelta(hours=3)
+        response = client.patch(
+            f"/api/v1/posts/posts/{post.id}",
+            json={"scheduled_at": moved_to.isoformat()},
+        )
+        assert response.status_code == 200
+        assert scheduler.entries[post.id] == to_epoch(moved_to)
+
+        response = client.patch(f"/api/v1/posts/posts/{post.id}", json={"status": "draft"})
+        assert response.status_code == 200
+        assert post.id not in scheduler.entries
+    finally:
+        app.dependency_overrides.pop(deps.get_current_active_user, None)
+        _cleanup(db, 953)
+        db.close()
+
+
+def test_reconcile_and_reclaim_readd_posts_whose_dispatch_lease_expired():
+    db = SessionLocal()
+    _make_user(db, 954)
+    try:
+        due_at = datetime.utcnow() - timedelta(minutes=30)
+        stuck = _make_post(db, 954, due_at)
+        in_flight = _make_post(db, 954, due_at)
+        due = to_epoch(due_at)
+        redis_client = FakeRedis()
+        # The dispatcher claimed both; it died before enqueueing the first.
+        redis_client.hset(DISPATCHED_KEY, str(stuck.id), f"{due}@{time.time() - 3600}")
+        redis_client.hset(DISPATCHED_KEY, str(in_flight.id), f"{due}@{time.time() - 5}")
+        scheduler = PublicationScheduler(client=redis_client)
+
+        assert scheduler.reconcile(db) == 1
+        assert list(redis_client.zsets[SCHEDULE_KEY]) == [str(stuck.id)]
+
+        redis_client.zsets.clear()
+        assert scheduler.reclaim_expired(db) == 1
+        assert list(redis_client.zsets[SCHEDULE_KEY]) == [str(stuck.id)]
+    finally:
+        _cleanup(db, 954)
+        db.close()
+
+
+def test_periodic_reclaim_restores_scheduled_posts_missing_from_redis():
+    db = SessionLocal()
+    _make_user(db, 957)
+    try:
+        # Scheduled in the database, but the Redis write after the status change failed.
+        lost = _make_post(db, 957, datetime.utcnow() + timedelta(hours=2))
+        redis_client = FakeRedis()
+        dispatcher = Dispatcher(PublicationScheduler(client=redis_client))
+
+        assert dispatcher.reclaim() >= 1
+        assert redis_client.zsets[SCHEDULE_KEY][str(lost.id)] == to_epoch(lost.scheduled_at)
+        assert dispatcher._next_reclaim > time.time()
+    finally:
+        _cleanup(db, 957)
+        db.close()
+
+
+def test_fail_missed_marks_posts_outside_the_catchup_window(monkeypatch):
+    events = []
+    monkeypatch.setattr("app.tasks.dispatcher.publish_event", events.append)
+    db = SessionLocal()
+    _make_user(db, 955)
+    try:
+        stale = _make_post(db, 955, datetime.utcnow() - timedelta(days=3))
+        recent = _make_post(db, 955, datetime.utcnow() - timedelta(hours=1))
+        redis_client = FakeRedis()
+        redis_client.zadd(SCHEDULE_KEY, {str(stale.id): to_epoch(stale.scheduled_at)})
+        scheduler = PublicationScheduler(client=redis_client)
+
+        assert fail_missed(scheduler, db, catchup_window=timedelta(hours=24)) == 1
+
+        db.expire_all()
+        assert db.get(Post, stale.id).status == PostStatus.FAILED
+        assert db.get(Post, recent.id).status == PostStatus.SCHEDULED
+        assert str(stale.id) not in redis_client.zsets[SCHEDULE_KEY]
+        assert events[0]["status"] == "missed" and events[0]["user_id"] == 955
+    finally:
+        _cleanup(db, 955)
+        db.close()
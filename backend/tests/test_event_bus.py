@@ -0,0 +1,464 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.endpoints import automation
+from app.core.db import SessionLocal
+from app.core import event_bus
+from app.core.config import settings
+from app.core.event_bus import (
+    EventFilter,
+    EventHub,
+    EventPublisher,
+    MemoryEventBus,
+    SubscriberOverflow,
+    SubscriberQueue,
+    stream_key,
+    subscribe_events,
+)
+from app.core.security import create_access_token
+from app.main import app
+from app.models.user import User, UserRole
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.client.maxlens.add(maxlen)
+        self.commands.append((key, fields["data"]))
+
+    def xtrim(self, key, minid=None, approximate=True):
+        pass
+
+    def execute(self):
+        if self.client.down:
+            raise redis.ConnectionError("down")
+        self.client.round_trips += 1
+        self.client.published.extend(self.commands)
+        return [1] * len(self.commands)
+
+
+class FakeRedis:
+    def __init__(self, down=False):
+        self.down = down
+        self.round_trips = 0
+        self.published = []
+        self.maxlens = set()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def test_events_are_buffered_and_flushed_in_pipelined_batches():
+    client = FakeRedis()
+    publisher = EventPublisher(client=client, batch_size=50, flush_interval=60)
+
+    for i in range(120):
+        assert publisher.publish({"message": f"step {i}"}) is True
+    publisher.flush()
+
+    assert len(client.published) == 120
+    assert client.round_trips == 3
+    assert {key for key, _ in client.published} == {stream_key("automation.events")}
+    assert client.maxlens == {10000}
+    first = json.loads(client.published[0][1])
+    assert first["message"] == "step 0" and first["level"] == "INFO" and "timestamp" in first
+
+
+def test_background_thread_flushes_without_explicit_flush():
+    client = FakeRedis()
+    publisher = EventPublisher(client=client, flush_interval=0.005)
+
+    publisher.publish({"message": "hello"})
+    deadline = time.monotonic() + 2
+    while not client.published and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert [json.loads(payload)["message"] for _, payload in client.published] == ["hello"]
+
+
+def test_idle_publisher_thread_sleeps_until_an_event_arrives():
+    client = FakeRedis()
+    publisher = EventPublisher(client=client, flush_interval=0.001)
+    flushes = []
+    flush = publisher.flush
+    publisher.flush = lambda: flushes.append(1) or flush()
+
+    publisher.publish({"message": "hello"})
+    deadline = time.monotonic() + 2
+    while not client.published and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+    assert len(client.published) == 1
+    assert len(flushes) == 1
+
+
+def test_outage_keeps_newest_events_and_backs_off():
+    client = FakeRedis(down=True)
+    publisher = EventPublisher(client=client, batch_size=10, flush_interval=60, max_buffer=5)
+
+    results = [publisher.publish({"message": str(i)}) for i in range(8)]
+    assert results == [True] * 5 + [False] * 3
+    assert publisher.flush() == 0
+
+    client.down = False
+    assert publisher.flush() == 0  # still backing off
+    publisher.close()
+    assert [json.loads(payload)["message"] for _, payload in client.published] == ["3", "4", "5", "6", "7"]
+
+
+def test_hub_fans_out_to_every_subscriber_and_drops_oldest_when_full():
+    async def scenario():
+        hub = EventHub(queue_size=2)
+        hub._ready = asyncio.get_running_loop().create_future()
+        hub._ready.set_result(True)
+        hub._loop = asyncio.get_running_loop()
+        hub._task = asyncio.get_running_loop().create_future()  # stands in for the listener
+
+        async with hub.subscribe() as fast, hub.subscribe() as slow:
+            assert hub.subscriber_count == 2
+            hub._broadcast({"message": "a"})
+            assert (await fast.get())["message"] == "a"
+            hub._broadcast({"message": "b"})
+            hub._broadcast({"message": "c"})
+            assert [slow.get_nowait()["message"] for _ in range(slow.qsize())] == ["b", "c"]
+        assert hub.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+
+class FakeStreamRedis:
+    """Async stand-in for the stream commands the hub uses."""
+
+    def __init__(self):
+        self.entries = []
+        self._ms = 1000
+
+    def add(self, event):
+        self._ms += 1
+        entry_id = f"{self._ms}-0"
+        self.entries.append((entry_id, {"data": json.dumps(event)}))
+        return entry_id
+
+    @staticmethod
+    def _key(entry_id):
+        ms, _, seq = entry_id.partition("-")
+        return int(ms), int(seq or 0)
+
+    async def xrevrange(self, key, count=None):
+        return list(reversed(self.entries))[:count]
+
+    async def xrange(self, key, min="-", max="+", count=None):
+        entries = [e for e in self.entries if min == "-" or self._key(e[0]) >= self._key(min)]
+        return entries[:count]
+
+    async def xread(self, streams, block=None, count=None):
+        (key, last_id), = streams.items()
+        entries = [e for e in self.entries if self._key(e[0]) > self._key(last_id)]
+        if not entries:
+            await asyncio.sleep(0.01)
+            return []
+        return [(key, entries[:count])]
+
+
+def test_reconnect_replays_missed_events_then_continues_live_without_duplicates(monkeypatch):
+    async def scenario():
+        client = FakeStreamRedis()
+        hub = EventHub(client=client)
+        monkeypatch.setattr("app.core.event_bus.event_hub", hub)
+        monkeypatch.setattr("app.core.event_bus._event_backend", "redis")
+
+        seen_id = client.add({"message": "seen"})
+        client.add({"message": "missed 1"})
+        client.add({"message": "missed 2"})
+
+        received = []
+        stream = subscribe_events(last_event_id=seen_id)
+        for _ in range(2):
+            received.append(await asyncio.wait_for(stream.__anext__(), 1))
+        client.add({"message": "live"})
+        received.append(await asyncio.wait_for(stream.__anext__(), 1))
+        await stream.aclose()
+        await hub.stop()
+
+        assert [event["message"] for event in received] == ["missed 1", "missed 2", "live"]
+        assert [event["event_id"] for event in received] == ["1002-0", "1003-0", "1004-0"]
+
+    asyncio.run(scenario())
+
+
+def test_replay_pages_past_the_limit_until_it_reaches_live_events(monkeypatch):
+    async def scenario():
+        client = FakeStreamRedis()
+        hub = EventHub(client=client)
+        monkeypatch.setattr("app.core.event_bus.event_hub", hub)
+        monkeypatch.setattr("app.core.event_bus._event_backend", "redis")
+        monkeypatch.setattr(settings, "EVENT_REPLAY_LIMIT", 2)
+
+        seen_id = client.add({"message": "seen"})
+        for i in range(5):
+            client.add({"message": f"missed {i}"})
+
+        stream = subscribe_events(last_event_id=seen_id)
+        received = [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(5)]
+        client.add({"message": "live"})
+        received.append(await asyncio.wait_for(stream.__anext__(), 1))
+        await stream.aclose()
+        await hub.stop()
+
+        assert [event["message"] for event in received] == [f"missed {i}" for i in range(5)] + ["live"]
+
+    asyncio.run(scenario())
+
+
+def test_replay_flags_a_gap_when_the_cursor_was_trimmed():
+    async def scenario():
+        client = FakeStreamRedis()
+        client._ms = 5000
+        client.add({"message": "oldest kept"})
+        events = await EventHub(client=client).replay("1000-0")
+        assert events[0]["status"] == "replay_gap"
+        assert events[1]["message"] == "oldest kept"
+
+    asyncio.run(scenario())
+
+
+def _ready_hub():
+    hub = EventHub()
+    loop = asyncio.get_running_loop()
+    hub._ready = loop.create_future()
+    hub._ready.set_result(True)
+    hub._loop = loop
+    hub._task = loop.create_future()
+    return hub
+
+
+def test_hub_only_offers_events_to_matching_subscribers():
+    async def scenario():
+        hub = _ready_hub()
+        async with hub.subscribe(EventFilter(user_id=1)) as mine, \
+                hub.subscribe(EventFilter(user_id=2)) as theirs, \
+                hub.subscribe(EventFilter(job_id="job-1", owner_id=1)) as job, \
+                hub.subscribe() as everything:
+            hub._broadcast({"message": "own post", "user_id": 1, "task_id": "job-1"})
+            hub._broadcast({"message": "unowned job", "task_id": "job-1"})
+            hub._broadcast({"message": "other user", "user_id": 2, "task_id": "job-1"})
+
+            def drain(queue):
+                return [queue.get_nowait()["message"] for _ in range(queue.qsize())]
+
+            assert drain(mine) == ["own post"]
+            assert drain(theirs) == ["other user"]
+            assert drain(job) == ["own post", "unowned job"]
+            assert len(drain(everything)) == 3
+            # Only the index entries for the event's own fields are visited.
+            assert len(hub._candidates({"user_id": 2})) == 2
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def ws_users():
+    db = SessionLocal()
+    users = [
+        User(id=961, email="ws-user@example.com", hashed_password="x", is_active=True),
+        User(id=962, email="ws-admin@example.com", hashed_password="x", is_active=True, role=UserRole.ADMIN),
+    ]
+    db.add_all(users)
+    db.commit()
+    try:
+        yield {user.id: create_access_token(user.email) for user in users}
+    finally:
+        db.query(User).filter(User.id.in_([961, 962])).delete()
+        db.commit()
+        db.close()
+
+
+def _record_subscriptions(monkeypatch):
+    filters = []
+
+    async def fake_subscribe_event_batches(last_event_id=None, event_filter=None, **options):
+        filters.append(event_filter)
+        yield [{"message": "event", "user_id": event_filter.user_id}]
+
+    monkeypatch.setattr(automation, "subscribe_event_batches", fake_subscribe_event_batches)
+    return filters
+
+
+def test_websocket_requires_authentication(ws_users):
+    client = TestClient(app)
+    with client.websocket_connect("/api/v1/automation/ws/logs") as socket:
+        socket.send_json({"type": "subscribe"})
+        with pytest.raises(WebSocketDisconnect) as exc:
+            socket.receive_json()
+    assert exc.value.code == automation.WS_POLICY_VIOLATION
+
+
+def test_websocket_closes_for_retry_when_the_stream_is_unavailable(ws_users, monkeypatch):
+    async def unavailable(**options):
+        raise redis.ConnectionError("redis down")
+        yield
+
+    monkeypatch.setattr(automation, "subscribe_event_batches", unavailable)
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/automation/ws/logs?token={ws_users[961]}") as socket:
+        socket.receive_json()
+        with pytest.raises(WebSocketDisconnect) as exc:
+            socket.receive_json()
+    assert exc.value.code == automation.WS_TRY_AGAIN_LATER
+
+
+def test_websocket_scopes_users_to_their_own_events(ws_users, monkeypatch):
+    filters = _record_subscriptions(monkeypatch)
+    client = TestClient(app)
+
+    with client.websocket_connect("/api/v1/automation/ws/logs") as socket:
+        socket.send_json({"type": "auth", "token": ws_users[961], "post_id": 5})
+        assert socket.receive_json()["subscription"] == {"user_id": 961, "post_id": 5}
+        assert socket.receive_json()["message"] == "event"
+
+    with client.websocket_connect(f"/api/v1/automation/ws/logs?token={ws_users[961]}&job_id=abc") as socket:
+        assert socket.receive_json()["subscription"] == {"job_id": "abc"}
+    assert filters[-1].owner_id == 961
+
+    with client.websocket_connect(f"/api/v1/automation/ws/logs?token={ws_users[961]}&user_id=962") as socket:
+        with pytest.raises(WebSocketDisconnect):
+            socket.receive_json()
+
+    with client.websocket_connect(f"/api/v1/automation/ws/logs?token={ws_users[962]}&user_id=961") as socket:
+        assert socket.receive_json()["subscription"] == {"user_id": 961}
+
+
+def test_subscriber_queue_overflow_policies():
+    async def scenario():
+        events = [{"message": str(i), "task_id": "job-a" if i % 2 else None} for i in range(6)]
+
+        dropping = SubscriberQueue(3)
+        for event in events:
+            dropping.put_nowait(event)
+        assert [e["message"] for e in await dropping.get_batch(10)] == ["3", "4", "5"]
+        assert (dropping.dropped, dropping.delivered) == (3, 3)
+
+        coalescing = SubscriberQueue(3, policy="coalesce")
+        for event in events:
+            coalescing.put_nowait(event)
+        # Older job-a updates collapse into the newest one instead of dropping job-less events.
+        assert [e["message"] for e in await coalescing.get_batch(10)] == ["2", "4", "5"]
+        assert coalescing.coalesced == 2 and coalescing.dropped == 1
+
+        strict = SubscriberQueue(3, policy="disconnect")
+        for event in events:
+            strict.put_nowait(event)
+        with pytest.raises(SubscriberOverflow):
+            await strict.get_batch(10)
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_receives_batched_frames_and_shows_up_in_metrics(ws_users, monkeypatch):
+    hub = EventHub(client=FakeStreamRedis())
+    monkeypatch.setattr("app.core.event_bus.event_hub", hub)
+    monkeypatch.setattr("app.core.event_bus._event_backend", "redis")
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/automation/ws/logs?token={ws_users[961]}") as socket:
+        socket.receive_json()
+        deadline = time.monotonic() + 2
+        while not hub.subscriber_count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        queue = next(iter(next(iter(hub._subscribers.values()))))
+        metrics_url = "/api/v1/automation/metrics/websockets"
+        assert client.get(metrics_url).status_code == 401
+        user_headers = {"Authorization": f"Bearer {ws_users[961]}"}
+        assert client.get(metrics_url, headers=user_headers).status_code == 403
+        admin_headers = {"Authorization": f"Bearer {ws_users[962]}"}
+        stats = client.get(metrics_url, headers=admin_headers).json()
+        assert stats["connections"][0]["user_id"] == 961 and stats["totals"]["connections"] == 1
+
+        # Events pile up while the client is not reading; they arrive as one frame.
+        loop = hub._loop
+        for i in range(3):
+            loop.call_soon_threadsafe(queue.put_nowait, {"message": str(i), "user_id": 961})
+        frame = socket.receive_json()
+        messages = [e["message"] for e in frame["events"]] if frame.get("type") == "batch" else [frame["message"]]
+        while len(messages) < 3:
+            frame = socket.receive_json()
+            messages += [e["message"] for e in frame.get("events", [frame])]
+        assert messages == ["0", "1", "2"]
+
+
+def test_websocket_metrics_report_memory_bus_connections(ws_users, monkeypatch):
+    bus = MemoryEventBus()
+    monkeypatch.setattr(event_bus, "_event_backend", "memory")
+    monkeypatch.setitem(event_bus._memory_buses, "automation.events", bus)
+    client = TestClient(app)
+
+    with client.websocket_connect(f"/api/v1/automation/ws/logs?token={ws_users[961]}") as socket:
+        socket.receive_json()
+        deadline = time.monotonic() + 2
+        while not bus.subscriber_count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        admin_headers = {"Authorization": f"Bearer {ws_users[962]}"}
+        stats = client.get("/api/v1/automation/metrics/websockets", headers=admin_headers).json()
+        assert stats["totals"]["connections"] == 1
+        assert stats["connections"][0]["user_id"] == 961
+
+
+def test_memory_backend_is_chosen_only_for_single_process_installs(monkeypatch):
+    monkeypatch.setattr(event_bus, "_event_backend", None)
+    monkeypatch.setattr(settings, "EVENT_BACKEND", "auto")
+    monkeypatch.setattr(settings, "DEMO_MODE", True)
+    assert event_bus.event_backend() == "memory"
+
+    monkeypatch.setattr(event_bus, "_event_backend", None)
+    monkeypatch.setattr(settings, "DEMO_MODE", False)
+    monkeypatch.setattr(settings, "JOB_BACKEND", "local")
+    assert event_bus.event_backend() == "memory"
+
+    # Celery workers publish to Redis; an unreachable Redis at startup must not strand the API.
+    monkeypatch.setattr(event_bus, "_event_backend", None)
+    monkeypatch.setattr(settings, "JOB_BACKEND", "celery")
+    assert event_bus.event_backend() == "redis"
+
+
+def test_memory_bus_delivers_thread_published_events_with_filters_and_replay(monkeypatch):
+    bus = MemoryEventBus(maxlen=3)
+    monkeypatch.setattr(event_bus, "_event_backend", "memory")
+    monkeypatch.setitem(event_bus._memory_buses, "automation.events", bus)
+
+    async def scenario():
+        first = await asyncio.to_thread(event_bus.publish_event, {"message": "before", "user_id": 1})
+        assert first is True
+        cursor = bus._log[-1]["event_id"]
+
+        received = []
+        stream = subscribe_events(last_event_id=cursor, event_filter=EventFilter(user_id=1))
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        threading.Thread(target=event_bus.publish_event, args=({"message": "other", "user_id": 2},)).start()
+        threading.Thread(target=event_bus.publish_event, args=({"message": "mine", "user_id": 1},)).start()
+        received.append(await asyncio.wait_for(pending, 1))
+        await stream.aclose()
+
+        assert [event["message"] for event in received] == ["mine"]
+        assert event_bus.parse_event_id(received[0]["event_id"]) > event_bus.parse_event_id(cursor)
+
+        # Only the newest 3 events are kept; an old cursor gets a gap marker.
+        for i in range(3):
+            event_bus.publish_event({"message": f"later {i}", "user_id": 1})
+        replayed = await bus.replay(cursor)
+        assert replayed[0]["status"] == "replay_gap"
+        assert [event["message"] for event in replayed[1:]] == ["later 0", "later 1", "later 2"]
+
+    asyncio.run(scenario())
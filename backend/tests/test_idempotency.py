@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core.db import SessionLocal
+from app.main import app
+from app.models.idempotency import IdempotencyKey
+from app.models.post import Platform, Post, PostStatus
+from app.models.user import User
+from app.services.idempotency_service import (
+    IdempotencyService,
+    SCOPE_PUBLICATION,
+    STATUS_FAILED,
+    STATUS_SUCCEEDED,
+)
+
+
+client = TestClient(app)
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, post_id, due_at, lane=None):
+        self.scheduled.append(post_id)
+
+    def cancel(self, post_id):
+        pass
+
+
+def test_publication_claims_short_circuit_duplicates():
+    db = SessionLocal()
+    key = IdempotencyService.publication_key(1, IdempotencyService.content_hash("hello"), "user:1")
+    try:
+        first = IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-a", post_id=1)
+        assert first.acquired
+
+        # A second task (double click) does not get the key while it is in progress.
+        duplicate = IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-b", post_id=1)
+        assert not duplicate.acquired
+        assert duplicate.task_id == "task-a"
+
+        # The same task (retry or redelivery) takes it back.
+        assert IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-a", post_id=1).acquired
+
+        IdempotencyService.complete(db, key, STATUS_SUCCEEDED, result={"status": "success", "post_id": 1})
+        after_success = IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-c", post_id=1)
+        assert not after_success.acquired
+        assert after_success.result == {"status": "success", "post_id": 1}
+    finally:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete()
+        db.commit()
+        db.close()
+
+
+def test_failed_claims_can_be_retried_and_content_changes_get_new_keys():
+    db = SessionLocal()
+    key = IdempotencyService.publication_key(2, IdempotencyService.content_hash("v1"), "account:5")
+    try:
+        IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-a", post_id=2)
+        IdempotencyService.complete(db, key, STATUS_FAILED)
+        assert IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-b", post_id=2).acquired
+
+        edited = IdempotencyService.publication_key(2, IdempotencyService.content_hash("v2"), "account:5")
+        assert edited != key
+    finally:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete()
+        db.commit()
+        db.close()
+
+
+def _age_claim(db, key, hours):
+    """Moves the claim's clock back, as if `hours` had passed since it was written."""
+    row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).one()
+    row.updated_at = row.updated_at - timedelta(hours=hours)
+    db.commit()
+
+
+def test_claim_held_through_long_retry_delay():
+    db = SessionLocal()
+    key = IdempotencyService.publication_key(3, IdempotencyService.content_hash("retry"), "user:3")
+    try:
+        assert IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-a", post_id=3).acquired
+        # The attempt failed with a six-hour Retry-After; two hours into the wait
+        # (well past the 30 minute lease) a second task tries to publish.
+        assert IdempotencyService.renew(db, [key], "task-a", timedelta(hours=6)) == 1
+        _age_claim(db, key, 2)
+
+        competing = IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-b", post_id=3)
+        assert not competing.acquired
+        assert competing.task_id == "task-a"
+        # Only the holder renews.
+        assert IdempotencyService.renew(db, [key], "task-b", timedelta(hours=6)) == 0
+
+        assert IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-a", post_id=3).acquired
+
+        # A holder that never woke up loses the claim once the lease has also passed.
+        _age_claim(db, key, 1)
+        assert IdempotencyService.claim(db, key, SCOPE_PUBLICATION, "task-b", post_id=3).acquired
+    finally:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete()
+        db.commit()
+        db.close()
+
+
+def test_schedule_replays_response_for_same_idempotency_key(monkeypatch):
+    db = SessionLocal()
+    user = User(
+        id=961,
+        email="idempotency@example.com",
+        hashed_password="x",
+        full_name="Idempotency",
+        is_active=True,
+    )
+    db.add(user)
+    post = Post(
+        user_id=961,
+        content="Launch day",
+        platform=Platform.LINKEDIN,
+        status=PostStatus.DRAFT,
+        scheduled_at=datetime.utcnow() + timedelta(days=1),
+    )
+    db.add(post)
+    db.commit()
+    db.refresh(post)
+
+    scheduler = RecordingScheduler()
+    monkeypatch.setattr("app.api.endpoints.posts.publication_scheduler", scheduler)
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    try:
+        headers = {"Idempotency-Key": "schedule-launch-1"}
+        first = client.post(f"/api/v1/posts/posts/{post.id}/schedule", headers=headers)
+        second = client.post(f"/api/v1/posts/posts/{post.id}/schedule", headers=headers)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["idempotent_replay"] is True
+        assert second.json()["trace_id"] == first.json()["trace_id"]
+        assert scheduler.scheduled == [post.id]
+    finally:
+        app.dependency_overrides.pop(deps.get_current_active_user, None)
+        db.query(IdempotencyKey).filter(IdempotencyKey.post_id == post.id).delete()
+        db.query(Post).filter(Post.user_id == 961).delete()
+        db.query(User).filter(User.id == 961).delete()
+        db.commit()
+        db.close()
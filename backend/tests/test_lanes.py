@@ -0,0 +1,40 @@
+from collections import Counter
+
+from app.core.celery_app import celery_app
+from app.core.lanes import Lane, WeightedLaneCycle, lane_of_queue, lane_queue
+
+
+QUEUES = ["browser", "browser.scheduled", "browser.background"]
+
+
+def test_lane_queue_names():
+    assert lane_queue("browser", Lane.INTERACTIVE) == "browser"
+    assert lane_queue("browser", Lane.BACKGROUND) == "browser.background"
+    assert lane_of_queue("browser.scheduled") == Lane.SCHEDULED
+    assert lane_of_queue("analytics") == Lane.BACKGROUND
+    assert lane_of_queue("celery") == Lane.INTERACTIVE
+
+
+def test_weighted_cycle_prefers_interactive_without_starving_background():
+    cycle = WeightedLaneCycle()
+    cycle.update(QUEUES)
+
+    leaders = Counter(cycle.consume(3)[0] for _ in range(100))
+
+    # Default weights 6/3/1 over every 10 fetches.
+    assert leaders == {"browser": 60, "browser.scheduled": 30, "browser.background": 10}
+
+
+def test_background_leads_within_one_weight_cycle():
+    cycle = WeightedLaneCycle(QUEUES)
+    orders = [cycle.consume(3) for _ in range(10)]
+
+    assert all(len(order) == 3 for order in orders)
+    assert orders[0][0] == "browser"
+    assert any(order[0] == "browser.background" for order in orders)
+
+
+def test_lane_queues_are_declared_and_use_weighted_order():
+    declared = {queue.name for queue in celery_app.conf.task_queues}
+    assert {"browser", "browser.scheduled", "browser.background"} <= declared
+    assert celery_app.conf.broker_transport_options["queue_order_strategy"] == "app.core.lanes:WeightedLaneCycle"
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.job import Job
+from app.tasks import local_backend
+from app.tasks.local_backend import LocalJobBackend, LocalJobRunner
+
+
+attempts = []
+
+
+@celery_app.task(bind=True, max_retries=2, name="tests.local_jobs.flaky")
+def flaky(self, value):
+    attempts.append(self.request.retries)
+    self.update_state(state="RUNNING", meta={"retry_count": self.request.retries})
+    if self.request.retries == 0:
+        raise self.retry(countdown=0.1)
+    return {"status": "success", "value": value, "queue": self.request.delivery_info["routing_key"]}
+
+
+@celery_app.task(name="tests.local_jobs.broken")
+def broken():
+    raise ValueError("selector vanished")
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    backend = LocalJobBackend(app=celery_app)
+    runner = LocalJobRunner(concurrency=2)
+    monkeypatch.setattr(settings, "JOB_BACKEND", "local")
+    monkeypatch.setattr(local_backend, "local_jobs", runner)
+    for task in (flaky, broken):
+        monkeypatch.setattr(task, "backend", backend)
+    runner.start()
+    attempts.clear()
+    try:
+        yield runner
+    finally:
+        runner.stop()
+        db = SessionLocal()
+        db.query(Job).filter(Job.task_name.like("tests.local_jobs.%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_delay_runs_in_process_with_retries_and_db_state(runner):
+    result = flaky.apply_async(args=[7], queue="browser.background")
+
+    assert result.get(timeout=10, interval=0.05) == {"status": "success", "value": 7, "queue": "browser.background"}
+    assert attempts == [0, 1]
+    assert result.state == "SUCCESS"
+
+    db = SessionLocal()
+    try:
+        job = db.get(Job, result.id)
+        assert job.state == "SUCCESS"
+        assert job.retries == 1
+        assert job.args == [7]
+    finally:
+        db.close()
+
+
+def test_failures_are_reported_through_async_result(runner):
+    result = broken.delay()
+
+    with pytest.raises(ValueError, match="selector vanished"):
+        result.get(timeout=10, interval=0.05)
+    assert result.failed()
+
+
+def test_pending_jobs_are_recovered_after_restart(runner, monkeypatch):
+    runner.stop()
+    job_id = runner.submit("tests.local_jobs.flaky", args=[1])
+    restarted = LocalJobRunner(concurrency=1)
+    monkeypatch.setattr(local_backend, "local_jobs", restarted)
+    restarted.start()
+    try:
+        result = flaky.AsyncResult(job_id)
+        assert result.get(timeout=10, interval=0.05)["value"] == 1
+    finally:
+        restarted.stop()
+
+
+def test_jobs_submitted_from_another_process_are_polled(runner, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_JOB_POLL_INTERVAL_SECONDS", 0.05)
+    runner.stop()
+    runner.start()
+    # The dispatcher process: JOB_BACKEND=local, but its runner never started.
+    dispatcher_runner = LocalJobRunner(concurrency=1)
+    monkeypatch.setattr(local_backend, "local_jobs", dispatcher_runner)
+
+    result = flaky.apply_async(args=[3])
+    assert not dispatcher_runner._heap
+
+    # Back in the API process, where the task's own retry is submitted.
+    monkeypatch.setattr(local_backend, "local_jobs", runner)
+    assert result.get(timeout=10, interval=0.05)["value"] == 3
+    assert attempts == [0, 1]
+
+
+class NoRedisScheduler:
+    def __getattr__(self, name):
+        raise AssertionError(f"publication_scheduler.{name} called with JOB_BACKEND=local")
+
+
+def test_future_posts_wait_in_the_job_table_without_redis(runner, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.api import deps
+    from app.main import app
+    from app.models.post import Platform, Post, PostStatus
+    from app.models.user import User
+
+    # Only persist: the API's runner would start publishing once the ETA passes.
+    runner.stop()
+    monkeypatch.setattr("app.api.endpoints.posts.publication_scheduler", NoRedisScheduler())
+    db = SessionLocal()
+    user = User(id=956, email="local-jobs@example.com", hashed_password="x", full_name="Local", is_active=True)
+    db.add(user)
+    post = Post(user_id=956, content="Later", platform=Platform.LINKEDIN, status=PostStatus.DRAFT)
+    db.add(post)
+    db.commit()
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    client = TestClient(app)
+    due = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+    try:
+        response = client.post(f"/api/v1/posts/posts/{post.id}/schedule", json={"scheduled_at": due.isoformat()})
+        assert response.status_code == 200
+        job_id = response.json()["job_id"]
+        assert job_id == f"publish-post-{post.id}"
+        job = db.get(Job, job_id)
+        assert (job.state, job.eta, job.queue) == ("PENDING", due, "browser.scheduled")
+
+        # Rescheduling moves the same job, and a finished job starts over.
+        job.state = "FAILURE"
+        db.commit()
+        later = due + timedelta(hours=3)
+        response = client.patch(f"/api/v1/posts/posts/{post.id}", json={"scheduled_at": later.isoformat()})
+        assert response.status_code == 200
+        db.expire_all()
+        job = db.get(Job, job_id)
+        assert (job.state, job.eta) == ("PENDING", later)
+        assert db.query(Job).filter(Job.args == [post.id]).count() == 1
+    finally:
+        app.dependency_overrides.pop(deps.get_current_active_user, None)
+        db.query(Job).filter(Job.id.like("publish-post-%")).delete(synchronize_session=False)
+        db.query(Post).filter(Post.user_id == 956).delete()
+        db.query(User).filter(User.id == 956).delete()
+        db.commit()
+        db.close()
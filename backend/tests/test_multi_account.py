@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from app.services.nova import browser_executor
+from app.services.nova.browser_executor import BrowserExecutor, BrowserSession
+from app.services.nova.browser_governor import BrowserGovernor
+from app.services.nova.nova_act_service import NovaActService
+
+
+class FakePage:
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    def __init__(self, browser, storage_state):
+        self.browser = browser
+        self.storage_state = storage_state
+        browser.open_contexts += 1
+        browser.peak = max(browser.peak, browser.open_contexts)
+
+    async def new_page(self):
+        return FakePage()
+
+    async def close(self):
+        self.browser.open_contexts -= 1
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.open_contexts = 0
+        self.peak = 0
+        self.contexts = []
+
+    async def new_context(self, storage_state=None):
+        context = FakeContext(self, storage_state)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        pass
+
+
+class FakePlaywright:
+    """Stands in for `async_playwright()`, its started driver and `chromium`."""
+
+    def __init__(self):
+        self.chromium = self
+        self.browser = FakeBrowser()
+
+    async def start(self):
+        return self
+
+    async def launch(self, **kwargs):
+        return self.browser
+
+    async def stop(self):
+        pass
+
+
+async def fake_execute_action(self, action):
+    await asyncio.sleep(0.01)
+    if (self._context.storage_state or {}).get("broken"):
+        return {"action": action, "status": "failed", "error": "selector not found"}
+    return {"action": action, "status": "success"}
+
+
+async def fake_execute_batch(self, actions):
+    return [await self.execute_action(action) for action in actions]
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    playwright = FakePlaywright()
+    monkeypatch.setattr(browser_executor, "async_playwright", lambda: playwright)
+    monkeypatch.setattr(BrowserSession, "execute_action", fake_execute_action)
+    monkeypatch.setattr(BrowserSession, "execute_batch", fake_execute_batch)
+    return playwright
+
+
+def _service(max_contexts):
+    governor = BrowserGovernor(max_contexts=max_contexts, rss_limit_mb=100, rss_sampler=lambda: 0)
+    governor.export_metrics = lambda force=False: None
+    service = NovaActService.__new__(NovaActService)
+    service.demo_mode = False
+    service.browser = BrowserExecutor(governor=governor)
+
+    async def fake_stream_plan(goal, context):
+        yield {"type": "type", "selector": "#content", "value": context["content"]}
+        yield {"type": "click", "selector": "#publish"}
+
+    service._stream_execution_plan = fake_stream_plan
+    return service, governor
+
+
+@pytest.mark.asyncio
+async def test_multi_account_runs_in_isolated_contexts_with_cap(playwright):
+    service, governor = _service(max_contexts=2)
+    account_contexts = [
+        {"account_id": account_id, "context": {"content": "hello"}, "storage_state": {"account": account_id}}
+        for account_id in range(1, 6)
+    ]
+
+    results = await service.execute_goal_for_accounts("Publish", account_contexts)
+
+    assert set(results) == {1, 2, 3, 4, 5}
+    assert all(result["status"] == "success" for result in results.values())
+    assert all(len(result["steps"]) == 2 for result in results.values())
+    browser = playwright.browser
+    # The governor, not the test, held the executor to two open contexts.
+    assert browser.peak == 2
+    assert sorted(context.storage_state["account"] for context in browser.contexts) == [1, 2, 3, 4, 5]
+    assert browser.open_contexts == 0
+    assert governor.active_contexts == 0
+
+
+@pytest.mark.asyncio
+async def test_multi_account_reports_failures_per_account(playwright):
+    service, _ = _service(max_contexts=4)
+    account_contexts = [
+        {"account_id": 1, "context": {"content": "hello"}, "storage_state": None},
+        {"account_id": 2, "context": {"content": "hello"}, "storage_state": {"broken": True}},
+    ]
+
+    results = await service.execute_goal_for_accounts("Publish", account_contexts)
+
+    assert results[1]["status"] == "success"
+    assert results[2]["status"] == "failed"
+    assert results[2]["error_code"] == "SELECTOR_NOT_FOUND"
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.core.db import SessionLocal
+from app.models.audit_log import AuditLog
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import OutboxEvent
+from app.models.post import Platform, Post, PostStatus
+from app.models.user import User
+from app.services.outbox_service import OutboxService
+from app.tasks import outbox_relay, worker
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(OutboxEvent).delete()
+    session.add(User(id=951, email="outbox@example.com", hashed_password="x", is_active=True))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        post_ids = [row.id for row in session.query(Post.id).filter(Post.user_id == 951)]
+        session.query(OutboxEvent).delete()
+        session.query(IdempotencyKey).filter(IdempotencyKey.post_id.in_(post_ids)).delete()
+        session.query(AuditLog).filter(AuditLog.user == "951").delete()
+        session.query(Post).filter(Post.user_id == 951).delete()
+        session.query(User).filter(User.id == 951).delete()
+        session.commit()
+        session.close()
+
+
+def test_publication_stages_events_with_its_state_changes(db, monkeypatch):
+    post = Post(user_id=951, content="Outbox", platform=Platform.LINKEDIN, status=PostStatus.SCHEDULED)
+    db.add(post)
+    db.commit()
+
+    async def fake_run_automation(goal, context):
+        return {"status": "success", "steps": []}
+
+    direct = []
+    monkeypatch.setattr(worker.ai_service, "run_automation", fake_run_automation)
+    monkeypatch.setattr(worker, "run_async", lambda coro, timeout=None: asyncio.run(coro))
+    monkeypatch.setattr(worker, "publish_event", direct.append)
+    monkeypatch.setattr(worker.publish_rate_limiter, "acquire", lambda platform, keys: 0.0)
+    monkeypatch.setattr(worker.execute_post_publication, "update_state", lambda **kwargs: None)
+
+    worker.execute_post_publication.apply(args=[post.id], kwargs={"trace_id": "trace-outbox"}).get()
+
+    assert direct == []
+    rows = db.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    assert [row.payload["status"] for row in rows] == ["running", "success"]
+    assert all(row.payload["user_id"] == 951 and row.delivered_at is None for row in rows)
+
+    sent = []
+    monkeypatch.setattr(outbox_relay, "publish_events_now", sent.extend)
+    assert outbox_relay.relay_pending(db) == 2
+    assert [event["status"] for _, event in sent] == ["running", "success"]
+    assert outbox_relay.relay_pending(db) == 0
+    db.expire_all()
+    assert all(row.delivered_at is not None for row in db.query(OutboxEvent))
+
+
+def test_rolled_back_events_are_never_published(db):
+    OutboxService.add(db, {"message": "uncommitted"})
+    db.rollback()
+    assert db.query(OutboxEvent).count() == 0
+
+
+def test_failed_publish_leaves_events_pending(db, monkeypatch):
+    OutboxService.add(db, {"message": "first"})
+    OutboxService.add(db, {"message": "second"})
+    db.commit()
+
+    def unavailable(events):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(outbox_relay, "publish_events_now", unavailable)
+    with pytest.raises(ConnectionError):
+        outbox_relay.relay_pending(db)
+    assert db.query(OutboxEvent).filter(OutboxEvent.delivered_at.is_(None)).count() == 2
+
+
+class FakeLeaseRedis:
+    """The single-relay lease script over a dict."""
+
+    def __init__(self):
+        self.values = {}
+
+    def register_script(self, script):
+        def run(keys=None, args=None):
+            holder = self.values.get(keys[0])
+            if holder is None or holder == args[0]:
+                self.values[keys[0]] = args[0]
+                return 1
+            return 0
+        return run
+
+
+def test_only_the_lease_holder_relays_without_skip_locked(db, monkeypatch):
+    monkeypatch.setattr("app.core.event_bus._event_backend", "redis")
+    assert outbox_relay.needs_lease()  # the tests run on SQLite
+    sent = []
+    monkeypatch.setattr(outbox_relay, "publish_events_now", sent.extend)
+    monkeypatch.setattr(outbox_relay, "SessionLocal", lambda: db)
+    monkeypatch.setattr(db, "close", lambda: None)
+    client = FakeLeaseRedis()
+    first, second = outbox_relay.OutboxRelay(client=client), outbox_relay.OutboxRelay(client=client)
+
+    OutboxService.add(db, {"message": "first"})
+    db.commit()
+    assert first.tick() == 1
+    OutboxService.add(db, {"message": "second"})
+    db.commit()
+    assert second.tick() == 0
+    assert first.tick() == 1
+    assert [event["message"] for _, event in sent] == ["first", "second"]
+
+    # The in-process bus only works in one API process, so no lease is taken.
+    monkeypatch.setattr("app.core.event_bus._event_backend", "memory")
+    assert not outbox_relay.needs_lease()
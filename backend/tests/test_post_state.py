@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.api import crud, deps
+from app.core.db import SessionLocal
+from app.core.migrations import upgrade_schema
+from app.main import app
+from app.models.post import Platform, Post, PostStatus
+from app.models.user import User
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_post():
+    db = SessionLocal()
+    user = User(id=971, email="state@example.com", hashed_password="x", full_name="State", is_active=True)
+    db.add(user)
+    post = Post(user_id=971, content="State machine", platform=Platform.TWITTER, status=PostStatus.SCHEDULED)
+    db.add(post)
+    db.commit()
+    db.refresh(post)
+    try:
+        yield db, user, post
+    finally:
+        app.dependency_overrides.pop(deps.get_current_active_user, None)
+        db.query(Post).filter(Post.user_id == 971).delete()
+        db.query(User).filter(User.id == 971).delete()
+        db.commit()
+        db.close()
+
+
+def test_transition_bumps_version_and_sets_values(db_post):
+    db, _, post = db_post
+    running = crud.transition_post_status(db, post.id, PostStatus.RUNNING, expected_version=post.version)
+    assert running.status == PostStatus.RUNNING
+    assert running.version == 2
+
+    published_at = datetime(2030, 1, 1, 12, 0)
+    published = crud.transition_post_status(db, post.id, PostStatus.PUBLISHED, published_at=published_at)
+    assert published.status == PostStatus.PUBLISHED
+    assert published.published_at == published_at
+
+
+def test_transition_rejects_stale_version_and_invalid_source(db_post):
+    db, _, post = db_post
+    assert crud.transition_post_status(db, post.id, PostStatus.RUNNING, expected_version=1) is not None
+    # A second worker holding the old version loses the race.
+    assert crud.transition_post_status(db, post.id, PostStatus.RUNNING, expected_version=1) is None
+
+    crud.transition_post_status(db, post.id, PostStatus.PUBLISHED)
+    # Published is terminal.
+    assert crud.transition_post_status(db, post.id, PostStatus.SCHEDULED) is None
+
+
+def test_patch_rejects_invalid_status_change(db_post):
+    db, user, post = db_post
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    crud.transition_post_status(db, post.id, PostStatus.RUNNING)
+    crud.transition_post_status(db, post.id, PostStatus.PUBLISHED)
+
+    response = client.patch(f"/api/v1/posts/posts/{post.id}", json={"status": "draft"})
+    assert response.status_code == 409
+
+
+def test_orm_update_after_transition_in_same_session(db_post):
+    db, _, post = db_post
+    # The worker loads the post, transitions it without committing, then edits it.
+    assert crud.transition_post_status(db, post.id, PostStatus.RUNNING, commit=False) is not None
+    post.media_url = "https://cdn.example.com/evidence.png"
+    db.commit()
+
+    assert post.status == PostStatus.RUNNING
+    assert post.version == 3
+
+
+def test_upgrade_schema_adds_version_column_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE posts (id INTEGER PRIMARY KEY, status VARCHAR, scheduled_at DATETIME)"))
+        conn.execute(text("INSERT INTO posts (id, status) VALUES (1, 'SCHEDULED')"))
+
+    assert upgrade_schema(engine) == 2
+    assert upgrade_schema(engine) == 0
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version FROM posts WHERE id = 1")).scalar() == 1
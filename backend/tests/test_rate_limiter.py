@@ -0,0 +1,153 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import redis
+from celery.exceptions import Ignore
+
+from app.core.config import settings
+from app.services.rate_limiter import LocalRateLimiter, PublishRateLimiter, RequestRateLimiter, parse_rate
+from app.tasks import worker
+
+
+class FakeSignature:
+    def __init__(self, task):
+        self.task = task
+
+    def apply_async(self, countdown=None):
+        self.task.requeued.append(countdown)
+
+
+class FakeTask:
+    def __init__(self):
+        self.request = SimpleNamespace(id="task-1", retries=2)
+        self.states = []
+        self.requeued = []
+
+    def update_state(self, state=None, meta=None):
+        self.states.append(state)
+
+    def signature_from_request(self):
+        return FakeSignature(self)
+
+
+class BrokenClient:
+    def register_script(self, script):
+        def run(keys=None, args=None):
+            raise redis.ConnectionError("down")
+        return run
+
+
+def test_parse_rate():
+    assert parse_rate("10/3600") == (10, 3600.0)
+    with pytest.raises(ValueError):
+        parse_rate("0/60")
+
+
+def test_limiter_fails_open_and_skips_unlimited_platforms(monkeypatch):
+    limiter = PublishRateLimiter(client=BrokenClient())
+    assert limiter.acquire("linkedin", ["user:1"]) == 0.0
+
+    monkeypatch.setattr(settings, "PUBLISH_RATE_LIMIT_TWITTER", "")
+    assert limiter.acquire("twitter", ["user:1"]) == 0.0
+
+
+def test_task_is_requeued_for_next_token(monkeypatch):
+    monkeypatch.setattr(worker.publish_rate_limiter, "acquire", lambda platform, keys: 42.5)
+    monkeypatch.setattr(worker, "publish_event", lambda event: None)
+    task = FakeTask()
+
+    with pytest.raises(Ignore):
+        worker.defer_until_rate_allows(task, "linkedin", ["user:1"], "trace-1", 7)
+
+    assert task.requeued == [42.5]
+    assert task.states == ["DEFERRED"]
+
+
+def test_task_proceeds_when_token_available(monkeypatch):
+    monkeypatch.setattr(worker.publish_rate_limiter, "acquire", lambda platform, keys: 0.0)
+    task = FakeTask()
+
+    worker.defer_until_rate_allows(task, "linkedin", ["user:1"], "trace-1", 7)
+
+    assert task.requeued == []
+
+
+def test_gcra_allows_the_limit_as_a_burst_then_one_per_emission_interval():
+    limiter = LocalRateLimiter()
+    results = [limiter.hit("ip:1:default", 3, 60, now=1000.0) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == pytest.approx(20.0)
+    assert results[3].headers()["Retry-After"] == "20"
+    assert results[2].headers()["RateLimit-Reset"] == "60"
+
+    assert limiter.hit("ip:1:default", 3, 60, now=1019.0).allowed is False
+    assert limiter.hit("ip:1:default", 3, 60, now=1020.0).allowed is True
+
+
+def test_local_limiter_memory_is_bounded():
+    limiter = LocalRateLimiter(max_keys=2)
+    for client in ("a", "b", "c"):
+        limiter.hit(client, 1, 60, now=1000.0)
+
+    assert len(limiter) == 2
+    # The least recently seen client was forgotten and starts over.
+    assert limiter.hit("a", 1, 60, now=1000.0).allowed is True
+    assert limiter.hit("c", 1, 60, now=1000.0).allowed is False
+
+
+def test_request_limiter_falls_back_locally_and_backs_off_redis(monkeypatch):
+    calls = []
+
+    class Broken:
+        def register_script(self, script):
+            async def run(keys=None, args=None):
+                calls.append(keys)
+                raise redis.ConnectionError("down")
+            return run
+
+    limiter = RequestRateLimiter(client=Broken(), local=LocalRateLimiter())
+
+    async def scenario():
+        return [await limiter.hit("user:a@example.com:default", 2, 60) for _ in range(3)]
+
+    results = asyncio.run(scenario())
+    assert [r.allowed for r in results] == [True, True, False]
+    assert len(calls) == 1
+
+
+def test_middleware_limits_signed_in_users_per_account(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.core.security import create_access_token
+    from app.main import app
+
+    limiter = RequestRateLimiter(local=LocalRateLimiter())
+    limiter._redis_retry_at = float("inf")
+    monkeypatch.setattr("app.main.request_rate_limiter", limiter)
+    monkeypatch.setattr(settings, "RATE_LIMIT_DEFAULT", 2)
+    client = TestClient(app)
+    token = create_access_token("limited@example.com")
+
+    first = client.get("/", headers={"Authorization": f"Bearer {token}"})
+    assert first.headers["RateLimit-Limit"] == "2" and first.headers["RateLimit-Remaining"] == "1"
+    client.get("/", headers={"Authorization": f"Bearer {token}"})
+    blocked = client.get("/", headers={"Authorization": f"Bearer {token}"})
+    assert blocked.status_code == 429 and "Retry-After" in blocked.headers
+
+    # Same IP, anonymous: a separate budget.
+    assert client.get("/").status_code == 200
+
+
+def test_local_job_backend_keeps_publish_buckets_in_process(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_BACKEND", "local")
+    monkeypatch.setattr(settings, "PUBLISH_RATE_LIMIT_LINKEDIN", "2/60")
+    limiter = PublishRateLimiter(client=BrokenClient())
+
+    assert limiter.acquire("linkedin", ["user:1"]) == 0.0
+    assert limiter.acquire("linkedin", ["user:1", "user:2"]) == 0.0
+    # user:1 is out of tokens, so user:2 keeps its last one.
+    assert limiter.acquire("linkedin", ["user:1", "user:2"]) == pytest.approx(30.0)
+    assert limiter.acquire("linkedin", ["user:2"]) == 0.0
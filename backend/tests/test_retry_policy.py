@@ -0,0 +1,127 @@
+import time
+
+import pytest
+from celery.exceptions import Ignore
+
+from app.core.config import settings
+from app.models.error_codes import ErrorCode
+from app.tasks.retry_policy import (
+    RETRY_RULES,
+    RetryBudget,
+    classify_error,
+    compute_delay,
+    countdown_for,
+    decide_retry,
+    parse_retry_after,
+)
+from app.tasks.worker import defer_until_not_before
+
+
+class FakeBudget:
+    def __init__(self, remaining):
+        self.remaining = remaining
+
+    def try_spend(self, queue):
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+def test_auth_failures_are_not_retried_or_charged():
+    budget = FakeBudget(remaining=1)
+    decision = decide_retry(ErrorCode.AUTH_FAILED, 0, "browser", budget=budget)
+    assert not decision.retry
+    assert budget.remaining == 1
+
+
+def test_rate_limited_honours_retry_after():
+    error = Exception("429 Too Many Requests, Retry-After: 120")
+    assert classify_error(error) == ErrorCode.RATE_LIMITED
+    retry_after = parse_retry_after(error)
+    decision = decide_retry(
+        ErrorCode.RATE_LIMITED, 0, "browser", retry_after=retry_after, budget=FakeBudget(5)
+    )
+    assert decision.retry
+    assert decision.delay == 120
+
+
+def test_structured_error_code_wins_over_message():
+    results = {"status": "failed", "error_code": ErrorCode.SELECTOR_NOT_FOUND}
+    assert classify_error(Exception("login button missing"), results) == ErrorCode.SELECTOR_NOT_FOUND
+
+
+def test_timeout_uses_decorrelated_jitter_within_bounds():
+    rule = RETRY_RULES[ErrorCode.TIMEOUT]
+    previous = None
+    for _ in range(50):
+        delay = compute_delay(rule, 0, previous_delay=previous)
+        assert rule.base <= delay <= rule.cap
+        assert delay <= max(rule.base, (previous or rule.base) * 3)
+        previous = delay
+
+
+def test_budget_exhaustion_stops_retries():
+    decision = decide_retry(ErrorCode.TIMEOUT, 0, "browser", budget=FakeBudget(0))
+    assert not decision.retry
+    assert "budget" in decision.reason
+
+
+def test_retry_limit_per_error_code():
+    rule = RETRY_RULES[ErrorCode.RATE_LIMITED]
+    decision = decide_retry(ErrorCode.RATE_LIMITED, rule.max_retries, "browser", budget=FakeBudget(5))
+    assert not decision.retry
+
+
+def test_long_retries_are_capped_below_the_visibility_timeout():
+    longest = max(rule.cap for rule in RETRY_RULES.values())
+    assert longest > settings.CELERY_VISIBILITY_TIMEOUT_SECONDS
+    assert countdown_for(longest) < settings.CELERY_VISIBILITY_TIMEOUT_SECONDS
+    assert countdown_for(30) == 30
+
+
+class FakeSignature:
+    def __init__(self):
+        self.countdowns = []
+
+    def apply_async(self, countdown=None):
+        self.countdowns.append(countdown)
+
+
+class FakeTask:
+    def __init__(self):
+        self.signature = FakeSignature()
+
+    def signature_from_request(self):
+        return self.signature
+
+
+def test_early_wakeup_hops_until_not_before():
+    task = FakeTask()
+    with pytest.raises(Ignore):
+        defer_until_not_before(task, time.time() + 6 * 3600)
+    assert task.signature.countdowns[0] < settings.CELERY_VISIBILITY_TIMEOUT_SECONDS
+
+    defer_until_not_before(task, time.time() - 1)
+    defer_until_not_before(task, None)
+    assert len(task.signature.countdowns) == 1
+
+
+class ScriptRedis:
+    def __init__(self):
+        self.calls = []
+
+    def register_script(self, script):
+        def run(keys, args):
+            self.calls.append((script, keys, args))
+            return 0
+        return run
+
+
+def test_retry_budget_spends_in_one_script_call():
+    client = ScriptRedis()
+    assert RetryBudget(client=client).try_spend("browser") is False
+    script, keys, args = client.calls[0]
+    assert "HINCRBY" in script and "HMGET" in script
+    assert keys[0].endswith(str(int(time.time() // 60)))
+    assert args[:2] == [settings.RETRY_BUDGET_RATIO, settings.RETRY_BUDGET_MIN_RETRIES]
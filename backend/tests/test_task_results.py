@@ -0,0 +1,100 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import automation
+from app.api.endpoints.automation import _resolve_traces
+from app.core.db import SessionLocal
+from app.core.security import create_access_token
+from app.main import app
+from app.models.audit_log import AuditLog
+from app.models.error_codes import ErrorCode
+from app.models.user import User
+from app.tasks import worker
+from app.tasks.results import MAX_ERROR_LENGTH, result_envelope
+
+
+def test_envelope_truncates_errors_and_flattens_error_codes():
+    envelope = result_envelope(
+        "failed", trace_id="t-1", error="x" * 5000, error_code=ErrorCode.TIMEOUT, steps_total=3
+    )
+    assert len(envelope["error"]) == MAX_ERROR_LENGTH
+    assert envelope["error_code"] == "TIMEOUT"
+    assert envelope["steps_total"] == 3
+
+
+def test_goal_task_stores_trace_in_audit_log_and_returns_envelope(monkeypatch):
+    steps = [{"action": {"type": "click", "selector": f"#b{i}"}, "status": "success"} for i in range(40)]
+    steps.append({"action": {"type": "click"}, "status": "failed", "error": "gone"})
+
+    async def fake_run_automation(goal, context):
+        return {"goal": goal, "status": "failed", "steps": steps, "error": "gone", "error_code": ErrorCode.SELECTOR_NOT_FOUND}
+
+    monkeypatch.setattr(worker.ai_service, "run_automation", fake_run_automation)
+    monkeypatch.setattr(worker, "run_async", lambda coro, timeout=None: asyncio.run(coro))
+    monkeypatch.setattr(worker, "publish_event", lambda event: None)
+
+    envelope = worker.execute_act_goal_task("Open settings", context={"page": "settings"})
+
+    assert "steps" not in envelope
+    assert envelope["status"] == "failed"
+    assert envelope["error_code"] == "SELECTOR_NOT_FOUND"
+    assert envelope["steps_total"] == 41
+    assert envelope["steps_failed"] == 1
+
+    db = SessionLocal()
+    try:
+        admin = User(id=0, email="admin@example.com", is_superuser=True)
+        resolved = _resolve_traces(db, envelope, admin)
+        assert len(resolved["trace"]["result"]["steps"]) == 41
+        assert resolved["trace"]["error_code"] == "SELECTOR_NOT_FOUND"
+    finally:
+        db.query(AuditLog).filter(AuditLog.id == envelope["audit_log_id"]).delete()
+        db.commit()
+        db.close()
+
+
+class FakeAsyncResult:
+    def __init__(self, result):
+        self.result = result
+        self.info = result
+        self.state = "SUCCESS"
+
+    def ready(self):
+        return True
+
+    def successful(self):
+        return True
+
+    def failed(self):
+        return False
+
+
+def test_job_traces_require_auth_and_ownership(monkeypatch):
+    db = SessionLocal()
+    owner = User(id=991, email="trace-owner@example.com", hashed_password="x", full_name="Owner", is_active=True)
+    other = User(id=992, email="trace-other@example.com", hashed_password="x", full_name="Other", is_active=True)
+    db.add_all([owner, other])
+    audit = AuditLog(trace_id="trace-991", action="Publish to linkedin", user="991", details={"result": {"ok": True}})
+    db.add(audit)
+    db.commit()
+    monkeypatch.setattr(
+        automation.celery_app, "AsyncResult", lambda job_id: FakeAsyncResult({"status": "success", "audit_log_id": audit.id})
+    )
+    client = TestClient(app)
+    url = "/api/v1/automation/jobs/job-991?include_trace=true"
+    try:
+        assert client.get("/api/v1/automation/jobs/job-991").status_code == 200
+        assert client.get(url).status_code == 401
+
+        denied = client.get(url, headers={"Authorization": f"Bearer {create_access_token(other.email)}"})
+        assert denied.status_code == 403
+
+        allowed = client.get(url, headers={"Authorization": f"Bearer {create_access_token(owner.email)}"})
+        assert allowed.status_code == 200
+        assert allowed.json()["result"]["trace"]["result"] == {"ok": True}
+    finally:
+        db.query(AuditLog).filter(AuditLog.id == audit.id).delete()
+        db.query(User).filter(User.id.in_([991, 992])).delete()
+        db.commit()
+        db.close()
@@ -0,0 +1,99 @@
+import json
+import time
+from types import SimpleNamespace
+
+from app.tasks import telemetry
+
+
+class FakePipeline:
+    def __init__(self, lists):
+        self.lists = lists
+        self.ops = []
+
+    def __getattr__(self, name):
+        def queue_op(*args):
+            self.ops.append((name, args))
+            return self
+        return queue_op
+
+    def execute(self):
+        replies = []
+        for name, args in self.ops:
+            items = self.lists.setdefault(args[0], [])
+            if name == "lpush":
+                items.insert(0, str(args[1]).encode())
+                replies.append(len(items))
+            elif name == "ltrim":
+                del items[args[2] + 1:]
+                replies.append(True)
+            elif name == "llen":
+                replies.append(len(items))
+            elif name == "lindex":
+                replies.append(items[args[1]] if items else None)
+            elif name == "lrange":
+                replies.append(list(items))
+        self.ops = []
+        return replies
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = {}
+
+    def pipeline(self):
+        return FakePipeline(self.lists)
+
+
+class FakeRequest(dict):
+    delivery_info = {"routing_key": "browser"}
+
+
+def _message(enqueued_at):
+    return json.dumps({"body": "", "headers": {"enqueued_at": enqueued_at}}).encode()
+
+
+def test_queue_metrics_from_depth_oldest_message_and_samples(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(telemetry, "_client", client)
+    now = time.time()
+    # LPUSH order: newest first, oldest at the tail.
+    client.lists["browser"] = [_message(now - 5), _message(now - 30)]
+    client.lists["browser\x06\x169"] = [_message(now - 90)]
+
+    for wait_ms in range(1, 101):
+        telemetry._record("browser", "wait", wait_ms / 1000)
+    telemetry._record("browser", "run", 12.0)
+
+    metrics = telemetry.read_queue_metrics(["browser", "audit"])
+
+    assert metrics["browser"]["depth"] == 3
+    assert 89 <= metrics["browser"]["oldest_age_seconds"] <= 95
+    assert metrics["browser"]["wait_p50_seconds"] in (0.05, 0.051)
+    assert metrics["browser"]["wait_p95_seconds"] in (0.095, 0.096)
+    assert metrics["browser"]["run_p95_seconds"] == 12.0
+    assert metrics["audit"] == {
+        "depth": 0,
+        "oldest_age_seconds": None,
+        "wait_p50_seconds": None,
+        "wait_p95_seconds": None,
+        "run_p50_seconds": None,
+        "run_p95_seconds": None,
+        "samples": 0,
+    }
+
+
+def test_signals_record_wait_from_eta_and_run_time(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(telemetry, "_client", client)
+
+    headers = {}
+    telemetry.stamp_enqueue_time(headers=headers)
+    request = FakeRequest(enqueued_at=headers["enqueued_at"] - 10, eta=None)
+    task = SimpleNamespace(request=request)
+
+    telemetry.record_wait_time(task_id="t1", task=task)
+    telemetry.record_run_time(task_id="t1", task=task)
+
+    waits = client.lists["novapilot:metrics:tasks:browser:wait"]
+    assert 9500 <= int(waits[0]) <= 11000
+    assert "novapilot:metrics:tasks:browser:run" in client.lists
@@ -0,0 +1,94 @@
+import asyncio
+import concurrent.futures
+
+import pytest
+
+from app.services.nova import browser_executor
+from app.tasks.event_loop import WorkerEventLoop
+
+
+def test_worker_loop_is_reused_across_tasks_and_runs_shutdown_hooks():
+    worker_loop = WorkerEventLoop()
+    hooks = []
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    async def hook():
+        hooks.append(asyncio.get_running_loop())
+
+    worker_loop.add_shutdown_hook(hook)
+    worker_loop.start()
+    try:
+        first = worker_loop.run(current_loop())
+        second = worker_loop.run(current_loop())
+        assert first is second
+    finally:
+        worker_loop.stop()
+
+    assert hooks == [first]
+    assert not worker_loop.running
+    assert first.is_closed()
+
+
+def test_worker_loop_run_cancels_on_timeout():
+    worker_loop = WorkerEventLoop()
+    worker_loop.start()
+    try:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            worker_loop.run(asyncio.sleep(1), timeout=0.01)
+    finally:
+        worker_loop.stop()
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.closed_on = None
+
+    async def close(self):
+        self.closed_on = asyncio.get_running_loop()
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browser = FakeBrowser()
+        self.stopped_on = None
+        self.chromium = self
+
+    async def launch(self, **kwargs):
+        return self.browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.stopped_on = asyncio.get_running_loop()
+
+
+def test_relaunch_on_new_loop_closes_stale_browser_on_its_own_loop(monkeypatch):
+    launched = []
+
+    def fake_async_playwright():
+        launched.append(FakePlaywright())
+        return launched[-1]
+
+    monkeypatch.setattr(browser_executor, "async_playwright", fake_async_playwright)
+    executor = browser_executor.BrowserExecutor()
+    worker_loop = WorkerEventLoop()
+    worker_loop.start()
+    try:
+        original = worker_loop.run(_launch_and_get_loop(executor))
+        asyncio.run(executor.launch())
+        worker_loop.run(asyncio.sleep(0.01))
+    finally:
+        worker_loop.stop()
+
+    stale, fresh = launched
+    assert stale.browser.closed_on is original
+    assert stale.stopped_on is original
+    assert executor._playwright is fresh
+
+
+async def _launch_and_get_loop(executor):
+    await executor.launch()
+    return asyncio.get_running_loop()
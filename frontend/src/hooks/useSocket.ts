@@ -13,11 +13,27 @@ type StatusUpdate = {
     payload: StatusUpdatePayload;
 };
 
-export const useSocket = (path: string = '/automation/ws/logs') => {
+// Server-side subscription filters; without any the socket receives the signed-in user's events.
+export interface SocketFilters {
+    trace_id?: string;
+    post_id?: number;
+    job_id?: string;
+    user_id?: number;
+}
+
+export const useSocket = (path: string = '/automation/ws/logs', filters: SocketFilters = {}) => {
     const [isConnected, setIsConnected] = useState(false);
     const [lastMessage, setLastMessage] = useState<StatusUpdate | null>(null);
     const [activities, setActivities] = useState<StatusUpdatePayload[]>([]);
     const socketRef = useRef<WebSocket | null>(null);
+    // Cursor of the last event received; sent on reconnect so missed events are replayed.
+    const lastEventIdRef = useRef<string | null>(null);
+
+    const filterQuery = new URLSearchParams(
+        Object.entries(filters)
+            .filter(([, value]) => value !== undefined && value !== null && value !== '')
+            .map(([key, value]) => [key, String(value)])
+    ).toString();
 
     useEffect(() => {
         const envApiUrl = (import.meta.env.VITE_API_URL || '').trim();
@@ -26,10 +42,13 @@ export const useSocket = (path: string = '/automation/ws/logs') => {
             ? envApiUrl.replace(/^http/i, 'ws').replace(/\/+$/, '')
             : fallbackWsBase;
         const normalizedPath = path.startsWith('/') ? path : `/${path}`;
-        const url = `${wsBaseUrl}${normalizedPath}`;
+        const url = `${wsBaseUrl}${normalizedPath}${filterQuery ? `?${filterQuery}` : ''}`;
 
         const connect = () => {
-            const socket = new WebSocket(url);
+            const cursor = lastEventIdRef.current;
+            const socket = new WebSocket(
+                cursor ? `${url}${url.includes('?') ? '&' : '?'}last_event_id=${encodeURIComponent(cursor)}` : url
+            );
             socketRef.current = socket;
 
             socket.onopen = () => {
@@ -39,18 +58,27 @@ export const useSocket = (path: string = '/automation/ws/logs') => {
             socket.onmessage = (event) => {
                 try {
                     const data = JSON.parse(event.data);
-                    const payload: StatusUpdatePayload = {
-                        id: Date.now(),
-                        action: data.message,
-                        status: data.level === 'ERROR' ? 'ERROR' : 'OK',
-                        timestamp: data.timestamp,
-                        trace_id: data.trace_id
-                    };
+                    // A client that fell behind receives several events in one batch frame.
+                    const events = data.type === 'batch' && Array.isArray(data.events) ? data.events : [data];
+                    if (events.length === 0) {
+                        return;
+                    }
+                    const last = events[events.length - 1];
+                    if (last.event_id) {
+                        lastEventIdRef.current = last.event_id;
+                    }
+                    const payloads: StatusUpdatePayload[] = events.map((item: Record<string, string>, index: number) => ({
+                        id: Date.now() + index,
+                        action: item.message,
+                        status: item.level === 'ERROR' ? 'ERROR' : 'OK',
+                        timestamp: item.timestamp,
+                        trace_id: item.trace_id
+                    }));
                     setLastMessage({
                         type: 'ACTIVITY',
-                        payload
+                        payload: payloads[payloads.length - 1]
                     });
-                    setActivities((prev) => [payload, ...prev].slice(0, 10));
+                    setActivities((prev) => [...payloads.reverse(), ...prev].slice(0, 10));
                 } catch {
                     // Silently fail on parse error in production
                 }
@@ -73,7 +101,7 @@ export const useSocket = (path: string = '/automation/ws/logs') => {
                 socketRef.current.close();
             }
         };
-    }, [path]);
+    }, [path, filterQuery]);
 
     return { isConnected, lastMessage, activities };
 };